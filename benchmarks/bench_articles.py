@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+条目内存占用基准测试
+不访问网络，合成存档记录与扁平条目，分别以 JSON 解析出的 dict 和 articles.py 中的紧凑表示保存，
+用 tracemalloc 测量常驻的内存，并逐条核对紧凑表示能无损还原
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+from articles import Article, ArchivedArticle  # noqa: E402
+from fetch_news import NEWS_SOURCES  # noqa: E402
+
+DEFAULT_SIZES = (100000, 1000000)
+# 合成存档覆盖的抓取次数（每 15 分钟一次，共 4 天），同一次抓取的记录共享 seenAt
+FETCH_RUNS = 384
+
+WORDS = ('market stocks rally oil prices bank rate inflation growth shares bond yield '
+         'investors earnings trade tariff dollar euro crypto index futures').split()
+CJK_WORDS = ('央行 降准 股市 收涨 汇率 人民币 北向资金 新能源 科技股 消费 '
+             '券商 债券 收益率 基金 外资 楼市 制造业 出口 芯片 银行').split()
+# 预先生成的标题/描述数；每行 JSON 解析后仍是各自独立的字符串对象，与真实存档一致
+TEXT_POOL = 1000
+
+
+def make_texts(seed=1):
+    """地区 -> [(标题, 描述)]"""
+    rng = random.Random(seed)
+    texts = {}
+    for region, words, sep in (('international', WORDS, ' '), ('chinese', CJK_WORDS, '')):
+        texts[region] = [(sep.join(rng.choice(words) for _ in range(10)),
+                          sep.join(rng.choice(words) for _ in range(30))) for _ in range(TEXT_POOL)]
+    return texts
+
+
+def make_record(i, count, texts):
+    """共 count 条中第 i 条存档记录的 JSON 行"""
+    source = NEWS_SOURCES[i % len(NEWS_SOURCES)]
+    title, description = texts[source['region']][i % TEXT_POOL]
+    ts = 1769662000 - i * 7
+    run = i * FETCH_RUNS // count
+    minutes = run % 96 * 15
+    seen_at = f'2026-01-{1 + run // 96:02d}T{minutes // 60:02d}:{minutes % 60:02d}:00+00:00'
+    record = {
+        'id': f'{i:016x}',
+        'source': source['name'],
+        'hash': f'{i * 2654435761 % (1 << 64):016x}',
+        'firstSeen': seen_at,
+        'seenAt': seen_at,
+        'item': {
+            'title': title,
+            'link': f'https://example.com/news/{i}',
+            'description': description,
+            'pubDate': f'Thu, 29 Jan 2026 {i % 24:02d}:{i % 60:02d}:00 GMT',
+            'ts': ts
+        }
+    }
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+def make_lines(count):
+    """[(JSON 行, 来源)]"""
+    texts = make_texts()
+    return [(make_record(i, count, texts), NEWS_SOURCES[i % len(NEWS_SOURCES)]) for i in range(count)]
+
+
+# (用例名, dict 表示, 紧凑表示, 紧凑表示还原为 dict)
+CASES = [
+    ('archive',
+     lambda line, source: json.loads(line),
+     lambda line, source: ArchivedArticle.from_record(json.loads(line)),
+     lambda article, source: article.to_record()),
+    ('flat',
+     lambda line, source: dict(json.loads(line)['item'], source=source['name'], region=source['region'],
+                               category=source['category']),
+     lambda line, source: Article(json.loads(line)['item'], source['name'], source['region'], source['category']),
+     lambda article, source: dict(article.to_item(), source=article.source, region=article.region,
+                                  category=article.category)),
+]
+
+
+def measure(build, lines):
+    """返回 (常驻字节数, 构建耗时秒数, 构建结果)
+
+    耗时与内存分开测量：tracemalloc 会让分配密集的代码慢好几倍
+    """
+    gc.collect()
+    started = time.perf_counter()
+    values = [build(line, source) for line, source in lines]
+    elapsed = time.perf_counter() - started
+    del values
+    gc.collect()
+    tracemalloc.start()
+    values = [build(line, source) for line, source in lines]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, elapsed, values
+
+
+def verify(values, restore, build_plain, lines):
+    """逐条核对紧凑表示还原后与 dict 表示相等，返回不一致的条数"""
+    mismatches = 0
+    for article, (line, source) in zip(values, lines):
+        if restore(article, source) != build_plain(line, source):
+            mismatches += 1
+    return mismatches
+
+
+def _fmt_bytes(size):
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='条目内存占用基准测试（不访问网络）')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help=f'条目数（默认 {" ".join(map(str, DEFAULT_SIZES))}）')
+    parser.add_argument('--filter', help='只运行名称包含该字符串的用例')
+    parser.add_argument('--no-verify', action='store_true', help='跳过逐条还原核对')
+    args = parser.parse_args()
+
+    print(f"  {'case':<10}{'items':>10}{'dict':>12}{'compact':>12}{'saved':>8}"
+          f"{'B/item':>14}{'load dict':>12}{'load compact':>14}  round-trip")
+    for name, build_plain, build_compact, restore in CASES:
+        if args.filter and args.filter not in name:
+            continue
+        for count in args.sizes:
+            lines = make_lines(count)
+            plain_bytes, plain_seconds, values = measure(build_plain, lines)
+            del values
+            compact_bytes, compact_seconds, values = measure(build_compact, lines)
+            check = '-' if args.no_verify else (
+                'ok' if not verify(values, restore, build_plain, lines) else 'MISMATCH')
+            del values, lines
+            print(f"  {name:<10}{count:>10}{_fmt_bytes(plain_bytes):>12}{_fmt_bytes(compact_bytes):>12}"
+                  f"{1 - compact_bytes / plain_bytes:>8.0%}"
+                  f"{plain_bytes // count:>7}/{compact_bytes // count:<6}"
+                  f"{plain_seconds:>11.2f}s{compact_seconds:>13.2f}s  {check}")
+
+
+if __name__ == '__main__':
+    main()
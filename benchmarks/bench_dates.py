@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+发布时间规范化基准测试
+对各源的典型时间格式测量 dates.parse_date 的耗时：
+带格式缓存（与 DateNormalizer 相同）、不带缓存的逐格式探测，以及 email.utils 通用解析
+"""
+
+import argparse
+import os
+import sys
+import time
+from email.utils import parsedate_to_datetime
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+from dates import DateNormalizer, parse_date  # noqa: E402
+
+# (格式名, 地区, 样本生成函数)
+SAMPLES = [
+    ('rfc822', 'international', lambda i: f'Thu, {1 + i % 28:02d} Jan 2026 {i % 24:02d}:{i % 60:02d}:07 GMT'),
+    ('rfc822_offset', 'international', lambda i: f'Thu, {1 + i % 28:02d} Jan 2026 {i % 24:02d}:{i % 60:02d}:07 +0800'),
+    ('iso', 'chinese', lambda i: f'2026-01-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:40+00:00'),
+    ('epoch', 'chinese', lambda i: str(1769662000 - i * 60)),
+    ('local_cst', 'chinese', lambda i: f'2026-01-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00'),
+]
+
+
+def _time(func, values, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for value in values:
+            func(value)
+        elapsed = (time.perf_counter() - started) / len(values)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='发布时间解析基准测试（不访问网络）')
+    parser.add_argument('--items', type=int, default=20000, help='每种格式的样本数')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最快一次')
+    args = parser.parse_args()
+
+    print(f"  {'format':<16}{'cached':>12}{'detect':>12}{'email.utils':>14}{'normalize':>12}")
+    for name, region, factory in SAMPLES:
+        values = [factory(i) for i in range(args.items)]
+        offset = 8 * 3600 if region == 'chinese' else 0
+        _, hint = parse_date(values[0], offset)
+        cached = _time(lambda v: parse_date(v, offset, hint), values, args.repeat)
+        detect = _time(lambda v: parse_date(v, offset), values, args.repeat)
+
+        def generic(value):
+            try:
+                return parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+        # email.utils 只认 RFC 822，其余格式记为 -
+        email = _time(generic, values, args.repeat) if generic(values[0]) else None
+
+        # 完整的规范化阶段：补 ts 并排序
+        started = time.perf_counter()
+        DateNormalizer().normalize({'name': name, 'region': region}, [{'pubDate': v} for v in values])
+        normalize = (time.perf_counter() - started) / len(values)
+
+        email_text = f"{email * 1e6:>11.2f} us" if email is not None else f"{'-':>14}"
+        print(f"  {name:<16}{cached * 1e6:>9.2f} us{detect * 1e6:>9.2f} us{email_text}"
+              f"{normalize * 1e6:>9.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+解析器微基准测试
+不访问网络，用合成的 feed 样本测量 fetch_news.py 中各解析函数的耗时和内存峰值，
+并与 JSON 基线对比以发现性能回退
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+import fetch_news  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# 单个用例最少计时时长，不足时自动增加重复次数
+MIN_MEASURE_SECONDS = 0.2
+
+WORDS = ('market stocks rally oil prices bank rate inflation growth shares bond yield '
+         'investors earnings trade tariff dollar euro crypto index futures').split()
+CJK_WORDS = ('央行 降准 股市 收涨 汇率 人民币 北向资金 新能源 科技股 消费 '
+             '券商 债券 收益率 基金 外资 楼市 制造业 出口 芯片 银行').split()
+
+
+def _sentence(rng, words, count, sep=' '):
+    return sep.join(rng.choice(words) for _ in range(count))
+
+
+def make_rss(item_count, seed=1):
+    """RSS 2.0 样本，描述为转义过的 HTML"""
+    rng = random.Random(seed)
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/"><channel>'
+             '<title>Synthetic</title><link>https://example.com/</link>']
+    for i in range(item_count):
+        parts.append(
+            f'<item><title>{_sentence(rng, WORDS, 10)}</title>'
+            f'<link>https://example.com/news/{i}?utm_source=rss&amp;id={i}</link>'
+            f'<description>&lt;p&gt;{_sentence(rng, WORDS, 60)}&lt;/p&gt;</description>'
+            f'<pubDate>Thu, 29 Jan 2026 {i % 24:02d}:{i % 60:02d}:00 GMT</pubDate>'
+            f'<guid>https://example.com/news/{i}</guid></item>'
+        )
+    parts.append('</channel></rss>')
+    return ''.join(parts)
+
+
+def make_atom_cdata(entry_count, seed=2):
+    """CDATA 密集的 Atom 样本，中英混排，带 dc:date 与 href 链接"""
+    rng = random.Random(seed)
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+             '<title>Synthetic Atom</title>']
+    for i in range(entry_count):
+        parts.append(
+            f'<entry><title><![CDATA[{_sentence(rng, CJK_WORDS, 8, "")} {_sentence(rng, WORDS, 4)}]]></title>'
+            f'<link rel="alternate" href="https://example.cn/a/{i}.html"/>'
+            f'<summary><![CDATA[<div><p>{_sentence(rng, CJK_WORDS, 80, "")}</p>'
+            f'<img src="https://example.cn/{i}.jpg"/></div>]]></summary>'
+            f'<dc:date>2026-01-29T{i % 24:02d}:00:00+08:00</dc:date>'
+            f'<updated>2026-01-29T{i % 24:02d}:30:00+08:00</updated></entry>'
+        )
+    parts.append('</feed>')
+    return ''.join(parts)
+
+
+def make_atom_gbk(entry_count):
+    """声明为 GB2312 的 Atom 字节流：expat 不支持该编码，按 ISO-8859-1 解析后只解码提取出的字段"""
+    content = make_atom_cdata(entry_count).replace('encoding="UTF-8"', 'encoding="GB2312"', 1)
+    return content.encode('gb18030')
+
+
+def make_sina_json(item_count, seed=3):
+    rng = random.Random(seed)
+    data = [{
+        'title': _sentence(rng, CJK_WORDS, 10, ''),
+        'url': f'https://finance.sina.com.cn/roll/{i}.shtml',
+        'intro': _sentence(rng, CJK_WORDS, 40, ''),
+        'ctime': str(1769662923 - i * 60)
+    } for i in range(item_count)]
+    return json.dumps({'result': {'status': {'code': 0}, 'data': data}}, ensure_ascii=False)
+
+
+def make_eastmoney_jsonp(item_count, seed=4):
+    rng = random.Random(seed)
+    lives = [{
+        'Title': _sentence(rng, CJK_WORDS, 10, ''),
+        'Url': f'https://finance.eastmoney.com/a/{202601290000 + i}.html',
+        'Content': _sentence(rng, CJK_WORDS, 60, ''),
+        'ShowTime': f'2026-01-29 {i % 24:02d}:{i % 60:02d}:00'
+    } for i in range(item_count)]
+    return 'ajaxResult(' + json.dumps({'LivesList': lives}, ensure_ascii=False) + ');'
+
+
+def make_wallstreet_json(item_count, seed=5):
+    rng = random.Random(seed)
+    items = [{
+        'id': 3700000 + i,
+        'title': _sentence(rng, CJK_WORDS, 10, ''),
+        'summary': _sentence(rng, CJK_WORDS, 40, ''),
+        'display_time': 1769662000 - i * 100
+    } for i in range(item_count)]
+    return json.dumps({'code': 20000, 'data': {'items': items}}, ensure_ascii=False)
+
+
+def make_unclosed_items(count):
+    """只有开标签的 <item>：正则 .*? 对每个开标签都扫描到文末，呈平方级回溯"""
+    return '<rss><channel>' + '<item><title>unterminated' * count + '</channel></rss>'
+
+
+def make_unclosed_titles(count):
+    """<title> 未闭合的条目：逐条触发 title/description 正则的全量扫描"""
+    body = ''.join(f'<item><title>{"x" * 200}<description>{"y" * 200}</item>' for _ in range(count))
+    return '<rss><channel>' + body + '</channel></rss>'
+
+
+def make_unclosed_fields(count):
+    """单个条目里大量未闭合的字段开标签：逐字段的 .*? 对每个开标签都扫描到条目末尾"""
+    return '<rss><channel><item>' + '<title ' * count + '<description' * count + '</item></channel></rss>'
+
+
+def make_jsonp_without_parens(size):
+    """没有括号的 JSONP：去包装的正则无法匹配，json.loads 失败"""
+    return 'var ajaxResult=' + '{"LivesList":[' + ','.join(['{"Title":"t"}'] * size) + ']}'
+
+
+# (用例名, 解析函数名, 样本生成函数)
+CASES = [
+    ('rss_small', 'parse_rss_simple', lambda: make_rss(20)),
+    ('rss_large_4mb', 'parse_rss_simple', lambda: make_rss(8000)),
+    ('atom_cdata', 'parse_rss_simple', lambda: make_atom_cdata(500)),
+    ('atom_gbk', 'parse_rss_simple', lambda: make_atom_gbk(500)),
+    ('rss_unclosed_items', 'parse_rss_simple', lambda: make_unclosed_items(2000)),
+    ('rss_unclosed_titles', 'parse_rss_simple', lambda: make_unclosed_titles(2000)),
+    ('rss_unclosed_fields', 'parse_rss_simple', lambda: make_unclosed_fields(20000)),
+    ('sina_small', 'parse_sina_json', lambda: make_sina_json(50)),
+    ('sina_large', 'parse_sina_json', lambda: make_sina_json(20000)),
+    ('eastmoney_jsonp', 'parse_eastmoney_json', lambda: make_eastmoney_jsonp(50)),
+    ('eastmoney_jsonp_large', 'parse_eastmoney_json', lambda: make_eastmoney_jsonp(20000)),
+    ('eastmoney_no_parens', 'parse_eastmoney_json', lambda: make_jsonp_without_parens(20000)),
+    ('wallstreet_small', 'parse_wallstreet_json', lambda: make_wallstreet_json(20)),
+    ('wallstreet_large', 'parse_wallstreet_json', lambda: make_wallstreet_json(20000)),
+]
+
+
+def measure(func, content, repeat):
+    """返回 (每次调用的最短耗时秒数, 平均耗时, 内存峰值字节, 条目数)"""
+    # 自动确定每轮调用次数，让单轮足够长以降低计时误差
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            result = func(content)
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_MEASURE_SECONDS or loops >= 1000:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, int(MIN_MEASURE_SECONDS / elapsed) + 1)
+
+    timings = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func(content)
+        timings.append((time.perf_counter() - started) / loops)
+
+    gc.collect()
+    tracemalloc.start()
+    func(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), sum(timings) / len(timings), peak, len(result)
+
+
+def run(case_filter=None, repeat=5):
+    """运行所有用例，返回 {用例名: 结果}"""
+    results = {}
+    for name, func_name, factory in CASES:
+        if case_filter and case_filter not in name and case_filter != func_name:
+            continue
+        content = factory()
+        func = getattr(fetch_news, func_name)
+        best, mean, peak, count = measure(func, content, repeat)
+        results[name] = {
+            'parser': func_name,
+            'inputBytes': len(content if isinstance(content, bytes) else content.encode('utf-8')),
+            'items': count,
+            'bestSeconds': best,
+            'meanSeconds': mean,
+            'peakBytes': peak
+        }
+        print(f"  {name:<24} {func_name:<22} {_fmt_time(best):>10} {_fmt_bytes(peak):>10}  "
+              f"{count:>3} items  ({_fmt_bytes(results[name]['inputBytes'])} input)")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """对比基线，返回回退的用例列表"""
+    regressions = []
+    print(f"\n对比基线（阈值 {threshold:.0%}）:")
+    for name, current in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            print(f"  {name:<24} (基线中没有该用例)")
+            continue
+        time_ratio = current['bestSeconds'] / base['bestSeconds'] if base['bestSeconds'] else 1
+        mem_ratio = current['peakBytes'] / base['peakBytes'] if base['peakBytes'] else 1
+        flag = ''
+        if time_ratio > 1 + threshold or mem_ratio > 1 + threshold:
+            flag = '  ⚠️  REGRESSION'
+            regressions.append(name)
+        print(f"  {name:<24} time x{time_ratio:.2f}  memory x{mem_ratio:.2f}{flag}")
+    return regressions
+
+
+def _fmt_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def _fmt_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def write_fixtures(directory):
+    """把合成样本写到磁盘，便于手动检查或在其他工具中复用"""
+    os.makedirs(directory, exist_ok=True)
+    for name, func_name, factory in CASES:
+        ext = 'xml' if func_name == 'parse_rss_simple' else 'json'
+        content = factory()
+        with open(os.path.join(directory, f'{name}.{ext}'), 'wb') as f:
+            f.write(content if isinstance(content, bytes) else content.encode('utf-8'))
+    print(f"✅ Fixtures written to {directory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='解析器微基准测试（不访问网络）')
+    parser.add_argument('--filter', help='只运行名称包含该字符串的用例，或指定解析函数名')
+    parser.add_argument('--repeat', type=int, default=5, help='每个用例的计时轮数（默认 5）')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线 JSON 文件路径')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果写为新基线')
+    parser.add_argument('--threshold', type=float, default=0.25, help='判定回退的相对阈值（默认 0.25）')
+    parser.add_argument('--fail-on-regression', action='store_true', help='发现回退时以非零状态退出')
+    parser.add_argument('--write-fixtures', metavar='DIR', help='把合成样本写入目录后退出')
+    args = parser.parse_args()
+
+    if args.write_fixtures:
+        write_fixtures(args.write_fixtures)
+        return
+
+    print(f"Running parser benchmarks (repeat={args.repeat})...")
+    results = run(args.filter, max(1, args.repeat))
+
+    if args.save_baseline:
+        baseline = {'python': sys.version.split()[0], 'results': results}
+        if args.filter and os.path.exists(args.baseline):
+            # 只跑了部分用例时合并到已有基线
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            previous.get('results', {}).update(results)
+            baseline['results'] = previous.get('results', results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n✅ Baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print(f"\n(no baseline at {args.baseline}; run with --save-baseline to create one)")
+
+
+if __name__ == '__main__':
+    main()
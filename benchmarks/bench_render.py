@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+页面渲染基准测试
+对比两种渲染方式在 2000 条新闻上的开销：
+  legacy     —— 页面脚本在每次切换标签时展开条目、按重新解析的日期排序、逐张卡片设置 innerHTML
+  prerender  —— generate_html.py 构建时渲染好全局排序的卡片，切换标签只改写一条 CSS 规则
+Python 部分测量构建耗时和页面体积；安装了 node 时用桩 DOM 测量脚本本身的耗时（不含排版）；
+--html 写出一个可在浏览器中打开的对比页面，包含排版在内的真实耗时
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generate_html  # noqa: E402
+from bench_parsers import CJK_WORDS, WORDS, _sentence  # noqa: E402
+
+SOURCE_COUNT = 20
+
+# 改为预渲染之前 renderNews / renderItems 的做法，作为对比基准
+LEGACY_RENDER_JS = r'''
+function legacyRender(newsData, currentRegion, currentSource, grid) {
+    let allItems = [];
+    newsData.sources.forEach(source => {
+        if (currentRegion !== 'all' && source.region !== currentRegion) return;
+        if (currentSource !== 'all' && source.name !== currentSource) return;
+        if (source.items) {
+            source.items.forEach(item => {
+                allItems.push({ ...item, sourceName: source.name, sourceRegion: source.region });
+            });
+        }
+    });
+    allItems.sort((a, b) => new Date(b.pubDate || 0) - new Date(a.pubDate || 0));
+    grid.innerHTML = '';
+    allItems.forEach(item => {
+        const card = document.createElement('div');
+        card.className = 'news-card';
+        card.innerHTML = `
+            <div class="news-header">
+                <span class="news-source">${item.sourceName}</span>
+                <span class="news-time">${item.pubDate}</span>
+            </div>
+            <h3 class="news-title">
+                <a href="${item.link}" target="_blank" rel="noopener">${item.title}</a>
+            </h3>
+            ${item.description ? `<p class="news-description">${item.description}</p>` : ''}
+            <div class="news-footer">
+                <a href="${item.link}" target="_blank" rel="noopener" class="read-more">阅读全文 →</a>
+            </div>
+        `;
+        grid.appendChild(card);
+    });
+}
+
+function prerenderFilter(currentRegion, currentSource, style) {
+    const rules = [];
+    if (currentRegion !== 'all') rules.push(`#grid > .news-card:not([data-region="${currentRegion}"]) { display: none; }`);
+    if (currentSource !== 'all') rules.push(`#grid > .news-card:not([data-source="${currentSource}"]) { display: none; }`);
+    style.textContent = rules.join('\n');
+}
+'''
+
+# node 下的桩 DOM：innerHTML 只保存字符串，不解析也不排版
+NODE_RUNNER_JS = r'''
+const data = JSON.parse(require('fs').readFileSync(process.argv[1], 'utf8'));
+global.document = { createElement: () => ({ className: '', innerHTML: '' }) };
+const grid = { children: [], set innerHTML(v) { this.children = []; }, appendChild(c) { this.children.push(c); } };
+const style = { textContent: '' };
+function time(fn, repeat) {
+    let best = Infinity;
+    for (let i = 0; i < repeat; i++) {
+        const started = process.hrtime.bigint();
+        fn();
+        best = Math.min(best, Number(process.hrtime.bigint() - started) / 1e6);
+    }
+    return best;
+}
+const results = {};
+for (const [region, source] of data.views) {
+    const view = `${region}/${source}`;
+    results[view] = {
+        legacy: time(() => legacyRender(data.newsData, region, source, grid), data.repeat),
+        prerender: time(() => prerenderFilter(region, source, style), data.repeat)
+    };
+}
+console.log(JSON.stringify(results));
+'''
+
+BROWSER_PAGE = '''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="UTF-8">
+<title>render benchmark</title>
+<style>
+.news-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(380px, 1fr)); gap: 20px; }
+.news-card { border: 1px solid #ccc; padding: 24px; display: flex; flex-direction: column; gap: 16px; }
+</style>
+<style id="filter-style"></style>
+</head>
+<body>
+<pre id="report">running...</pre>
+<div class="news-grid" id="grid"></div>
+<template id="prerendered">__CARDS__</template>
+<script>
+__RENDER_JS__
+const newsData = __DATA__;
+const views = __VIEWS__;
+const grid = document.getElementById('grid');
+const style = document.getElementById('filter-style');
+const lines = [];
+function measure(fn) {
+    const started = performance.now();
+    fn();
+    grid.offsetHeight;  // 强制同步排版，计入渲染开销
+    return performance.now() - started;
+}
+// legacy：每个视图都重建 DOM
+views.forEach(([region, source]) => {
+    lines.push(['legacy', `${region}/${source}`, measure(() => legacyRender(newsData, region, source, grid))]);
+});
+// prerender：插入一次预渲染的卡片（对应浏览器解析页面），之后只切换 CSS 规则
+grid.innerHTML = '';
+lines.push(['prerender', 'initial insert', measure(() => {
+    grid.appendChild(document.getElementById('prerendered').content.cloneNode(true));
+})]);
+views.forEach(([region, source]) => {
+    lines.push(['prerender', `${region}/${source}`, measure(() => prerenderFilter(region, source, style))]);
+});
+document.getElementById('report').textContent =
+    lines.map(([mode, view, ms]) => `${mode.padEnd(10)} ${view.padEnd(32)} ${ms.toFixed(2).padStart(8)} ms`).join('\\n');
+console.log(document.getElementById('report').textContent);
+</script>
+</body>
+</html>
+'''
+
+
+def make_news_data(article_count, seed=11):
+    """合成带 ts 的 news_data：SOURCE_COUNT 个来源，中英文各半"""
+    rng = random.Random(seed)
+    per_source = max(1, article_count // SOURCE_COUNT)
+    now = 1769662000
+    sources = []
+    for s in range(SOURCE_COUNT):
+        chinese = s % 2 == 1
+        items = []
+        for i in range(per_source):
+            ts = now - rng.randint(0, 7 * 86400)
+            if chinese:
+                title, description = _sentence(rng, CJK_WORDS, 8, ''), _sentence(rng, CJK_WORDS, 30, '')
+            else:
+                title, description = _sentence(rng, WORDS, 10), _sentence(rng, WORDS, 40)
+            items.append({'title': title, 'link': f'https://example.com/{s}/{i}', 'description': description,
+                          'pubDate': time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(ts)), 'ts': ts})
+        items.sort(key=lambda item: -item['ts'])
+        sources.append({'name': f'source-{s}', 'category': 'bench',
+                        'region': 'chinese' if chinese else 'international',
+                        'itemCount': len(items), 'items': items})
+    return {'fetchTime': '2026-01-29T00:00:00', 'sources': sources,
+            'regions': {'international': [s['name'] for s in sources if s['region'] == 'international'],
+                        'chinese': [s['name'] for s in sources if s['region'] == 'chinese']}}
+
+
+def views_for(news_data):
+    """依次切换的视图：全部、两个地区、每个地区的第一个来源"""
+    views = [['all', 'all'], ['international', 'all'], ['chinese', 'all']]
+    for region in ('international', 'chinese'):
+        source = next(s['name'] for s in news_data['sources'] if s['region'] == region)
+        views.append([region, source])
+    return views
+
+
+def _size(text):
+    data = text.encode('utf-8')
+    return len(data), len(gzip.compress(data, compresslevel=9, mtime=0))
+
+
+def run_node(news_data, views, repeat):
+    """用 node 和桩 DOM 测量两种方式的脚本耗时；没有 node 时返回 None"""
+    node = shutil.which('node')
+    if not node:
+        return None
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump({'newsData': news_data, 'views': views, 'repeat': repeat}, f, ensure_ascii=False)
+        data_path = f.name
+    try:
+        output = subprocess.run([node, '-e', LEGACY_RENDER_JS + NODE_RUNNER_JS, data_path],
+                                capture_output=True, text=True, check=True).stdout
+    finally:
+        os.remove(data_path)
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='页面渲染基准测试（不访问网络）')
+    parser.add_argument('--articles', type=int, default=2000, help='新闻条数')
+    parser.add_argument('--repeat', type=int, default=10, help='重复次数，取最快一次')
+    parser.add_argument('--html', help='写出浏览器对比页面的路径')
+    args = parser.parse_args()
+
+    news_data = make_news_data(args.articles)
+    views = views_for(news_data)
+    total = sum(s['itemCount'] for s in news_data['sources'])
+
+    # 构建端：预渲染卡片的耗时与页面体积
+    best = None
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        cards = generate_html.render_cards(news_data)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    legacy_page = generate_html.render_html(news_data, prerender=False)
+    prerender_page = generate_html.render_html(news_data)
+    print(f"{total} articles, {len(news_data['sources'])} sources")
+    print(f"  build: render_cards {best * 1e3:.1f} ms")
+    for label, page in (('legacy page', legacy_page), ('prerender page', prerender_page)):
+        raw, gz = _size(page)
+        print(f"  {label:<16} {raw / 1024:8.1f} KB raw {gz / 1024:8.1f} KB gzip")
+
+    # 浏览器端脚本耗时（桩 DOM，不含 HTML 解析与排版）
+    results = run_node(news_data, views, args.repeat)
+    if results is None:
+        print("  node not found, skipped script timing")
+    else:
+        print(f"  {'view':<32}{'legacy':>12}{'prerender':>12}   (node, stub DOM)")
+        for view, timing in results.items():
+            print(f"  {view:<32}{timing['legacy']:>9.2f} ms{timing['prerender']:>9.3f} ms")
+
+    if args.html:
+        page = (BROWSER_PAGE.replace('__RENDER_JS__', LEGACY_RENDER_JS)
+                .replace('__DATA__', generate_html.script_json(news_data))
+                .replace('__VIEWS__', json.dumps(views))
+                .replace('__CARDS__', cards))
+        with open(args.html, 'w', encoding='utf-8') as f:
+            f.write(page)
+        print(f"  browser benchmark written to {args.html}")
+
+
+if __name__ == '__main__':
+    main()
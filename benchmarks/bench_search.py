@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+检索索引基准测试
+用合成的中英文条目构建 search_index 索引，测量构建耗时、分片体积和查询延迟
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import search_index  # noqa: E402
+from bench_parsers import CJK_WORDS, WORDS, _sentence  # noqa: E402
+
+QUERIES = ['oil prices', 'bank rate inflation', 'tariff', '央行', '新能源 汽车', '芯片', '油', 'crypto 基金']
+
+
+def make_news_data(doc_count, seed=7):
+    """合成 news_data：一半英文来源，一半中文来源"""
+    rng = random.Random(seed)
+    sources = []
+    per_source = max(1, doc_count // 20)
+    for s in range(20):
+        chinese = s % 2 == 1
+        items = []
+        for i in range(per_source):
+            if chinese:
+                title = _sentence(rng, CJK_WORDS, 8, '')
+                description = _sentence(rng, CJK_WORDS, 30, '')
+            else:
+                title = _sentence(rng, WORDS, 10)
+                description = _sentence(rng, WORDS, 40)
+            items.append({'title': title, 'link': f'https://example.com/{s}/{i}',
+                          'description': description, 'pubDate': ''})
+        sources.append({'name': f'source-{s}', 'region': 'chinese' if chinese else 'international',
+                        'itemCount': len(items), 'items': items})
+    return {'sources': sources}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检索索引基准测试（不访问网络）')
+    parser.add_argument('--docs', type=int, nargs='+', default=[1000, 10000, 50000], help='文档数量')
+    parser.add_argument('--repeat', type=int, default=20, help='每个查询的重复次数')
+    args = parser.parse_args()
+
+    for doc_count in args.docs:
+        news_data = make_news_data(doc_count)
+        directory = tempfile.mkdtemp(prefix='search-bench-')
+        try:
+            started = time.perf_counter()
+            stats = search_index.write_index(news_data, directory)
+            build_seconds = time.perf_counter() - started
+            print(f"\n{stats['docs']} docs: build {build_seconds * 1e3:.0f} ms, {stats['terms']} terms, "
+                  f"{stats['shards']} shards, {stats['shardBytes'] / 1024:.0f} KB postings")
+
+            for query in QUERIES:
+                # 冷查询：新建索引对象，包含分片加载
+                started = time.perf_counter()
+                index = search_index.SearchIndex(directory)
+                hits = len(index.search(query, limit=50))
+                cold = time.perf_counter() - started
+                shards = index.shards_loaded
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    index.search(query, limit=50)
+                    timings.append(time.perf_counter() - started)
+                timings.sort()
+                print(f"  {query:<20} cold {cold * 1e3:7.2f} ms ({shards} shards)  "
+                      f"warm p50 {timings[len(timings) // 2] * 1e3:7.3f} ms  {hits:>3} hits")
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+追加写入的新闻存档
+按月分段的 JSONL 文件，每行一条记录，以规范化链接的哈希为键；
+只有新出现或内容变化的条目才追加，读取时后写入的记录覆盖先前版本；
+内存中的记录为 articles.ArchivedArticle，不保留每行 JSON 解析出的 dict；
+多个进程（分片抓取）可以同时追加同一个分段文件，每次追加持有该文件的排他锁
+"""
+
+import glob
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from articles import ArchivedArticle
+
+# 规范化链接时去掉的跟踪参数
+TRACKING_PARAMS = {'at_medium', 'at_campaign', 'spm', 'cmpid', 'ncid', 'mod', 'tt_from', 'fbclid', 'gclid'}
+TRACKING_PREFIXES = ('utm_',)
+
+
+def normalize_link(link):
+    """规范化链接：小写 scheme/host，去掉 fragment、跟踪参数与默认端口"""
+    link = (link or '').strip()
+    if not link:
+        return ''
+    parts = urlsplit(link)
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme, netloc.rsplit(':', 1)[-1]) in (('http', '80'), ('https', '443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)]
+    return urlunsplit((scheme, netloc, parts.path or '/', urlencode(query), ''))
+
+
+def article_id(source_name, item):
+    """条目的稳定 ID：规范化链接的哈希；没有链接时退回到 来源+标题"""
+    key = normalize_link(item.get('link'))
+    if not key:
+        key = f"{source_name}\n{item.get('title', '').strip()}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def content_hash(item):
+    """条目内容的哈希，用于判断同一链接的内容是否变化"""
+    payload = json.dumps(item, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class ArticleStore:
+    """分段 JSONL 新闻存档
+
+    records 以 (来源, ID) 为键保存最新记录（ArchivedArticle，同一链接可能同时出现在多个源中）；
+    每个来源维护一个按首次出现先后排序的 ID 列表，因此 latest() 只需取列表尾部，不必排序。
+    sources 不为 None 时只载入这些来源的记录（分片只需要自己的来源）
+    """
+
+    def __init__(self, directory, sources=None):
+        self.directory = directory
+        self.sources = frozenset(sources) if sources is not None else None
+        self.records = {}
+        self._by_source = {}
+        self._last_seen = {}
+        self._pending = []
+        self._load()
+
+    def _load(self):
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.jsonl'))):
+            with open(path, 'r', encoding='utf-8') as f:
+                # 共享锁：不会读到其它进程追加了一半的行
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_SH)
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = ArchivedArticle.from_record(json.loads(line))
+                    except (ValueError, KeyError):
+                        # 写到一半中断的行直接跳过
+                        continue
+                    if self.sources is None or record.source in self.sources:
+                        self._apply(record)
+
+    def _apply(self, record):
+        key = (record.source, record.id)
+        if key not in self.records:
+            self._by_source.setdefault(record.source, []).append(record.id)
+        self.records[key] = record
+        if record.seen_at > self._last_seen.get(record.source, ''):
+            self._last_seen[record.source] = record.seen_at
+
+    def upsert(self, source_name, items, seen_at=None):
+        """写入一个来源本次抓到的条目，返回 (新增数, 变化数)
+
+        items 按源里的顺序（最新在前），按倒序写入，保证 latest() 与源的顺序一致
+        """
+        seen_at = seen_at or datetime.now(timezone.utc).isoformat(timespec='seconds')
+        new_count = changed_count = 0
+        for item in reversed(items):
+            article = article_id(source_name, item)
+            digest = content_hash(item)
+            existing = self.records.get((source_name, article))
+            if existing is not None:
+                if existing.hash == digest:
+                    continue
+                changed_count += 1
+                first_seen = existing.first_seen or seen_at
+            else:
+                new_count += 1
+                first_seen = seen_at
+            record = ArchivedArticle(article, source_name, digest, first_seen, seen_at, item)
+            self._apply(record)
+            self._pending.append(record)
+        return new_count, changed_count
+
+    def latest(self, source_name, n):
+        """返回某来源最近出现的 n 条（最新在前），结构与 news_data.json 中的条目一致（新建的 dict）"""
+        ids = self._by_source.get(source_name, [])
+        return [self.records[(source_name, article)].to_item() for article in reversed(ids[-n:])] if n > 0 else []
+
+    def last_seen(self, source_name):
+        """某来源最近一次写入新条目或变化条目的时间（ISO 8601），没有记录时返回 None"""
+        return self._last_seen.get(source_name)
+
+    def count(self, source_name=None):
+        """存档中的条目数"""
+        if source_name is None:
+            return len(self.records)
+        return len(self._by_source.get(source_name, []))
+
+    def flush(self):
+        """把待写入的记录追加到对应月份的分段文件"""
+        if not self._pending:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        segments = {}
+        for record in self._pending:
+            segments.setdefault(record.seen_at[:7], []).append(record)
+        for month, records in segments.items():
+            data = ''.join(json.dumps(record.to_record(), ensure_ascii=False, separators=(',', ':')) + '\n'
+                           for record in records)
+            with open(os.path.join(self.directory, f'{month}.jsonl'), 'a', encoding='utf-8') as f:
+                # 锁在关闭文件（写出缓冲区之后）时释放，其它进程的追加不会插进这些行中间
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(data)
+        written = len(self._pending)
+        self._pending = []
+        return written
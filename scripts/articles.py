@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+紧凑的条目表示
+news_data.json 与存档中的条目是普通 dict：每条都带一张哈希表，来源名、抓取时间等字符串
+在每条记录里各存一份。存档里有几十万条历史记录时，这些开销占了常驻内存的大头。
+
+Article 用 __slots__ 保存条目的已知字段，来源、地区、分类经 sys.intern 共享同一个字符串对象；
+不认识的字段原样放在 extra 中。to_item() 还原出与原条目相等的 dict（已知字段排在前面），
+缺失的字段仍然缺失，因此与 JSON 之间的往返是无损的
+"""
+
+import sys
+
+# 条目 JSON 键 -> 属性名，to_item() 按这个顺序输出
+ITEM_FIELDS = (
+    ('title', 'title'),
+    ('link', 'link'),
+    ('description', 'description'),
+    ('pubDate', 'pub_date'),
+    ('ts', 'ts'),
+)
+ITEM_KEYS = frozenset(key for key, _ in ITEM_FIELDS)
+
+
+class _Absent:
+    """字段在原条目中不存在（与空字符串、None 区分开）"""
+
+    def __repr__(self):
+        return '<absent>'
+
+
+ABSENT = _Absent()
+
+
+def intern_text(value):
+    """字符串经 sys.intern 共享，其他值原样返回"""
+    return sys.intern(value) if type(value) is str else value
+
+
+class Article:
+    """一条新闻：item 为 news_data.json 中的条目 dict，source / region / category 取自所属来源"""
+
+    __slots__ = ('source', 'region', 'category', 'title', 'link', 'description', 'pub_date', 'ts', 'extra')
+
+    def __init__(self, item, source=None, region=None, category=None):
+        self.source = intern_text(source)
+        self.region = intern_text(region)
+        self.category = intern_text(category)
+        self.title = item.get('title', ABSENT)
+        self.link = item.get('link', ABSENT)
+        self.description = item.get('description', ABSENT)
+        self.pub_date = item.get('pubDate', ABSENT)
+        self.ts = item.get('ts', ABSENT)
+        self.extra = {key: value for key, value in item.items() if key not in ITEM_KEYS} or None
+
+    def to_item(self):
+        """还原为 news_data.json 中的条目 dict（每次返回新对象）"""
+        item = {}
+        for key, attr in ITEM_FIELDS:
+            value = getattr(self, attr)
+            if value is not ABSENT:
+                item[key] = value
+        if self.extra:
+            item.update(self.extra)
+        return item
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.source!r}, {self.title!r})'
+
+
+class ArchivedArticle(Article):
+    """存档记录：{'id', 'source', 'hash', 'firstSeen', 'seenAt', 'item'}
+
+    同一次抓取写入的记录共享 seenAt，经 intern 后只保留一份
+    """
+
+    __slots__ = ('id', 'hash', 'first_seen', 'seen_at')
+
+    def __init__(self, article_id, source, digest, first_seen, seen_at, item):
+        super().__init__(item, source)
+        self.id = article_id
+        self.hash = digest
+        self.first_seen = intern_text(first_seen)
+        self.seen_at = intern_text(seen_at)
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(record['id'], record['source'], record['hash'], record.get('firstSeen'),
+                   record['seenAt'], record['item'])
+
+    def to_record(self):
+        """还原为存档 JSONL 中的一行记录"""
+        record = {'id': self.id, 'source': self.source, 'hash': self.hash}
+        if self.first_seen is not None:
+            record['firstSeen'] = self.first_seen
+        record['seenAt'] = self.seen_at
+        record['item'] = self.to_item()
+        return record
+
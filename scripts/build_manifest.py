@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+增量构建清单
+记录每个产物的输入内容哈希（规范化后的新闻集合、模板等），
+输入未变化且产物存在时跳过重新生成，避免无意义的写盘和提交
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_FILE = '.build_manifest.json'
+# 每次运行都会变化、但不代表内容变化的字段
+VOLATILE_KEYS = ('fetchTime',)
+
+
+def text_hash(text):
+    """字符串或 bytes 的内容哈希"""
+    if isinstance(text, str):
+        text = text.encode('utf-8')
+    return hashlib.sha256(text).hexdigest()[:16]
+
+
+def articles_hash(news_data):
+    """规范化新闻集合的哈希：去掉易变字段后按键排序序列化"""
+    normalized = {k: v for k, v in news_data.items() if k not in VOLATILE_KEYS}
+    return text_hash(json.dumps(normalized, ensure_ascii=False, sort_keys=True, separators=(',', ':')))
+
+
+class BuildManifest:
+    """产物 -> 输入哈希 的映射，保存在输出目录的 .build_manifest.json 中"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_FILE)
+        self.outputs = {}
+        self._dirty = False
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.outputs = json.load(f).get('outputs', {})
+            except (OSError, ValueError):
+                self.outputs = {}
+
+    def is_fresh(self, output, inputs):
+        """产物存在且记录的输入与当前输入一致"""
+        if not os.path.exists(os.path.join(self.directory, output)):
+            return False
+        return self.outputs.get(output) == inputs
+
+    def stale_inputs(self, output, inputs):
+        """列出与上次构建不同的输入名，用于 --check 报告；产物不存在时返回 None"""
+        if not os.path.exists(os.path.join(self.directory, output)):
+            return None
+        recorded = self.outputs.get(output) or {}
+        return sorted(name for name in set(inputs) | set(recorded) if recorded.get(name) != inputs.get(name))
+
+    def record(self, output, inputs):
+        if self.outputs.get(output) != inputs:
+            self.outputs[output] = dict(inputs)
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'outputs': self.outputs}, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        self._dirty = False
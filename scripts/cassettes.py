@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+抓取录像（cassette）
+每个来源一个 JSON 文件 <slug>.json，保存一次真实抓取的原始响应：
+
+  {"cassette": 1, "name", "url", "type", "recordedAt", "status", "headers", "elapsed", "ttfb", "body",
+   "replay": {可选的单源回放参数，见 feed_server.py}}
+
+body 为解压后的原始字节（base64），headers 只保留与内容相关的响应头（Content-Type、ETag、Last-Modified 等），
+传输相关的头在回放时重新生成。fetch_news.py --replay URL 把各来源的地址改写为 URL/<slug>
+"""
+
+import base64
+import glob
+import json
+import os
+
+from data_shards import source_slug
+
+CASSETTE_VERSION = 1
+# 录制时保留的响应头
+RECORDED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Expires')
+
+
+def cassette_path(directory, name):
+    return os.path.join(directory, source_slug(name) + '.json')
+
+
+def replay_url(base, source):
+    """来源在回放服务器上的地址"""
+    return f"{base.rstrip('/')}/{source_slug(source['name'])}"
+
+
+def replay_sources(sources, base):
+    """把来源地址改写到回放服务器（返回副本）"""
+    return [dict(source, url=replay_url(base, source)) for source in sources]
+
+
+def write_cassette(directory, source, response, elapsed, recorded_at):
+    """把 fetch_news.fetch_response 的结果写成来源的录像，返回路径"""
+    headers = {name.lower(): value for name, value in response['headers'].items()}
+    cassette = {
+        'cassette': CASSETTE_VERSION,
+        'name': source['name'],
+        'url': source['url'],
+        'type': source.get('type', 'rss'),
+        'recordedAt': recorded_at,
+        'status': response['status'],
+        'headers': {name: headers[name.lower()] for name in RECORDED_HEADERS if name.lower() in headers},
+        'elapsed': round(elapsed, 4),
+        'ttfb': round(response['timings'].get('ttfb', 0.0), 4),
+        'body': base64.b64encode(response['body']).decode('ascii'),
+    }
+    os.makedirs(directory, exist_ok=True)
+    path = cassette_path(directory, source['name'])
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cassette, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_cassette(path):
+    """读取录像，body 解码为 bytes"""
+    with open(path, 'r', encoding='utf-8') as f:
+        cassette = json.load(f)
+    if cassette.get('cassette') != CASSETTE_VERSION:
+        raise ValueError(f"{path} is not a version {CASSETTE_VERSION} cassette")
+    cassette['body'] = base64.b64decode(cassette.get('body', ''))
+    return cassette
+
+
+def load_cassettes(directory):
+    """目录下的全部录像：slug -> cassette"""
+    cassettes = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        cassette = read_cassette(path)
+        cassettes[source_slug(cassette['name'])] = cassette
+    return cassettes
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+响应编码识别
+只看响应头和前 1KB 内容：BOM 优先，其次是 Content-Type 的 charset，再次是 XML 声明的 encoding，
+都没有时按 UTF-8。GB2312 / GBK 统一按其超集 GB18030 解码，避免生僻字变成乱码。
+
+expat 只认识 UTF-8、UTF-16、ISO-8859-1 和 US-ASCII。其他与 ASCII 兼容的编码（如 GB18030）
+按 ISO-8859-1 交给 expat，每个字符对应一个原始字节，只有提取出的字段再按真实编码解码，
+不必把整个文档先解码一遍
+"""
+
+import codecs
+import re
+
+DEFAULT_ENCODING = 'utf-8'
+# 只在这么多字节里找 BOM 与 XML 声明
+PROLOG_SCAN_BYTES = 1024
+# UTF-32 的 BOM 以 UTF-16 的 BOM 开头，必须先匹配
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+# 按超集解码的编码（codecs 规范名）
+SUPERSETS = {'gb2312': 'gb18030', 'gbk': 'gb18030'}
+# codecs 规范名 -> expat 编码名
+EXPAT_ENCODINGS = {
+    'utf-8': 'UTF-8',
+    'utf-16': 'UTF-16',
+    'utf-16-le': 'UTF-16LE',
+    'utf-16-be': 'UTF-16BE',
+    'iso8859-1': 'ISO-8859-1',
+    'ascii': 'US-ASCII',
+}
+CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+XML_DECL_RE = re.compile(rb'^\s*<\?xml[^>]*?encoding\s*=\s*["\']([\w.:-]+)["\']', re.IGNORECASE)
+# 码位在 U+0100 以上的字符不可能来自 ISO-8859-1 的单个字节，只能是字符引用
+_NON_BYTE_RE = re.compile(r'([^\x00-\xff]+)')
+
+
+def normalize(name):
+    """编码名 -> codecs 规范名（GB2312 / GBK 换成 GB18030），不认识时返回 None"""
+    try:
+        encoding = codecs.lookup(name.strip()).name
+    except (LookupError, AttributeError):
+        return None
+    return SUPERSETS.get(encoding, encoding)
+
+
+def detect_encoding(content_type=None, head=b''):
+    """根据 Content-Type 与内容开头（bytes）确定编码，返回 codecs 规范名"""
+    head = head[:PROLOG_SCAN_BYTES]
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = CHARSET_RE.search(content_type or '')
+    encoding = normalize(match.group(1)) if match else None
+    if encoding:
+        return encoding
+    match = XML_DECL_RE.match(head)
+    encoding = normalize(match.group(1).decode('ascii')) if match else None
+    return encoding or DEFAULT_ENCODING
+
+
+def is_ascii_compatible(encoding):
+    """ASCII 字符是否按单字节原样编码（标记与正则可以直接作用在 bytes 上）"""
+    return not encoding.startswith(('utf-16', 'utf-32'))
+
+
+def decode(data, encoding):
+    """按 encoding 解码 bytes，去掉开头的 BOM，无法解码的字节替换为 U+FFFD"""
+    if encoding == 'utf-8':
+        encoding = 'utf-8-sig'
+    return data.decode(encoding, errors='replace')
+
+
+def decode_payload(data, content_type=None):
+    """识别编码并解码整个响应体（JSON 等只能按 str 解析的格式）"""
+    return decode(data, detect_encoding(content_type, data))
+
+
+def decode_latin1_bytes(text, encoding):
+    """把按 ISO-8859-1 解析出的字段（每个字符对应一个原始字节）按真实编码解码
+
+    字符引用（&#x4E2D;）产生的 U+0100 以上字符原样保留
+    """
+    try:
+        return text.encode('latin-1').decode(encoding, errors='replace')
+    except UnicodeEncodeError:
+        parts = _NON_BYTE_RE.split(text)
+        return ''.join(part if i % 2 else part.encode('latin-1').decode(encoding, errors='replace')
+                       for i, part in enumerate(parts))
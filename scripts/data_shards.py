@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+按地区和来源拆分的新闻数据分片
+页面外壳只内嵌一份小清单（来源元数据 + 分片文件名），条目放在 news/ 下的 JSON 分片中；
+分片文件名带内容哈希，内容不变时文件名不变，浏览器和 CDN 可以长期缓存。
+分页模式下每个筛选条件（全部 / 地区 / 来源）的条目按时间排好序，切成固定大小的页写入 pages/
+"""
+
+import hashlib
+import json
+import os
+import re
+
+SHARD_DIR = 'news'
+PAGE_DIR = 'pages'
+PAGE_SIZE = 50
+
+
+def _dump(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def source_slug(name):
+    """来源名转文件名：保留 ASCII 字母数字，附加名称哈希保证唯一（中文名只剩哈希）"""
+    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+    digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:6]
+    return f'{slug}-{digest}' if slug else digest
+
+
+def _shard_file(prefix, payload):
+    return f"{prefix}.{hashlib.sha1(payload.encode('utf-8')).hexdigest()[:8]}.json"
+
+
+def sorted_entries(news_data):
+    """所有来源的 (条目, 来源) 按 ts 从新到旧排列；ts 相同或缺失时保持快照中的顺序"""
+    entries = [(item, source) for source in news_data.get('sources', []) for item in source.get('items', [])]
+    entries.sort(key=lambda entry: -entry[0]['ts'] if isinstance(entry[0].get('ts'), int) else float('inf'))
+    return entries
+
+
+def filter_keys(source):
+    """条目所属的筛选条件键，与页面脚本中的 filterKey 一致"""
+    return ('all', f"region:{source.get('region', 'international')}", f"source:{source.get('name', '')}")
+
+
+def filter_counts(news_data):
+    """每个筛选条件的条目数，页面直接显示，不必逐源统计"""
+    counts = {'all': 0}
+    for source in news_data.get('sources', []):
+        for key in filter_keys(source):
+            counts[key] = counts.get(key, 0) + len(source.get('items', []))
+    return counts
+
+
+def strip_items(news_data):
+    """去掉条目后的 news_data 副本（来源保留元数据与 itemCount），附带各筛选条件的条目数"""
+    stripped = {k: v for k, v in news_data.items() if k != 'sources'}
+    stripped['sources'] = [{k: v for k, v in source.items() if k != 'items'}
+                           for source in news_data.get('sources', [])]
+    stripped['counts'] = filter_counts(news_data)
+    return stripped
+
+
+def build_shards(news_data):
+    """返回 (清单, {文件名: 内容})
+
+    每个地区一个分片（该地区所有来源的条目），每个来源一个分片；
+    清单中的来源保留除 items 外的全部字段，并记录所属的来源分片
+    """
+    files = {}
+    manifest = strip_items(news_data)
+    by_region = {}
+    for source, entry in zip(news_data.get('sources', []), manifest['sources']):
+        payload = _dump({'sources': [{'name': source.get('name', ''), 'items': source.get('items', [])}]})
+        name = _shard_file(f"source-{source_slug(source.get('name', ''))}", payload)
+        files[name] = payload
+        entry['shard'] = f'{SHARD_DIR}/{name}'
+        by_region.setdefault(source.get('region', 'international'), []).append(
+            {'name': source.get('name', ''), 'items': source.get('items', [])})
+
+    region_shards = {}
+    for region, sources in by_region.items():
+        payload = _dump({'sources': sources})
+        name = _shard_file(f'region-{region}', payload)
+        files[name] = payload
+        region_shards[region] = f'{SHARD_DIR}/{name}'
+
+    manifest['regionShards'] = region_shards
+    return manifest, files
+
+
+def _page_prefix(key):
+    """筛选条件键转文件名前缀：all / region-chinese / source-<slug>"""
+    if key == 'all':
+        return key
+    kind, value = key.split(':', 1)
+    return f'{kind}-{source_slug(value)}' if kind == 'source' else f'{kind}-{value}'
+
+
+def build_pages(news_data, page_size=PAGE_SIZE):
+    """返回 (清单, {文件名: 内容})
+
+    每页是 [[条目, 来源名], ...]，按时间从新到旧；清单记录每个筛选条件的条目数和各页文件名
+    """
+    by_filter = {}
+    for item, source in sorted_entries(news_data):
+        for key in filter_keys(source):
+            by_filter.setdefault(key, []).append([item, source.get('name', '')])
+
+    files = {}
+    filters = {}
+    for key, entries in by_filter.items():
+        pages = []
+        for number, start in enumerate(range(0, len(entries), page_size)):
+            payload = _dump(entries[start:start + page_size])
+            name = _shard_file(f'{_page_prefix(key)}-{number}', payload)
+            files[name] = payload
+            pages.append(f'{PAGE_DIR}/{name}')
+        filters[key] = {'count': len(entries), 'pages': pages}
+
+    manifest = strip_items(news_data)
+    manifest['pageSize'] = page_size
+    manifest['filters'] = filters
+    return manifest, files
+
+
+def _write_files(files, directory):
+    """写入内容哈希命名的文件并清理目录中的旧 .json，返回 {文件名: 字节数}"""
+    os.makedirs(directory, exist_ok=True)
+
+    for name in os.listdir(directory):
+        if name.endswith('.json') and name not in files:
+            os.remove(os.path.join(directory, name))
+
+    sizes = {}
+    for name, payload in files.items():
+        data = payload.encode('utf-8')
+        sizes[name] = len(data)
+        path = os.path.join(directory, name)
+        # 文件名含内容哈希，已存在即内容相同
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(data)
+    return sizes
+
+
+def write_shards(news_data, directory):
+    """把分片写入 directory/news，清理旧分片，返回 (清单, {文件名: 字节数})"""
+    manifest, files = build_shards(news_data)
+    return manifest, _write_files(files, os.path.join(directory, SHARD_DIR))
+
+
+def write_pages(news_data, directory, page_size=PAGE_SIZE):
+    """把分页数据写入 directory/pages，清理旧页，返回 (清单, {文件名: 字节数})"""
+    manifest, files = build_pages(news_data, page_size)
+    return manifest, _write_files(files, os.path.join(directory, PAGE_DIR))
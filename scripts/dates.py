@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+发布时间规范化
+各源的 pubDate 格式不一：RSS 为 RFC 822，华尔街见闻为 ISO，新浪为 Unix 时间戳字符串，
+东方财富为不带时区的北京时间。抓取时统一换算为 UTC 秒级时间戳（条目的 ts 字段），
+每个源记住上次成功的格式，优先尝试，页面排序只比较整数
+"""
+
+import calendar
+import re
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_tz
+
+# 不带时区的时间按来源地区解释（中文源为北京时间）
+NAIVE_OFFSETS = {'chinese': 8 * 3600}
+
+MONTHS = {name: i for i, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+ZONES = {'gmt': 0, 'ut': 0, 'utc': 0, 'z': 0, 'est': -5, 'edt': -4, 'cst': -6, 'cdt': -5,
+         'mst': -7, 'mdt': -6, 'pst': -8, 'pdt': -7}
+# 有歧义的时区缩写按来源地区解释：中文源的 CST 是中国标准时间（UTC+8），不是美国中部时间
+REGION_ZONES = {'chinese': {**ZONES, 'cst': 8}}
+RFC822_RE = re.compile(
+    r'^(?:[A-Za-z]{3},\s*)?(\d{1,2})\s+([A-Za-z]{3})\s+(\d{2,4})\s+(\d{1,2}):(\d{2})(?::(\d{2}))?\s*'
+    r'([+-]\d{4}|[A-Za-z]{1,3})?$')
+
+
+# (年, 月, 日) -> 当天 0 点的 UTC 时间戳；同一批条目集中在少数几天，缓存后省去逐条的日历计算
+_day_starts = {}
+
+
+def _day_start(year, month, day):
+    key = (year, month, day)
+    start = _day_starts.get(key)
+    if start is None:
+        # datetime 负责校验日期合法性（非法时抛 ValueError）
+        start = calendar.timegm(datetime(year, month, day).timetuple())
+        _day_starts[key] = start
+    return start
+
+
+def _zone_offset(zone, zones=ZONES):
+    """'+0800' / '+08:00' / 'GMT' 等时区写法换算为秒（缩写查 zones），无法识别时返回 None"""
+    if zone[0] in '+-':
+        digits = zone[1:].replace(':', '')
+        offset = int(digits[:2]) * 3600 + int(digits[2:4]) * 60
+        return -offset if zone[0] == '-' else offset
+    hours = zones.get(zone.lower())
+    return hours * 3600 if hours is not None else None
+
+
+def _clock(day_start, hour, minute, second):
+    hour, minute, second = int(hour), int(minute), int(second) if second else 0
+    if hour > 23 or minute > 59 or second > 60:
+        return None
+    return day_start + hour * 3600 + minute * 60 + second
+
+
+def _parse_epoch(value, naive_offset, zones):
+    """Unix 时间戳字符串；13 位按毫秒处理"""
+    if not value.isdigit() or not 9 <= len(value) <= 13:
+        return None
+    ts = int(value)
+    return ts // 1000 if len(value) == 13 else ts
+
+
+def _parse_rfc822(value, naive_offset, zones):
+    """RFC 822 快速路径：正则 + 月份/时区表，避免 email.utils 的通用解析"""
+    match = RFC822_RE.match(value)
+    if not match:
+        return None
+    day, month, year, hour, minute, second, zone = match.groups()
+    month = MONTHS.get(month.lower())
+    if month is None:
+        return None
+    year = int(year)
+    if year < 100:
+        year += 2000 if year < 50 else 1900
+    offset = naive_offset if zone is None else _zone_offset(zone, zones)
+    if offset is None:
+        return None
+    try:
+        ts = _clock(_day_start(year, month, int(day)), hour, minute, second)
+    except ValueError:
+        return None
+    return ts - offset if ts is not None else None
+
+
+# 固定时差 -> tzinfo，避免逐条创建
+_zones = {}
+
+
+def _parse_iso(value, naive_offset, zones):
+    """ISO 8601，也覆盖东方财富的 'YYYY-MM-DD HH:MM:SS'（datetime.fromisoformat 为 C 实现，本身就是快速路径）"""
+    if len(value) < 10 or value[4] != '-':
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        tz = _zones.get(naive_offset)
+        if tz is None:
+            tz = _zones[naive_offset] = timezone(timedelta(seconds=naive_offset))
+        parsed = parsed.replace(tzinfo=tz)
+    return int(parsed.timestamp())
+
+
+def _parse_email(value, naive_offset, zones):
+    """兜底：email.utils 能解析的各种 RFC 822 变体"""
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    offset = parsed[9] if parsed[9] is not None else naive_offset
+    # email.utils 按固定的表解释时区缩写，末尾是 zones 中的缩写时以 zones 为准
+    hours = zones.get(value.rsplit(None, 1)[-1].lower())
+    if hours is not None:
+        offset = hours * 3600
+    try:
+        return calendar.timegm(parsed[:6]) - offset
+    except (ValueError, OverflowError):
+        return None
+
+
+# 探测顺序：先试便宜且特征明显的格式
+FORMATS = (
+    ('epoch', _parse_epoch),
+    ('rfc822', _parse_rfc822),
+    ('iso', _parse_iso),
+    ('email', _parse_email),
+)
+FORMAT_PARSERS = dict(FORMATS)
+
+
+def parse_date(value, naive_offset=0, hint=None, zones=ZONES):
+    """解析为 UTC 时间戳，返回 (时间戳或 None, 命中的格式名)；hint 为优先尝试的格式，zones 为时区缩写表"""
+    if isinstance(value, (int, float)):
+        return int(value), 'epoch'
+    value = (value or '').strip()
+    if not value:
+        return None, None
+    if hint:
+        ts = FORMAT_PARSERS[hint](value, naive_offset, zones)
+        if ts is not None:
+            return ts, hint
+    for name, parser in FORMATS:
+        if name == hint:
+            continue
+        ts = parser(value, naive_offset, zones)
+        if ts is not None:
+            return ts, name
+    return None, None
+
+
+class DateNormalizer:
+    """按来源缓存日期格式的规范化器；线程不安全，在抓取完成后的单线程阶段使用"""
+
+    def __init__(self):
+        self.formats = {}
+        self.parsed = 0
+        self.unparsed = 0
+
+    def normalize(self, source, items):
+        """为缺少 ts 的条目补上 ts，返回按 ts 从新到旧排序的新列表（无法解析的排在最后，保持原顺序）"""
+        name = source.get('name', '')
+        naive_offset = NAIVE_OFFSETS.get(source.get('region'), 0)
+        zones = REGION_ZONES.get(source.get('region'), ZONES)
+        for item in items:
+            if isinstance(item.get('ts'), int):
+                continue
+            ts, fmt = parse_date(item.get('pubDate'), naive_offset, self.formats.get(name), zones)
+            if ts is None:
+                self.unparsed += 1
+                continue
+            self.formats[name] = fmt
+            item['ts'] = ts
+            self.parsed += 1
+        return sorted(items, key=lambda item: -item['ts'] if isinstance(item.get('ts'), int) else float('inf'))
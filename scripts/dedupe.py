@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+跨来源的近似重复新闻检测
+对标题+描述计算 64 位 SimHash，用分段 LSH 索引找候选对，
+把同一条通稿在不同来源的副本合并为一条，并记录其它来源
+"""
+
+import hashlib
+import re
+
+SIMHASH_BITS = 64
+DEFAULT_MAX_DISTANCE = 3
+# 特征太少的短文本指纹不可靠，不参与去重
+MIN_FEATURES = 4
+
+_CJK_RANGES = (
+    ('\u3400', '\u4dbf'),  # CJK 扩展 A
+    ('\u4e00', '\u9fff'),  # CJK 基本区
+    ('\uf900', '\ufaff'),  # CJK 兼容汉字
+    ('\u3040', '\u30ff'),  # 平假名、片假名
+    ('\uac00', '\ud7af'),  # 韩文音节
+)
+_CJK_CLASS = ''.join(f'{lo}-{hi}' for lo, hi in _CJK_RANGES)
+_TOKEN_RE = re.compile(f'[{_CJK_CLASS}]+|[^\\W{_CJK_CLASS}]+')
+_CJK_RUN_RE = re.compile(f'^[{_CJK_CLASS}]+$')
+_STOPWORDS = frozenset('a an and are as at be by for from has in is it its of on or that the to was were will with'.split())
+
+
+def shingles(text, mode='auto'):
+    """把文本切成特征
+
+    mode='word' 只用单词；mode='cjk' 把所有内容按字符二元组切分；
+    mode='auto' 对中日韩文字段用字符二元组，其余用单词
+    """
+    text = (text or '').lower()
+    if mode == 'cjk':
+        compact = re.sub(r'\s+', '', text)
+        return [compact[i:i + 2] for i in range(len(compact) - 1)] or ([compact] if compact else [])
+    features = []
+    for token in _TOKEN_RE.findall(text):
+        if mode == 'auto' and _CJK_RUN_RE.match(token):
+            if len(token) == 1:
+                features.append(token)
+            else:
+                features.extend(token[i:i + 2] for i in range(len(token) - 1))
+        elif token not in _STOPWORDS:
+            features.append(token)
+    return features
+
+
+def simhash(features):
+    """64 位 SimHash，特征按出现次数加权"""
+    weights = {}
+    for feature in features:
+        weights[feature] = weights.get(feature, 0) + 1
+    vector = [0] * SIMHASH_BITS
+    for feature, weight in weights.items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            if h >> bit & 1:
+                vector[bit] += weight
+            else:
+                vector[bit] -= weight
+    fingerprint = 0
+    for bit, value in enumerate(vector):
+        if value > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def item_fingerprint(item, mode='auto'):
+    """条目的指纹；特征过少时返回 None"""
+    features = shingles(f"{item.get('title', '')} {item.get('description', '')}", mode)
+    if len(features) < MIN_FEATURES:
+        return None
+    return simhash(features)
+
+
+def bands_for(max_distance):
+    """LSH 分段数：分成 max_distance + 1 段时，汉明距离 <= max_distance 的两个指纹至少有一段完全相同（抽屉原理）"""
+    return max(1, max_distance + 1)
+
+
+# 默认距离 3 对应 4 段 16 位
+LSH_BANDS = bands_for(DEFAULT_MAX_DISTANCE)
+
+
+class SimHashIndex:
+    """分段 LSH 索引：每段的值作为桶键，只比较落在同一桶里的指纹
+
+    段数越多每段越窄，候选越多；段数超过指纹位数时无法分段，所有指纹放进同一个桶
+    """
+
+    def __init__(self, bands=LSH_BANDS):
+        if bands > SIMHASH_BITS:
+            widths = [0]
+        else:
+            # 64 位不能整除时前面的段多分 1 位
+            widths = [SIMHASH_BITS // bands + (band < SIMHASH_BITS % bands) for band in range(bands)]
+        # 每段为 (右移位数, 掩码)
+        self._bands = []
+        shift = 0
+        for width in widths:
+            self._bands.append((shift, (1 << width) - 1))
+            shift += width
+        self._buckets = [{} for _ in self._bands]
+
+    def _keys(self, fingerprint):
+        return [(fingerprint >> shift) & mask for shift, mask in self._bands]
+
+    def add(self, key, fingerprint):
+        for band, value in enumerate(self._keys(fingerprint)):
+            self._buckets[band].setdefault(value, []).append((key, fingerprint))
+
+    def candidates(self, fingerprint):
+        """返回与该指纹至少有一段相同的 (key, fingerprint)，已去重"""
+        seen = set()
+        for band, value in enumerate(self._keys(fingerprint)):
+            for key, other in self._buckets[band].get(value, ()):
+                if key not in seen:
+                    seen.add(key)
+                    yield key, other
+
+
+def collapse_duplicates(sources, max_distance=DEFAULT_MAX_DISTANCE, mode='auto'):
+    """合并不同来源之间的近似重复条目，返回被合并掉的条目数
+
+    sources 为 news_data.json 中的 sources 列表（原地修改）。排在前面的来源优先作为规范条目，
+    规范条目增加 alternates 字段列出其它来源的标题链接；同一来源内部的条目不互相合并
+    """
+    index = SimHashIndex(bands_for(max_distance))
+    # (来源下标, 条目下标) -> 规范条目的 (来源下标, 条目下标)
+    canonical_of = {}
+    alternates = {}
+    for s_idx, source in enumerate(sources):
+        for i_idx, item in enumerate(source.get('items', [])):
+            fingerprint = item_fingerprint(item, mode)
+            if fingerprint is None:
+                continue
+            key = (s_idx, i_idx)
+            match = None
+            for other_key, other in index.candidates(fingerprint):
+                if other_key[0] != s_idx and hamming(fingerprint, other) <= max_distance:
+                    match = canonical_of.get(other_key, other_key)
+                    break
+            if match is None:
+                index.add(key, fingerprint)
+                continue
+            canonical_of[key] = match
+            listed = alternates.setdefault(match, [])
+            if all(alt['source'] != source['name'] for alt in listed):
+                listed.append({'source': source['name'], 'link': item.get('link', '')})
+
+    if not canonical_of:
+        return 0
+
+    for s_idx, source in enumerate(sources):
+        kept = []
+        for i_idx, item in enumerate(source.get('items', [])):
+            key = (s_idx, i_idx)
+            if key in canonical_of:
+                continue
+            if key in alternates:
+                # 不修改原字典，条目可能与存档共享
+                item = dict(item, alternates=alternates[key])
+            kept.append(item)
+        source['items'] = kept
+        source['itemCount'] = len(kept)
+    return len(canonical_of)
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+录制与本地回放新闻源
+  record DIR  抓取各来源的完整响应（不做流式提前结束），每个来源写一个录像（见 cassettes.py）
+  serve DIR   在本机回放录像；fetch_news.py --replay http://HOST:PORT 即可离线、可重复地压测抓取流程
+
+回放时可以模拟：
+  延迟分布  --latency fixed:S | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA | exp:MEAN | recorded[:SCALE]
+            在发送响应头之前等待；recorded 取录制时的首字节耗时乘以 SCALE
+  错误率    --error-rate P 以概率 P 返回 --error-status 中的某个状态码
+  慢速正文  --drip BYTES:SECONDS 每发送 BYTES 字节暂停 SECONDS 秒
+  条件请求  --not-modified honor（默认，If-None-Match / If-Modified-Since 命中时返回 304）或 ignore
+录像没有 ETag 时按正文哈希生成一个，条件请求路径同样能被覆盖。
+录像中的 "replay" 字段按来源覆盖这些参数（键为 latency、errorRate、errorStatus、drip、notModified）。
+每个请求的随机数只由 (--seed, 来源, 该来源的第几次请求) 决定，与并发请求的先后无关
+"""
+
+import argparse
+import gzip
+import hashlib
+import math
+import random
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from cassettes import load_cassettes, write_cassette
+from fetch_news import DEFAULT_MAX_BYTES, DEFAULT_MAX_WORKERS, DEFAULT_SOURCE_TIMEOUT, NEWS_SOURCES, fetch_response
+from http_client import ConnectionPool
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_LATENCY = 'fixed:0'
+DEFAULT_ERROR_STATUS = (503,)
+NOT_MODIFIED_MODES = ('honor', 'ignore')
+# 延迟分布 -> 允许的参数个数
+LATENCY_KINDS = {'fixed': (1,), 'uniform': (2,), 'normal': (2,), 'lognormal': (2,), 'exp': (1,), 'recorded': (0, 1)}
+# 录像 "replay" 字段中可以覆盖的键
+REPLAY_KEYS = ('latency', 'errorRate', 'errorStatus', 'drip', 'notModified')
+
+
+class Latency:
+    """延迟分布，由 'kind:a,b' 形式的描述解析而来"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        kind, _, args = str(spec).partition(':')
+        try:
+            values = [float(value) for value in args.split(',')] if args else []
+        except ValueError:
+            values = None
+        if values is None or len(values) not in LATENCY_KINDS.get(kind, ()):
+            raise ValueError(f"latency must look like {' | '.join(LATENCY_KINDS)}:ARGS, got {spec!r}")
+        if kind == 'lognormal' and values[0] <= 0:
+            raise ValueError(f"lognormal median must be positive, got {spec!r}")
+        self.kind = kind
+        self.values = values
+
+    def sample(self, rng, cassette):
+        """抽取一次延迟（秒，不小于 0）"""
+        kind, values = self.kind, self.values
+        if kind == 'fixed':
+            delay = values[0]
+        elif kind == 'uniform':
+            delay = rng.uniform(values[0], values[1])
+        elif kind == 'normal':
+            delay = rng.gauss(values[0], values[1])
+        elif kind == 'lognormal':
+            delay = rng.lognormvariate(math.log(values[0]), values[1])
+        elif kind == 'exp':
+            delay = rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+        else:
+            delay = (cassette.get('ttfb') or 0.0) * (values[0] if values else 1.0)
+        return max(0.0, delay)
+
+    def __repr__(self):
+        return self.spec
+
+
+def parse_drip(spec):
+    """'BYTES:SECONDS' -> (BYTES, SECONDS)；None 或空字符串表示不限速"""
+    if not spec:
+        return None
+    size, sep, interval = str(spec).partition(':')
+    try:
+        size, interval = int(size), float(interval)
+    except ValueError:
+        size = 0
+    if not sep or size <= 0 or interval < 0:
+        raise ValueError(f"drip must look like BYTES:SECONDS, got {spec!r}")
+    return size, interval
+
+
+def parse_statuses(spec):
+    """'500,503' 或 [500, 503] -> (500, 503)"""
+    values = spec if isinstance(spec, (list, tuple)) else str(spec).split(',')
+    statuses = tuple(int(value) for value in values)
+    if not statuses or any(not 400 <= status < 600 for status in statuses):
+        raise ValueError(f"error statuses must be 4xx/5xx, got {spec!r}")
+    return statuses
+
+
+def replay_options(defaults, overrides=None):
+    """全局回放参数与录像中的单源覆盖合并"""
+    options = dict(defaults)
+    for key, value in (overrides or {}).items():
+        if key not in REPLAY_KEYS:
+            raise ValueError(f"unknown replay option {key!r} (expected one of {', '.join(REPLAY_KEYS)})")
+        if key == 'latency':
+            value = Latency(value)
+        elif key == 'drip':
+            value = parse_drip(value)
+        elif key == 'errorStatus':
+            value = parse_statuses(value)
+        elif key == 'errorRate':
+            value = float(value)
+        elif value not in NOT_MODIFIED_MODES:
+            raise ValueError(f"notModified must be one of {', '.join(NOT_MODIFIED_MODES)}, got {value!r}")
+        options[key] = value
+    return options
+
+
+class _Route:
+    """一个来源的回放内容"""
+
+    def __init__(self, cassette, options, use_gzip):
+        self.cassette = cassette
+        self.options = options
+        self.body = cassette['body']
+        self.headers = dict(cassette.get('headers', {}))
+        self.headers.setdefault('ETag', '"' + hashlib.sha1(self.body).hexdigest()[:16] + '"')
+        self.gzipped = gzip.compress(self.body, mtime=0) if use_gzip and self.body else None
+
+    def not_modified(self, request_headers):
+        """条件请求头是否与录像的 ETag / Last-Modified 匹配"""
+        if_none_match = request_headers.get('If-None-Match')
+        if if_none_match:
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return '*' in tags or self.headers['ETag'].removeprefix('W/') in tags
+        if_modified_since = request_headers.get('If-Modified-Since')
+        last_modified = self.headers.get('Last-Modified')
+        if not if_modified_since or not last_modified:
+            return False
+        if if_modified_since == last_modified:
+            return True
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """回放录像的 HTTP 服务器，按来源统计各状态码的响应数"""
+
+    daemon_threads = True
+
+    def __init__(self, address, cassettes, defaults, seed=0, use_gzip=True, verbose=False):
+        super().__init__(address, ReplayHandler)
+        self.routes = {slug: _Route(cassette, replay_options(defaults, cassette.get('replay')), use_gzip)
+                       for slug, cassette in cassettes.items()}
+        self.seed = seed
+        self.verbose = verbose
+        self.stats = {slug: Counter() for slug in self.routes}
+        self._requests = Counter()
+        self._lock = threading.Lock()
+
+    def next_random(self, slug):
+        """该来源下一次请求的随机数发生器"""
+        with self._lock:
+            index = self._requests[slug]
+            self._requests[slug] += 1
+        return random.Random(f'{self.seed}:{slug}:{index}')
+
+    def record(self, slug, status):
+        with self._lock:
+            self.stats.setdefault(slug, Counter())[status] += 1
+
+    def print_stats(self):
+        with self._lock:
+            stats = {slug: Counter(counts) for slug, counts in self.stats.items() if counts}
+        print(f"   📼 Replayed {sum(sum(counts.values()) for counts in stats.values())} requests:")
+        for slug, counts in sorted(stats.items()):
+            name = self.routes[slug].cassette['name'] if slug in self.routes else slug
+            summary = ', '.join(f'{status}: {count}' for status, count in sorted(counts.items(), key=lambda entry: str(entry[0])))
+            print(f"      {name}: {summary}")
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FeedReplay/1'
+
+    def do_GET(self):
+        slug = urlsplit(self.path).path.strip('/')
+        route = self.server.routes.get(slug)
+        try:
+            if route is None:
+                self._send_empty(404, slug)
+                return
+            options = route.options
+            rng = self.server.next_random(slug)
+            time.sleep(options['latency'].sample(rng, route.cassette))
+            if options['errorRate'] and rng.random() < options['errorRate']:
+                self._send_empty(rng.choice(options['errorStatus']), slug)
+                return
+            if options['notModified'] == 'honor' and route.not_modified(self.headers):
+                self._send_empty(304, slug, route.headers)
+                return
+
+            body = route.body
+            self.send_response(route.cassette.get('status', 200))
+            for name, value in route.headers.items():
+                self.send_header(name, value)
+            if route.gzipped and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+                body = route.gzipped
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self._write_body(body, options['drip'])
+            self.server.record(slug, route.cassette.get('status', 200))
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端因截止时间或字节上限提前断开
+            self.server.record(slug, 'aborted')
+            self.close_connection = True
+
+    def _send_empty(self, status, slug, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            if name in ('ETag', 'Last-Modified', 'Cache-Control', 'Expires'):
+                self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        self.server.record(slug, status)
+
+    def _write_body(self, body, drip):
+        if not drip:
+            self.wfile.write(body)
+            return
+        size, interval = drip
+        for offset in range(0, len(body), size):
+            if offset:
+                time.sleep(interval)
+            self.wfile.write(body[offset:offset + size])
+            self.wfile.flush()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def record_cassettes(directory, names=None, timeout=DEFAULT_SOURCE_TIMEOUT, max_bytes=DEFAULT_MAX_BYTES,
+                     max_workers=DEFAULT_MAX_WORKERS):
+    """抓取 names（默认全部来源）的完整响应写成录像，返回成功录制的来源数；失败的来源保留原有录像"""
+    sources = NEWS_SOURCES
+    if names:
+        unknown = set(names) - {source['name'] for source in sources}
+        if unknown:
+            raise ValueError(f"unknown sources: {', '.join(sorted(unknown))}")
+        sources = [source for source in sources if source['name'] in names]
+    recorded_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    pool = ConnectionPool()
+
+    def capture(source):
+        started = time.monotonic()
+        response = fetch_response(source['url'], timeout=source.get('timeout', timeout), pool=pool,
+                                  max_bytes=source.get('maxBytes', max_bytes))
+        if response is None:
+            return None
+        return write_cassette(directory, source, response, time.monotonic() - started, recorded_at)
+
+    print(f"Recording {len(sources)} sources into {directory}...")
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            paths = list(executor.map(capture, sources))
+    finally:
+        pool.close()
+    for source, path in zip(sources, paths):
+        print(f"  {source['name']}: {path or 'failed, kept previous cassette'}")
+    recorded = sum(1 for path in paths if path)
+    print(f"✅ Recorded {recorded}/{len(sources)} sources")
+    return recorded
+
+
+def serve(directory, host=DEFAULT_HOST, port=DEFAULT_PORT, seed=0, use_gzip=True, verbose=False, **defaults):
+    """回放 directory 下的录像直到被中断；defaults 为 REPLAY_KEYS 对应的全局参数"""
+    cassettes = load_cassettes(directory)
+    if not cassettes:
+        raise FileNotFoundError(f"no cassettes under {directory}")
+    server = ReplayServer((host, port), cassettes, defaults, seed=seed, use_gzip=use_gzip, verbose=verbose)
+    base = f"http://{host}:{server.server_port}"
+    print(f"📼 Replaying {len(cassettes)} cassettes at {base}")
+    print(f"   python3 scripts/fetch_news.py OUTPUT_DIR --replay {base}")
+
+    def interrupt(signum, frame):
+        raise KeyboardInterrupt
+
+    # SIGTERM 与 Ctrl-C 一样，停止服务并打印统计
+    signal.signal(signal.SIGTERM, interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.print_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='录制新闻源响应，并在本机回放以离线压测抓取流程')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='抓取各来源的完整响应写成录像')
+    record_parser.add_argument('directory', help='录像目录')
+    record_parser.add_argument('--source', action='append', default=[], metavar='NAME',
+                               help='只录制该来源，可重复（默认全部）')
+    record_parser.add_argument('--timeout', type=float, default=DEFAULT_SOURCE_TIMEOUT,
+                               help=f'单个来源的超时，单位秒（默认 {DEFAULT_SOURCE_TIMEOUT}）')
+    record_parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_BYTES,
+                               help=f'单个响应解压后的字节上限（默认 {DEFAULT_MAX_BYTES}）')
+
+    serve_parser = commands.add_parser('serve', help='回放录像')
+    serve_parser.add_argument('directory', help='录像目录')
+    serve_parser.add_argument('--host', default=DEFAULT_HOST, help=f'监听地址（默认 {DEFAULT_HOST}）')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'监听端口（默认 {DEFAULT_PORT}，0 为随机）')
+    serve_parser.add_argument('--latency', type=Latency, default=Latency(DEFAULT_LATENCY),
+                              help=f'首字节前的延迟分布（默认 {DEFAULT_LATENCY}），'
+                                   f'如 uniform:0.05,0.5、lognormal:0.2,0.8、recorded:2')
+    serve_parser.add_argument('--error-rate', type=float, default=0.0, help='返回错误状态码的概率（默认 0）')
+    serve_parser.add_argument('--error-status', type=parse_statuses, default=DEFAULT_ERROR_STATUS,
+                              help='错误时返回的状态码，逗号分隔、随机选一个（默认 503）')
+    serve_parser.add_argument('--drip', type=parse_drip, default=None, metavar='BYTES:SECONDS',
+                              help='慢速发送正文：每 BYTES 字节暂停 SECONDS 秒')
+    serve_parser.add_argument('--not-modified', choices=NOT_MODIFIED_MODES, default='honor',
+                              help='honor：条件请求命中时返回 304（默认）；ignore：总是返回完整内容')
+    serve_parser.add_argument('--no-gzip', action='store_true', help='不对正文做 gzip 压缩')
+    serve_parser.add_argument('--seed', type=int, default=0, help='随机种子（默认 0）')
+    serve_parser.add_argument('--verbose', action='store_true', help='打印每个请求')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'record':
+            if not record_cassettes(args.directory, args.source, timeout=args.timeout, max_bytes=args.max_bytes):
+                sys.exit(1)
+        else:
+            serve(args.directory, host=args.host, port=args.port, seed=args.seed, use_gzip=not args.no_gzip,
+                  verbose=args.verbose, latency=args.latency, errorRate=args.error_rate,
+                  errorStatus=args.error_status, drip=args.drip, notModified=args.not_modified)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+抓取分阶段耗时指标
+每次运行为每个源记录一行：DNS、TCP 连接、TLS、首字节、下载、解压/解码、解析各阶段耗时，
+以及传输字节数和条目数；追加写入 JSON Lines（超过 JSONL_MAX_BYTES 时轮转为 .1，只保留一份旧文件），
+同时覆盖写出 Prometheus 文本格式，并打印最慢的几个源。进程峰值 RSS 依赖标准库 resource 模块（Windows 上没有，此时不报告）
+"""
+
+import json
+import os
+import sys
+import threading
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from http_client import TIMING_PHASES
+
+# 在 HTTP 阶段之后由 fetch_news 计时的阶段
+PHASES = TIMING_PHASES + ('parse',)
+JSONL_FILE = 'fetch_metrics.jsonl'
+# JSON Lines 超过这个大小时改名为 fetch_metrics.jsonl.1（覆盖更早的一份），缓存目录里最多约两倍大小
+JSONL_MAX_BYTES = 4 * 1024 * 1024
+PROMETHEUS_FILE = 'fetch_metrics.prom'
+METRIC_PREFIX = 'finance_news_fetch'
+SLOWEST_SOURCES = 5
+
+
+def peak_rss_bytes():
+    """进程至今的峰值常驻内存（字节），无法获取时返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位是 KB，macOS 上是字节
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _label(value):
+    """Prometheus 标签值转义"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class FetchMetrics:
+    """一次运行的各源指标（线程安全）"""
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.rows = []
+        self.peak_rss = None
+        self._lock = threading.Lock()
+
+    def record(self, name, status, total, timings=None, items=0):
+        """记录一个源：status 为 ok / not_modified / failed / circuit_open / deadline，timings 为各阶段秒数与字节数"""
+        timings = timings or {}
+        row = {'run': self.run_id, 'source': name, 'status': status, 'total': round(total, 4)}
+        for phase in PHASES:
+            row[phase] = round(timings.get(phase, 0.0), 4)
+        row['wireBytes'] = timings.get('wireBytes', 0)
+        row['decodedBytes'] = timings.get('decodedBytes', 0)
+        row['items'] = items
+        with self._lock:
+            self.rows.append(row)
+
+    def write(self, directory, max_bytes=JSONL_MAX_BYTES):
+        """追加 JSON Lines（已超过 max_bytes 时先轮转）、覆盖 Prometheus 文本，返回两个文件路径"""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            rows = sorted(self.rows, key=lambda row: row['source'])
+        jsonl_path = os.path.join(directory, JSONL_FILE)
+        try:
+            if os.path.getsize(jsonl_path) >= max_bytes:
+                os.replace(jsonl_path, jsonl_path + '.1')
+        except OSError:
+            pass  # 还没有文件
+        with open(jsonl_path, 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+        prom_path = os.path.join(directory, PROMETHEUS_FILE)
+        tmp_path = prom_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text(rows))
+        os.replace(tmp_path, prom_path)
+        return jsonl_path, prom_path
+
+    def prometheus_text(self, rows=None):
+        """Prometheus 文本格式（可由 node_exporter 的 textfile collector 读取）"""
+        if rows is None:
+            with self._lock:
+                rows = sorted(self.rows, key=lambda row: row['source'])
+        lines = [
+            f'# HELP {METRIC_PREFIX}_phase_seconds Time spent in each fetch phase during the last run.',
+            f'# TYPE {METRIC_PREFIX}_phase_seconds gauge',
+        ]
+        for row in rows:
+            for phase in PHASES:
+                lines.append(f'{METRIC_PREFIX}_phase_seconds{{source="{_label(row["source"])}",phase="{phase}"}} '
+                             f'{row[phase]}')
+        for metric, key, help_text in (
+                ('duration_seconds', 'total', 'Wall-clock time to fetch and parse the source.'),
+                ('wire_bytes', 'wireBytes', 'Bytes received on the wire.'),
+                ('decoded_bytes', 'decodedBytes', 'Bytes after content decoding.'),
+                ('items', 'items', 'Items parsed from the source.')):
+            lines.append(f'# HELP {METRIC_PREFIX}_{metric} {help_text}')
+            lines.append(f'# TYPE {METRIC_PREFIX}_{metric} gauge')
+            for row in rows:
+                lines.append(f'{METRIC_PREFIX}_{metric}{{source="{_label(row["source"])}",'
+                             f'status="{row["status"]}"}} {row[key]}')
+        if self.peak_rss is not None:
+            lines.append(f'# HELP {METRIC_PREFIX}_peak_rss_bytes Peak resident set size of the fetch process.')
+            lines.append(f'# TYPE {METRIC_PREFIX}_peak_rss_bytes gauge')
+            lines.append(f'{METRIC_PREFIX}_peak_rss_bytes {self.peak_rss}')
+        return '\n'.join(lines) + '\n'
+
+    def print_slowest(self, limit=SLOWEST_SOURCES):
+        """按总耗时打印最慢的源及其各阶段耗时（毫秒）"""
+        with self._lock:
+            rows = sorted(self.rows, key=lambda row: row['total'], reverse=True)[:limit]
+        if not rows:
+            return
+        width = max(len('source'), *(len(row['source']) for row in rows)) + 2
+        print("   🐢 Slowest sources (ms):")
+        print(f"      {'source':<{width}}{'status':<14}{'total':>8}" + ''.join(f'{p:>9}' for p in PHASES))
+        for row in rows:
+            print(f"      {row['source']:<{width}}{row['status']:<14}{row['total'] * 1000:>8.0f}"
+                  + ''.join(f'{row[p] * 1000:>9.0f}' for p in PHASES))
@@ -4,93 +4,300 @@ Finance News Fetcher
 抓取国际财经新闻并保存为 JSON 格式
 """
 
+import argparse
+import contextlib
 import json
 import os
 import re
-import sys
+import signal
 import html
-from datetime import datetime
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
-from html.parser import HTMLParser
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from html.entities import name2codepoint
+from xml.parsers import expat
 import ssl
 
+from article_store import ArticleStore
+from build_manifest import BuildManifest, articles_hash
+from cassettes import replay_sources
+from charsets import (EXPAT_ENCODINGS, PROLOG_SCAN_BYTES, decode, decode_latin1_bytes, decode_payload,
+                      detect_encoding, is_ascii_compatible)
+from dates import DateNormalizer
+from dedupe import DEFAULT_MAX_DISTANCE, collapse_duplicates
+from fetch_metrics import FetchMetrics, peak_rss_bytes
+from hedging import DEFAULT_HEDGE_RATIO, HEDGE_QUANTILE, HedgeBudget, hedged_call
+from http_cache import HttpCache
+from http_client import ConnectionPool, HTTPStatusError
+from precompress import minify_json
+from profiling import RunProfiler
+from scheduler import DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL, AdaptiveScheduler
+from sharding import (RUN_ID_ENV, default_run_id, parse_shard, partial_path, shard_label, shard_sources,
+                      write_partial)
+from source_health import OPEN, HALF_OPEN, PROBE_TIMEOUT, SourceHealth, error_class
+
 # 禁用 SSL 验证（某些网站可能需要）
 ssl._create_default_https_context = ssl._create_unverified_context
 
-class NewsHTMLParser(HTMLParser):
-    """简单的 HTML 解析器，用于提取文本内容"""
-    def __init__(self):
-        super().__init__()
-        self.text = []
-        self.skip_tags = {'script', 'style', 'nav', 'footer', 'header'}
-        self.current_tag = None
-        
-    def handle_starttag(self, tag, attrs):
-        self.current_tag = tag
-        
-    def handle_data(self, data):
-        if self.current_tag not in self.skip_tags:
-            text = data.strip()
-            if text:
-                self.text.append(text)
-                
-    def get_text(self):
-        return ' '.join(self.text)
-
-def fetch_url(url, timeout=10):
-    """获取 URL 内容"""
+class PayloadTooLargeError(Exception):
+    """响应体超过单源字节上限"""
+
+class NotAFeedError(Exception):
+    """响应不是 RSS/Atom/JSON（如 HTML 错误页、图片）"""
+
+# 并发抓取配置
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_SOURCE_TIMEOUT = 10
+DEFAULT_MAX_PER_HOST = 4
+# 每个源最多保留的新闻条数
+MAX_ITEMS_PER_SOURCE = 20
+# 单个响应解压后的字节上限，可用来源的 maxBytes 覆盖
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+# 这些 Content-Type 不可能是新闻源，读取 body 之前就放弃
+NON_FEED_CONTENT_TYPES = ('image/', 'audio/', 'video/', 'font/', 'application/pdf', 'application/zip')
+# 首块内容以这些开头（去掉 BOM 与空白、转小写后）说明是 HTML 页面而不是 RSS/JSON
+HTML_PROLOGS = (b'<!doctype html', b'<html', b'<head', b'<body')
+# 源的默认优先级，数值越大越先抓取；设置了整体截止时间时低优先级的源最先被放弃
+DEFAULT_PRIORITY = 0
+# 整体截止时间到了之后，等待正在收尾的抓取的额外秒数
+DEADLINE_GRACE = 0.5
+DEADLINE_ERROR = 'Run deadline exceeded'
+FETCH_ERROR = 'Failed to fetch'
+CIRCUIT_OPEN_ERROR = 'Circuit open'
+
+# 本地缓存目录（HTTP 校验器等），相对于输出目录
+CACHE_DIR_NAME = '.cache'
+
+# 抓取指标目录，相对于缓存目录
+METRICS_DIR_NAME = 'metrics'
+
+# 回放模式的缓存目录，相对于缓存目录（回放的健康记录与缓存不混入真实抓取）
+REPLAY_DIR_NAME = 'replay'
+
+# 新闻存档目录，相对于输出目录
+STORE_DIR_NAME = os.path.join('data', 'articles')
+
+# 未显式传入连接池时共享的默认连接池
+DEFAULT_POOL = ConnectionPool(max_per_host=DEFAULT_MAX_PER_HOST)
+
+_print_lock = threading.Lock()
+
+def log(message):
+    """线程安全的输出，避免并发抓取时日志交错"""
+    with _print_lock:
+        print(message, flush=True)
+
+def format_bytes(size):
+    """把字节数格式化为易读字符串"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def sniff_payload(url, content_type, head):
+    """根据 Content-Type 与首块内容判断响应是否可能是新闻源，不是时抛出 NotAFeedError
+
+    content_type 检查在读取 body 前进行（head 为 None）；HTML 页面只能靠首块内容识别，
+    因为不少 RSS 源也以 text/html 返回
+    """
+    content_type = (content_type or '').split(';', 1)[0].strip().lower()
+    if content_type.startswith(NON_FEED_CONTENT_TYPES):
+        raise NotAFeedError(f"{url}: unexpected Content-Type {content_type}")
+    if head is not None:
+        prolog = head[:256].lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+        if prolog.startswith(HTML_PROLOGS):
+            raise NotAFeedError(f"{url}: got an HTML page ({content_type or 'no Content-Type'})")
+
+def fetch_response(url, timeout=DEFAULT_SOURCE_TIMEOUT, deadline=None, extra_headers=None, pool=None,
+                   consumer=None, on_error=None, max_bytes=DEFAULT_MAX_BYTES, on_headers=None):
+    """获取 URL 响应，返回 {'status', 'headers', 'contentType', 'body', 'wireBytes', 'decodedBytes', 'timings'}，
+    失败时返回 None
+
+    deadline 为 time.monotonic() 下的截止时间，超过后放弃读取剩余内容；
+    extra_headers 用于附加条件请求头，304 响应的 body 为空。
+    连接来自 pool（默认共享的 DEFAULT_POOL），body 已按 Content-Encoding 解压。
+    传入 consumer 时 body 逐块交给 consumer 而不保留，consumer 返回 True 即停止读取，
+    on_headers（如有）在读取 body 之前收到响应头（如用来确定编码）；
+    timings 为各阶段耗时（见 http_client.TIMING_PHASES），consumer 中花费的时间计入 parse。
+    body 分块读取：Content-Length 或已读取的解压后字节数超过 max_bytes 时放弃（PayloadTooLargeError），
+    Content-Type 或首块内容表明不是新闻源时也提前放弃（NotAFeedError）。
+    失败时异常交给 on_error（如有）
+    """
+    if deadline is None:
+        deadline = time.monotonic() + timeout
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
         'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7',
+        'Accept-Encoding': 'gzip, deflate',
     }
+    if extra_headers:
+        headers.update(extra_headers)
     try:
-        req = Request(url, headers=headers)
-        with urlopen(req, timeout=timeout) as response:
-            return response.read().decode('utf-8', errors='ignore')
-    except (URLError, HTTPError) as e:
-        print(f"Error fetching {url}: {e}")
-        return None
+        with (pool or DEFAULT_POOL).open(url, headers=headers, timeout=timeout, deadline=deadline) as response:
+            if response.status != 304 and not 200 <= response.status < 300:
+                raise HTTPStatusError(url, response.status, response.reason)
+            # 分块读取，每块之前检查截止时间
+            timings = response.timings
+            timings['parse'] = 0.0
+            chunks = []
+            if response.status == 304:
+                # 304 没有 body，仍要读到结尾，连接才能放回连接池复用
+                for _ in response.iter_content():
+                    pass
+            else:
+                sniff_payload(url, response.headers.get('Content-Type'), None)
+                length = response.headers.get('Content-Length')
+                # 压缩后的长度已经超限时解压后只会更大
+                if length and length.isdigit() and int(length) > max_bytes:
+                    raise PayloadTooLargeError(f"{url}: Content-Length {length} exceeds {max_bytes} bytes")
+                if on_headers:
+                    on_headers(response.headers)
+                received = 0
+                for chunk in response.iter_content():
+                    if not received:
+                        sniff_payload(url, None, chunk)
+                    received += len(chunk)
+                    if received > max_bytes:
+                        raise PayloadTooLargeError(f"{url}: body exceeds {max_bytes} bytes")
+                    if consumer is None:
+                        chunks.append(chunk)
+                        continue
+                    started = time.monotonic()
+                    enough = consumer(chunk)
+                    timings['parse'] += time.monotonic() - started
+                    if enough:
+                        break
+            body = b''.join(chunks)
+            return {
+                'status': response.status,
+                'headers': dict(response.headers),
+                'contentType': response.headers.get('Content-Type'),
+                'body': body,
+                'wireBytes': response.wire_bytes,
+                'decodedBytes': response.decoded_bytes,
+                'timings': timings
+            }
     except Exception as e:
-        print(f"Error fetching {url}: {e}")
+        log(f"Error fetching {url}: {e}")
+        if on_error:
+            on_error(e)
+        return None
+
+# 正则兜底时条目的开始与结束标签；开始标签的 > 用 find 定位，避免 [^>]* 在没有 > 的长内容上回溯
+ITEM_START_PATTERN = r'<(?:item|entry)(?=[\s>/])'
+ITEM_END_PATTERN = r'</(?:item|entry)\s*>'
+
+def _item_blocks(content, pattern):
+    """逐个产出 <item> / <entry> 标签内的内容
+
+    先定位所有开始标签，每个条目只在它与下一个开始标签之间找结束标签，整体是线性的；
+    缺少结束标签的条目取到下一个开始标签（或内容末尾）为止
+    """
+    start_re = re.compile(pattern(ITEM_START_PATTERN), re.IGNORECASE)
+    end_re = re.compile(pattern(ITEM_END_PATTERN), re.IGNORECASE)
+    gt = pattern('>')
+    starts = start_re.finditer(content)
+    match = next(starts, None)
+    while match is not None:
+        following = next(starts, None)
+        stop = following.start() if following else len(content)
+        tag_end = content.find(gt, match.end(), stop)
+        # 自闭合的 <item/> 没有内容
+        if tag_end >= 0 and content[tag_end - 1:tag_end] != pattern('/'):
+            closed = end_re.search(content, tag_end + 1, stop)
+            yield content[tag_end + 1:closed.start() if closed else stop]
+        match = following
+
+def _field_span(block, name, pattern):
+    """返回 block 中第一个 <name ...> 与其后第一个 </name> 之间内容的 (标签起点, 内容起点, 内容终点)，没有则返回 None
+
+    等价于 <name[^>]*>(.*?)</name>：第一个开始标签之后找不到 </name> 时，后面的开始标签也找不到，
+    所以只需看第一个开始标签，每一步都是一次线性查找
+    """
+    opening = re.compile(pattern('<' + name), re.IGNORECASE).search(block)
+    if not opening:
+        return None
+    tag_end = block.find(pattern('>'), opening.end())
+    if tag_end < 0:
+        return None
+    closing = re.compile(pattern(f'</{name}>'), re.IGNORECASE).search(block, tag_end + 1)
+    if not closing:
         return None
+    return opening.start(), tag_end + 1, closing.start()
+
+def _block_field(block, names, pattern, cdata=True):
+    """取 names 中最先出现且闭合的标签的内容（去掉 CDATA 包裹），都没有时返回 None"""
+    spans = [span for span in (_field_span(block, name, pattern) for name in names) if span]
+    if not spans:
+        return None
+    _, start, end = min(spans)
+    value = block[start:end]
+    if cdata:
+        if value.startswith(pattern('<![CDATA[')):
+            value = value[len('<![CDATA['):]
+        if value.endswith(pattern(']]>')):
+            value = value[:-len(']]>')]
+    return value
+
+def _link_href(block, pattern):
+    """Atom 的 <link href="..."/>：取第一个带 href 的 <link> 标签中的地址
+
+    每个标签只看到它的 > 或下一个 <link 为止，大量未闭合的 <link 也只扫描一遍
+    """
+    href_re = re.compile(pattern(r'href=["\']([^"\']+)["\']'), re.IGNORECASE)
+    gt = pattern('>')
+    starts = re.compile(pattern('<link'), re.IGNORECASE).finditer(block)
+    match = next(starts, None)
+    tag_end = None
+    while match is not None:
+        following = next(starts, None)
+        stop = following.start() if following else len(block)
+        # 找到的 > 在当前标签之前时才重新查找；找不到（-1）说明后面再没有 >
+        if tag_end is None or 0 <= tag_end < match.end():
+            tag_end = block.find(gt, match.end())
+        hrefs = list(href_re.finditer(block, match.end(), stop if tag_end < 0 else min(tag_end, stop)))
+        if hrefs:
+            return hrefs[-1].group(1)
+        match = following
+    return None
+
+def _parse_rss_regex(content, limit=MAX_ITEMS_PER_SOURCE, encoding=None):
+    """用正则解析 RSS/XML 内容（XML 不规范时的兜底方案），只看前 limit 个条目
+
+    content 为 bytes 时正则直接作用在字节上，只有提取出的字段按 encoding（默认自动识别）解码
+    """
+    if isinstance(content, bytes):
+        encoding = encoding or detect_encoding(None, content)
+        if not is_ascii_compatible(encoding):
+            content = decode(content, encoding)
+    if isinstance(content, bytes):
+        pattern = lambda text: text.encode('ascii')
+        field = lambda value: value.decode(encoding, errors='replace') if value else ''
+    else:
+        pattern = field = lambda value: value or ''
 
-def parse_rss_simple(content):
-    """简单解析 RSS/XML 内容"""
     items = []
-    # 匹配 <item> 或 <entry> 标签
-    item_pattern = r'<item[^>]*>(.*?)</item>|<entry[^>]*>(.*?)</entry>'
-    matches = re.findall(item_pattern, content, re.DOTALL | re.IGNORECASE)
-    
-    for match in matches[:20]:  # 限制 20 条新闻
-        item_content = match[0] or match[1]
-        
+    for item_content in itertools.islice(_item_blocks(content, pattern), max(limit, 0)):  # 限制条数
         # 提取标题
-        title_match = re.search(r'<title[^>]*>(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?</title>', item_content, re.DOTALL | re.IGNORECASE)
-        title = title_match.group(1).strip() if title_match else ''
+        title = field(_block_field(item_content, ('title',), pattern)).strip()
         
         # 提取链接
-        link_match = re.search(r'<link[^>]*>(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?</link>|<link[^>]*href=["\']([^"\']+)["\']', item_content, re.DOTALL | re.IGNORECASE)
-        link = ''
-        if link_match:
-            link = link_match.group(1) or link_match.group(2) or ''
-            link = html.unescape(link.strip())  # 解码 HTML 实体如 &amp; -> &
+        link = _block_field(item_content, ('link',), pattern)
+        if link is None:
+            link = _link_href(item_content, pattern)
+        link = html.unescape(field(link).strip())  # 解码 HTML 实体如 &amp; -> &
         
         # 提取描述
-        desc_match = re.search(r'<description[^>]*>(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?</description>|<summary[^>]*>(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?</summary>', item_content, re.DOTALL | re.IGNORECASE)
-        description = ''
-        if desc_match:
-            description = desc_match.group(1) or desc_match.group(2) or ''
-            # 清理 HTML 标签
-            description = re.sub(r'<[^>]+>', '', description).strip()
+        description = field(_block_field(item_content, ('description', 'summary'), pattern))
+        # 清理 HTML 标签（[^<>] 让每次尝试止于下一个 <，不会对未闭合的 < 反复扫描）
+        description = re.sub(r'<[^<>]*>', '', description).strip()
         
         # 提取发布时间
-        date_match = re.search(r'<pubDate[^>]*>(.*?)</pubDate>|<published[^>]*>(.*?)</published>|<updated[^>]*>(.*?)</updated>', item_content, re.DOTALL | re.IGNORECASE)
-        pub_date = ''
-        if date_match:
-            pub_date = date_match.group(1) or date_match.group(2) or date_match.group(3) or ''
-            pub_date = pub_date.strip()
+        pub_date = field(_block_field(item_content, ('pubDate', 'published', 'updated'), pattern, cdata=False))
+        pub_date = pub_date.strip()
         
         if title:
             items.append({
@@ -102,13 +309,258 @@ def parse_rss_simple(content):
     
     return items
 
+# RSS/Atom 条目内需要提取的字段：标签名（小写，去掉 atom: 前缀）-> 字段
+RSS_FIELD_TAGS = {
+    'title': 'title',
+    'link': 'link',
+    'description': 'description',
+    'summary': 'description',
+    'pubdate': 'pubDate',
+    'published': 'pubDate',
+    'dc:date': 'pubDate',
+    'updated': 'pubDate',
+}
+# 同一条目出现多个日期标签时的优先级
+RSS_DATE_PRIORITY = ('pubdate', 'published', 'dc:date', 'updated')
+
+class _StopParsing(Exception):
+    """条目数达到上限，提前结束解析"""
+
+class RSSStreamParser:
+    """基于 expat 的增量 RSS/Atom 解析器
+
+    用 feed() 逐块喂入响应内容，达到 limit 条后 done 变为 True，调用方即可停止读取；
+    XML 不规范或编码不受 expat 支持时退回到正则解析：正则兜底只看前 limit 个条目，
+    收到第 limit + 1 个条目的开始标签后前 limit 个条目就已完整，同样提前结束，否则由 close() 解析全部内容
+    """
+
+    def __init__(self, limit=MAX_ITEMS_PER_SOURCE, content_type=None):
+        self.limit = limit
+        self.content_type = content_type
+        self.encoding = None
+        self.items = []
+        self.done = False
+        self.failed = False
+        self._chunks = []
+        self._buffered = 0
+        self._parser = None
+        # 为 True 时 expat 按 ISO-8859-1 解析，字段中的字符对应原始字节，存入前再按 encoding 解码
+        self._raw = False
+        self._item = None
+        self._field = None
+        self._field_depth = 0
+        self._text = []
+        self._cdata = False
+        # 正则兜底：已收到的条目开始标签数，达到 _retry_at 时检查前 limit 个条目是否已经完整
+        self._started = 0
+        self._retry_at = limit + 1
+        self._tail = None
+
+    def _create_parser(self, head):
+        """按 Content-Type 与内容开头确定编码并创建 expat 解析器；str 内容不需要识别编码"""
+        if isinstance(head, str):
+            parser = expat.ParserCreate()
+        else:
+            self.encoding = detect_encoding(self.content_type, head)
+            if self.encoding in EXPAT_ENCODINGS:
+                parser = expat.ParserCreate(EXPAT_ENCODINGS[self.encoding])
+            elif is_ascii_compatible(self.encoding):
+                parser = expat.ParserCreate('ISO-8859-1')
+                self._raw = True
+            else:
+                # UTF-32 等 expat 不支持、标记也不是单字节的编码，交给正则兜底
+                self.failed = True
+                return
+        # 声明外部 DTD 但不加载，&nbsp; 等 HTML 实体作为 skipped entity 回调而不是报错
+        parser.UseForeignDTD(True)
+        parser.buffer_text = True
+        parser.StartElementHandler = self._start
+        parser.EndElementHandler = self._end
+        parser.CharacterDataHandler = self._data
+        parser.StartCdataSectionHandler = self._start_cdata
+        parser.SkippedEntityHandler = self._skipped_entity
+        self._parser = parser
+
+    def _parse(self, data, final=False):
+        try:
+            self._parser.Parse(data, final)
+        except _StopParsing:
+            self.done = True
+            self._chunks = []
+        except (expat.ExpatError, ValueError):
+            self.failed = True
+
+    def feed(self, data):
+        """喂入一块内容（bytes 或 str），返回是否已经足够
+
+        bytes 内容先攒够 PROLOG_SCAN_BYTES 字节，识别出编码后再开始解析
+        """
+        if self.done:
+            return True
+        self._chunks.append(data)
+        if self._parser is None and not self.failed:
+            self._buffered += len(data)
+            if isinstance(data, bytes) and self._buffered < PROLOG_SCAN_BYTES:
+                return False
+            head = self._chunks[0][:0].join(self._chunks)
+            self._create_parser(head)
+            data = head
+        if not self.failed:
+            self._parse(data)
+            if self.failed:
+                # 刚刚失败：之前交给 expat 的内容也要计数
+                data = self._chunks[0][:0].join(self._chunks)
+        if self.failed:
+            self._count_started(data)
+        return self.done
+
+    def _count_started(self, data):
+        """正则兜底时统计新收到的开始标签，前 limit 个条目完整后提前用正则解析"""
+        pattern = (lambda text: text.encode('ascii')) if isinstance(data, bytes) else (lambda text: text)
+        start_re = re.compile(pattern(ITEM_START_PATTERN), re.IGNORECASE)
+        # 带上前一块的末尾，跨块的开始标签也能数到（只数前一块里还判断不了的）
+        tail = self._tail if self._tail is not None and type(self._tail) is type(data) else data[:0]
+        window = tail + data
+        self._started += sum(1 for match in start_re.finditer(window) if match.end() >= len(tail))
+        self._tail = window[-8:]
+        if self._started < self._retry_at:
+            return
+        content = self._chunks[0][:0].join(self._chunks)
+        # 还有第 limit + 1 个条目时，前 limit 个条目都以它的开始标签为界，之后的内容不会改变结果
+        if sum(1 for _ in itertools.islice(_item_blocks(content, pattern), self.limit + 1)) > self.limit:
+            self.items = _parse_rss_regex(content, self.limit, self.encoding)
+            self.done = True
+            self._chunks = []
+        else:
+            # 有的开始标签不完整（如 <item 后没有 >），开始标签数翻倍后再试，重复扫描总量仍是线性的
+            self._retry_at = self._started * 2
+
+    def close(self):
+        """结束解析并返回条目"""
+        if self._parser is None and not self.failed:
+            head = self._chunks[0][:0].join(self._chunks) if self._chunks else b''
+            self._create_parser(head)
+            if not self.failed:
+                self._parse(head)
+        if not self.done and not self.failed:
+            self._parse(b'', True)
+        if self.failed and not self.done:
+            content = self._chunks[0][:0].join(self._chunks) if self._chunks else ''
+            self.items = _parse_rss_regex(content, self.limit, self.encoding)
+        self._chunks = []
+        self.done = True
+        return self.items
+
+    def _start(self, name, attrs):
+        tag = name.lower()
+        if tag.startswith('atom:'):
+            tag = tag[5:]
+        if self._item is None:
+            if tag in ('item', 'entry'):
+                self._item = {'dates': {}}
+            return
+        if self._field is not None:
+            # 字段内的嵌套元素（如 Atom xhtml 内容），文本继续累积
+            self._field_depth += 1
+            return
+        if tag == 'link' and 'href' in attrs:
+            # Atom: <link rel="alternate" href="..."/>
+            if attrs.get('rel', 'alternate') == 'alternate' and not self._item.get('link'):
+                href = attrs['href']
+                self._item['link'] = (decode_latin1_bytes(href, self.encoding) if self._raw else href).strip()
+            return
+        if tag in RSS_FIELD_TAGS:
+            self._field = tag
+            self._field_depth = 0
+            self._text = []
+            # Atom type="html" 与 CDATA 一样，内容是转义过的 HTML
+            self._cdata = attrs.get('type') == 'html'
+
+    def _end(self, name):
+        if self._item is None:
+            return
+        if self._field is not None:
+            if self._field_depth:
+                self._field_depth -= 1
+                return
+            self._store_field(self._field, ''.join(self._text))
+            self._field = None
+            return
+        tag = name.lower()
+        if tag.startswith('atom:'):
+            tag = tag[5:]
+        if tag in ('item', 'entry'):
+            item, self._item = self._item, None
+            self._finish_item(item)
+
+    def _data(self, data):
+        if self._field is not None:
+            self._text.append(data)
+
+    def _start_cdata(self):
+        if self._field is not None:
+            self._cdata = True
+
+    def _skipped_entity(self, name, is_parameter_entity):
+        if self._field is not None and not is_parameter_entity:
+            codepoint = name2codepoint.get(name)
+            text = chr(codepoint) if codepoint else f'&{name};'
+            if self._raw:
+                # 与其他文本一样以原始字节的形式保存
+                text = text.encode(self.encoding, errors='xmlcharrefreplace').decode('latin-1')
+            self._text.append(text)
+
+    def _store_field(self, tag, text):
+        field = RSS_FIELD_TAGS[tag]
+        if self._raw:
+            text = decode_latin1_bytes(text, self.encoding)
+        if field == 'pubDate':
+            self._item['dates'].setdefault(tag, text.strip())
+            return
+        if self._item.get(field):
+            return  # 与正则版一致，取第一次出现的值
+        if field == 'title':
+            text = text.strip()
+            if self._cdata:
+                text = html.unescape(text)
+        elif field == 'link':
+            text = text.strip()
+        else:
+            # 描述多为 HTML 片段：去标签后再解码实体
+            text = html.unescape(re.sub(r'<[^>]+>', '', text)).strip()
+        self._item[field] = text
+
+    def _finish_item(self, item):
+        title = item.get('title', '')
+        if not title:
+            return
+        dates = item['dates']
+        pub_date = next((dates[tag] for tag in RSS_DATE_PRIORITY if dates.get(tag)), '')
+        description = item.get('description', '')
+        self.items.append({
+            'title': title,
+            'link': item.get('link', ''),
+            'description': description[:500] if description else '',
+            'pubDate': pub_date
+        })
+        if len(self.items) >= self.limit:
+            raise _StopParsing()
+
+def parse_rss_simple(content, limit=MAX_ITEMS_PER_SOURCE, content_type=None):
+    """解析 RSS/Atom 内容（str 或 bytes），最多返回 limit 条；bytes 的编码由 content_type 与内容开头确定"""
+    parser = RSSStreamParser(limit, content_type)
+    parser.feed(content)
+    return parser.close()
+
 # 国际财经新闻 RSS 源
 INTERNATIONAL_SOURCES = [
     {
         'name': 'Reuters Business',
         'url': 'https://feeds.reuters.com/reuters/businessNews',
         'category': 'Business',
-        'region': 'international'
+        'region': 'international',
+        # 响应慢、经常超时，整体时间紧张时最后抓取
+        'priority': -1
     },
     {
         'name': 'BBC Business',
@@ -209,7 +661,7 @@ def parse_sina_json(content):
     try:
         data = json.loads(content)
         if data.get('result') and data['result'].get('data'):
-            for item in data['result']['data'][:20]:
+            for item in data['result']['data'][:MAX_ITEMS_PER_SOURCE]:
                 items.append({
                     'title': item.get('title', ''),
                     'link': item.get('url', ''),
@@ -228,7 +680,7 @@ def parse_eastmoney_json(content):
         content = re.sub(r'^[^(]*\(|\);?$', '', content)
         data = json.loads(content)
         if data.get('LivesList'):
-            for item in data['LivesList'][:20]:
+            for item in data['LivesList'][:MAX_ITEMS_PER_SOURCE]:
                 items.append({
                     'title': item.get('Title', ''),
                     'link': item.get('Url', ''),
@@ -245,19 +697,301 @@ def parse_wallstreet_json(content):
     try:
         data = json.loads(content)
         if data.get('data') and data['data'].get('items'):
-            for item in data['data']['items'][:20]:
-                items.append({
+            for item in data['data']['items'][:MAX_ITEMS_PER_SOURCE]:
+                entry = {
                     'title': item.get('title', ''),
                     'link': f"https://wallstreetcn.com/articles/{item.get('id', '')}",
                     'description': item.get('summary', ''),
-                    'pubDate': datetime.fromtimestamp(item.get('display_time', 0)).isoformat() if item.get('display_time') else ''
-                })
+                    'pubDate': ''
+                }
+                # display_time 本身就是时间戳，直接作为 ts，不再经过字符串往返
+                if item.get('display_time'):
+                    entry['ts'] = int(item['display_time'])
+                    entry['pubDate'] = datetime.fromtimestamp(entry['ts'], timezone.utc).isoformat()
+                items.append(entry)
     except:
         pass
     return items
 
-def fetch_all_news(output_dir=None):
-    """获取所有新闻源的新闻"""
+def parse_source_content(source, content):
+    """根据源类型选择解析方式"""
+    source_type = source.get('type', 'rss')
+
+    if source_type == 'json_sina':
+        return parse_sina_json(content)
+    elif source_type == 'json_eastmoney':
+        return parse_eastmoney_json(content)
+    elif source_type == 'json_wallstreet':
+        return parse_wallstreet_json(content)
+    return parse_rss_simple(content)
+
+def request_source(source, timeout, deadline, extra_headers, pool, cancel=None, max_bytes=DEFAULT_MAX_BYTES):
+    """发送一次源请求，返回 (响应或 None, RSS 流式解析器或 None, 异常列表)
+
+    RSS 边下载边解析（编码由响应头与内容开头确定），够数后不再读取剩余内容；
+    cancel（threading.Event）被设置后停止读取；
+    响应体上限取来源的 maxBytes，没有时为 max_bytes
+    """
+    stream_parser = RSSStreamParser() if source.get('type', 'rss') == 'rss' else None
+    errors = []
+    consumer = stream_parser.feed if stream_parser else None
+    chunks = []
+    if cancel is not None:
+        def consumer(chunk):
+            if cancel.is_set():
+                return True
+            if stream_parser:
+                return stream_parser.feed(chunk)
+            chunks.append(chunk)
+            return False
+
+    def on_headers(headers):
+        if stream_parser:
+            stream_parser.content_type = headers.get('Content-Type')
+
+    response = fetch_response(source['url'], timeout=timeout, deadline=deadline,
+                              extra_headers=extra_headers, pool=pool,
+                              consumer=consumer, on_error=errors.append,
+                              max_bytes=source.get('maxBytes', max_bytes), on_headers=on_headers)
+    if response and chunks:
+        response['body'] = b''.join(chunks)
+    return response, stream_parser, errors
+
+def empty_source_data(source):
+    """还没有条目的 source_data"""
+    return {
+        'name': source['name'],
+        'category': source['category'],
+        'region': source.get('region', 'international'),
+        'url': source['url'],
+        'itemCount': 0,
+        'items': []
+    }
+
+def fetch_source(source, timeout=DEFAULT_SOURCE_TIMEOUT, cache=None, pool=None, health=None, hedge=None,
+                 run_deadline=None, metrics=None, max_bytes=DEFAULT_MAX_BYTES):
+    """抓取并解析单个新闻源，返回 source_data
+
+    传入 HttpCache 时发送条件请求，304 直接复用上次解析结果；
+    传入 SourceHealth 时熔断中的源直接跳过（带 CIRCUIT_OPEN_ERROR，写出前改用存档条目），半开探测缩短超时，
+    结果的健康状态写入 source_data['health']；
+    同时传入 HedgeBudget 时，超过该源历史 p90 耗时仍未返回就发出对冲请求，取先成功的。
+    run_deadline 为整体截止时间（time.monotonic()），单源截止时间不超过它；
+    因整体截止时间未完成的源带 DEADLINE_ERROR，不计入健康统计。
+    传入 FetchMetrics 时记录该源的分阶段耗时、字节数与条目数。
+    响应体解压后超过 max_bytes（来源的 maxBytes 优先）或不像新闻源时按失败处理
+    """
+    started = time.monotonic()
+    timings = {'status': 'failed'}
+    source_data = _fetch_source(source, timeout, cache, pool, health, hedge, run_deadline, timings, max_bytes)
+    if metrics:
+        metrics.record(source['name'], timings['status'], time.monotonic() - started, timings,
+                       source_data['itemCount'])
+    return source_data
+
+def _fetch_source(source, timeout, cache, pool, health, hedge, run_deadline, timings, max_bytes):
+    """fetch_source 的实现，timings 中填入状态、各阶段耗时和字节数"""
+    timeout = source.get('timeout', timeout)
+    started = time.monotonic()
+    url = source['url']
+    source_data = empty_source_data(source)
+    if run_deadline is not None and started >= run_deadline:
+        timings['status'] = 'deadline'
+        source_data['error'] = DEADLINE_ERROR
+        if health:
+            source_data['health'] = health.public(source['name'])
+        return source_data
+
+    state = health.allow(source['name']) if health else None
+    if state == OPEN:
+        source_data['health'] = health.public(source['name'])
+        log(f"  {source['name']}: Circuit open, skipped until {source_data['health'].get('retryAt')}, "
+            f"serving archived items")
+        timings['status'] = 'circuit_open'
+        source_data['error'] = CIRCUIT_OPEN_ERROR
+        return source_data
+    if state == HALF_OPEN:
+        timeout = min(timeout, PROBE_TIMEOUT)
+
+    extra_headers = cache.conditional_headers(url) if cache else None
+    deadline = started + timeout
+    cut_by_run = run_deadline is not None and run_deadline < deadline
+    if cut_by_run:
+        deadline = run_deadline
+    hedge_delay = health.latency_quantile(source['name'], HEDGE_QUANTILE) if hedge and state != HALF_OPEN else None
+    if hedge_delay is not None and hedge_delay < deadline - started:
+        (response, stream_parser, errors), hedged = hedged_call(
+            lambda cancel: request_source(source, timeout, deadline, extra_headers, pool, cancel, max_bytes),
+            hedge_delay, hedge, succeeded=lambda result: result[0] is not None)
+        if hedged:
+            log(f"  {source['name']}: Hedged after {hedge_delay:.1f}s, hedge {hedged}")
+    else:
+        response, stream_parser, errors = request_source(source, timeout, deadline, extra_headers, pool,
+                                                         max_bytes=max_bytes)
+
+    if response:
+        timings.update(response['timings'], wireBytes=response['wireBytes'], decodedBytes=response['decodedBytes'])
+
+    items = None
+    if response and response['status'] == 304 and cache:
+        items = cache.cached_items(url)
+        if items is not None:
+            timings['status'] = 'not_modified'
+            log(f"  {source['name']}: Not modified, reused {len(items)} articles ({time.monotonic() - started:.1f}s)")
+    elif response and response['status'] != 304 and (stream_parser or response['body']):
+        if stream_parser:
+            parse_started = time.monotonic()
+            items = stream_parser.close()
+            timings['parse'] += time.monotonic() - parse_started
+        else:
+            # JSON 只能按 str 解析，整体按识别出的编码解码
+            decode_started = time.monotonic()
+            content = decode_payload(response['body'], response['contentType'])
+            parse_started = time.monotonic()
+            items = parse_source_content(source, content)
+            timings['decode'] += parse_started - decode_started
+            timings['parse'] += time.monotonic() - parse_started
+        timings['status'] = 'ok'
+        if cache:
+            cache.update(url, response['headers'], items)
+        log(f"  {source['name']}: Found {len(items)} articles "
+            f"({time.monotonic() - started:.1f}s, {format_bytes(response['wireBytes'])})")
+    elif cache:
+        cache.record_miss()
+
+    latency = time.monotonic() - started
+    if items is not None:
+        source_data['itemCount'] = len(items)
+        source_data['items'] = items
+        if health:
+            health.record_success(source['name'], latency)
+    elif cut_by_run and time.monotonic() >= run_deadline:
+        log(f"  {source['name']}: Cancelled at run deadline ({latency:.1f}s)")
+        timings['status'] = 'deadline'
+        source_data['error'] = DEADLINE_ERROR
+        if health:
+            source_data['health'] = health.public(source['name'])
+        return source_data
+    else:
+        log(f"  {source['name']}: Failed to fetch ({latency:.1f}s)")
+        source_data['error'] = FETCH_ERROR
+        if health:
+            # 304 但本地没有缓存条目时也算失败，下次会发送无条件请求
+            health.record_failure(source['name'], error_class(errors[0]) if errors else 'NoContent', latency)
+    if health:
+        source_data['health'] = health.public(source['name'])
+
+    return source_data
+
+def fetch_sources(sources, executor, source_timeout, cache, pool, health=None, hedge=None, run_deadline=None,
+                  metrics=None, max_bytes=DEFAULT_MAX_BYTES):
+    """在线程池中并发抓取 sources，结果顺序与 sources 一致
+
+    按 priority 从高到低提交（同优先级保持原顺序）。给定 run_deadline 时，到期仍在排队的源被取消，
+    正在抓取的源也在 run_deadline 放弃，这些源返回带 DEADLINE_ERROR 的空 source_data
+    """
+    order = sorted(range(len(sources)), key=lambda i: -sources[i].get('priority', DEFAULT_PRIORITY))
+    futures = {i: executor.submit(fetch_source, sources[i], source_timeout, cache, pool, health, hedge, run_deadline,
+                                  metrics, max_bytes)
+               for i in order}
+    if run_deadline is None:
+        return [futures[i].result() for i in range(len(sources))]
+
+    _, pending = wait(futures.values(), timeout=max(0.0, run_deadline - time.monotonic()) + DEADLINE_GRACE)
+    for future in pending:
+        future.cancel()
+    results = []
+    for i, source in enumerate(sources):
+        future = futures[i]
+        if future.done() and not future.cancelled():
+            results.append(future.result())
+        else:
+            source_data = dict(empty_source_data(source), error=DEADLINE_ERROR)
+            if health:
+                source_data['health'] = health.public(source['name'])
+            results.append(source_data)
+            if metrics and future.cancelled():
+                metrics.record(source['name'], 'deadline', 0.0)
+    return results
+
+def load_previous_snapshot(output_dir):
+    """读取上一次写出的 news_data.json，不存在或损坏时返回 None"""
+    path = os.path.join(output_dir or '.', 'news_data.json')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def carry_over_stale(results, previous):
+    """没有存档时，因整体截止时间缺席的源沿用上一次快照中的条目，去掉 error 并标记 stale，返回沿用的源数
+
+    staleSince 为这些条目最后一次成功抓取的时间；跨来源合并信息（alternates）丢弃后重新计算。
+    上一次快照已经去重，被合并进其它来源 alternates 的条目找不回来，有存档时改用 serve_archived
+    """
+    if not previous:
+        return 0
+    previous_sources = {source.get('name'): source for source in previous.get('sources', [])}
+    carried = 0
+    for source_data in results:
+        if source_data.get('error') != DEADLINE_ERROR:
+            continue
+        old = previous_sources.get(source_data['name'])
+        if not old or not old.get('items'):
+            continue
+        source_data.pop('error')
+        source_data['items'] = [{k: v for k, v in item.items() if k != 'alternates'} for item in old['items']]
+        source_data['itemCount'] = len(source_data['items'])
+        source_data['stale'] = True
+        source_data['staleSince'] = old.get('staleSince') or previous.get('fetchTime')
+        carried += 1
+    return carried
+
+def serve_archived(source_data, dates, store):
+    """抓取失败、熔断跳过或因整体截止时间缺席的源改为取存档里最新的 MAX_ITEMS_PER_SOURCE 条，去掉 error 并标记 stale
+
+    staleSince 为该源最近一次写入存档的时间；存档里没有该源时保持原样（空条目、带 error），返回是否改用存档
+    """
+    items = store.latest(source_data['name'], MAX_ITEMS_PER_SOURCE)
+    if not items:
+        return False
+    source_data.pop('error', None)
+    source_data['items'] = dates.normalize(source_data, items)
+    source_data['itemCount'] = len(source_data['items'])
+    source_data['stale'] = True
+    source_data['staleSince'] = store.last_seen(source_data['name'])
+    return True
+
+def ingest_results(results, dates, store):
+    """规范化发布时间并写入存档，返回 (新增数, 变化数, 改用存档条目的源数)
+
+    有存档时每个成功抓取的源改为取存档里最新的 MAX_ITEMS_PER_SOURCE 条，
+    带 error 的源（抓取失败、熔断跳过、整体截止时间缺席）同样取存档里的条目并标记 stale（见 serve_archived）
+    """
+    # 统一发布时间：补上 UTC 时间戳 ts，各源条目按时间从新到旧排列
+    for source_data in results:
+        source_data['items'] = dates.normalize(source_data, source_data['items'])
+
+    new_count = changed_count = stale_count = 0
+    if store:
+        for source_data in results:
+            if source_data.get('error'):
+                stale_count += serve_archived(source_data, dates, store)
+                continue
+            new, changed = store.upsert(source_data['name'], source_data['items'])
+            new_count += new
+            changed_count += changed
+            # 存档中较早的记录可能还没有 ts，这里补齐并重新排序
+            source_data['items'] = dates.normalize(source_data, store.latest(source_data['name'], MAX_ITEMS_PER_SOURCE))
+            source_data['itemCount'] = len(source_data['items'])
+        store.flush()
+    return new_count, changed_count, stale_count
+
+def assemble_news(results, dedupe_distance):
+    """由各源结果组装 news_data，返回 (news_data, 合并掉的重复条目数)
+
+    results 中的字典不会被修改（去重会改写条目列表，这里先浅拷贝）
+    """
     all_news = {
         'fetchTime': datetime.now().isoformat(),
         'sources': [],
@@ -266,73 +1000,403 @@ def fetch_all_news(output_dir=None):
             'chinese': []
         }
     }
-    
-    for source in NEWS_SOURCES:
-        print(f"Fetching from {source['name']}...")
-        content = fetch_url(source['url'])
-        
-        source_data = {
-            'name': source['name'],
-            'category': source['category'],
-            'region': source.get('region', 'international'),
-            'url': source['url'],
-            'itemCount': 0,
-            'items': []
-        }
-        
-        if content:
-            # 根据类型选择解析方式
-            source_type = source.get('type', 'rss')
-            
-            if source_type == 'json_sina':
-                items = parse_sina_json(content)
-            elif source_type == 'json_eastmoney':
-                items = parse_eastmoney_json(content)
-            elif source_type == 'json_wallstreet':
-                items = parse_wallstreet_json(content)
-            else:
-                items = parse_rss_simple(content)
-            
-            source_data['itemCount'] = len(items)
-            source_data['items'] = items
-            print(f"  Found {len(items)} articles")
-        else:
-            print(f"  Failed to fetch")
-            source_data['error'] = 'Failed to fetch'
-        
-        all_news['sources'].append(source_data)
-        
+    for source_data in results:
+        all_news['sources'].append(dict(source_data))
+
         # 按区域分类
-        region = source.get('region', 'international')
+        region = source_data.get('region', 'international')
         if region in all_news['regions']:
             all_news['regions'][region].append(source_data['name'])
-    
-    # 保存到文件
+
+    # 合并跨来源的重复通稿（存档保留原始条目）
+    duplicates = 0
+    if dedupe_distance >= 0:
+        duplicates = collapse_duplicates(all_news['sources'], max_distance=dedupe_distance)
+    return all_news, duplicates
+
+def write_news_data(all_news, output_dir):
+    """写出 news_data.json，返回 (路径, 是否未变化)
+
+    除 fetchTime 外内容没有变化时不重写，避免产生无意义的提交
+    """
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
-        output_file = os.path.join(output_dir, 'news_data.json')
+    manifest = BuildManifest(output_dir or '.')
+    output_file = os.path.join(output_dir or '.', 'news_data.json')
+    # format 记录输出格式，改为紧凑 JSON 后旧的缩进文件会重写一次
+    inputs = {'articles': articles_hash(all_news), 'format': 'compact'}
+    unchanged = manifest.is_fresh('news_data.json', inputs)
+    if not unchanged:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(minify_json(all_news))
+        manifest.record('news_data.json', inputs)
+        manifest.save()
+    return output_file, unchanged
+
+def resolve_cache_dir(output_dir, cache_dir):
+    """缓存目录，默认 <output_dir>/.cache"""
+    return cache_dir if cache_dir is not None else os.path.join(output_dir or '.', CACHE_DIR_NAME)
+
+def resolve_replay_cache_dir(output_dir, cache_dir, replay):
+    """回放模式下未指定缓存目录时使用 <output_dir>/.cache/replay，其余情况原样返回 cache_dir"""
+    if replay and cache_dir is None:
+        return os.path.join(resolve_cache_dir(output_dir, None), REPLAY_DIR_NAME)
+    return cache_dir
+
+def open_state(output_dir, cache_dir, use_cache, store_dir, use_store, use_health=True, store_sources=None):
+    """打开跨运行保存的状态，返回 (HTTP 缓存或 None, 存档或 None, 来源健康记录或 None)
+
+    store_sources 不为 None 时存档只载入这些来源的记录
+    """
+    cache_dir = resolve_cache_dir(output_dir, cache_dir)
+    cache = HttpCache(os.path.join(cache_dir, 'http_cache.json')) if use_cache else None
+    health = SourceHealth(os.path.join(cache_dir, 'source_health.json')) if use_health else None
+    store = None
+    if use_store:
+        if store_dir is None:
+            store_dir = os.path.join(output_dir or '.', STORE_DIR_NAME)
+        store = ArticleStore(store_dir, sources=store_sources)
+    return cache, store, health
+
+def new_metrics():
+    """以当前 UTC 时间为运行标识的 FetchMetrics"""
+    return FetchMetrics(datetime.now(timezone.utc).isoformat(timespec='seconds'))
+
+def print_peak_rss():
+    """打印进程峰值 RSS（平台不支持时不打印）"""
+    peak = peak_rss_bytes()
+    if peak is not None:
+        print(f"   🧠 Peak RSS: {format_bytes(peak)}")
+
+def print_hedging(hedge):
+    """打印对冲请求统计"""
+    stats = hedge.stats()
+    rate = stats['wins'] / stats['hedges'] * 100 if stats['hedges'] else 0
+    print(f"   🪞 Hedging: {stats['hedges']} hedged of {stats['requests']} requests, "
+          f"{stats['wins']} won ({rate:.0f}%), {stats['denied']} denied by budget")
+
+def print_health(health, names):
+    """打印各状态的来源数"""
+    counts = health.summary(names)
+    print(f"   🩺 Health: {counts['ok']} ok, {counts['degraded']} degraded, {counts['down']} down "
+          f"({health.skipped} skipped by circuit breaker)")
+
+def fetch_all_news(output_dir=None, max_workers=DEFAULT_MAX_WORKERS, source_timeout=DEFAULT_SOURCE_TIMEOUT,
+                   cache_dir=None, use_cache=True, max_per_host=DEFAULT_MAX_PER_HOST,
+                   store_dir=None, use_store=True, dedupe_distance=DEFAULT_MAX_DISTANCE, use_health=True,
+                   hedge_ratio=None, deadline=None, priorities=None, metrics_dir=None, use_metrics=True,
+                   shard=None, max_bytes=DEFAULT_MAX_BYTES, replay=None, run_id=None):
+    """获取所有新闻源的新闻
+
+    各源在线程池中并发抓取，max_workers 限制并发数，source_timeout 为单源截止时间；
+    输出顺序与 NEWS_SOURCES 一致，不受完成先后影响。
+    use_cache 时在 cache_dir（默认 <output_dir>/.cache）下维护 HTTP 条件请求缓存；
+    同一 host 的源共享 keep-alive 连接，max_per_host 限制每个 host 的并发连接数。
+    use_store 时条目先写入 store_dir（默认 <output_dir>/data/articles）下的存档，
+    news_data.json 中每个成功抓取的源取存档里最新的 MAX_ITEMS_PER_SOURCE 条，
+    抓取失败、熔断跳过或因整体截止时间缺席的源同样取存档里的条目并标记 stale（存档里没有时才输出空列表）。
+    写出前合并跨来源的近似重复条目（SimHash 汉明距离 <= dedupe_distance，负数表示不合并）。
+    use_health 时在同一缓存目录下记录各源健康状态，连续失败的源熔断后跳过，冷却结束再探测；
+    hedge_ratio 不为 None 时（需要 use_health 提供的历史耗时）对慢源发出对冲请求，对冲数不超过请求数的该比例。
+    deadline 为整体时间预算（秒），按优先级（priorities 覆盖来源名 -> 优先级）抓取，到期后放弃未完成的源，
+    这些源与失败的源一样取存档里的条目（没有存档时沿用上一次 news_data.json 中的条目）并标记 stale。
+    use_metrics 时把各源分阶段耗时追加到 metrics_dir（默认 <cache_dir>/metrics）下的
+    fetch_metrics.jsonl，并覆盖写出 Prometheus 文本格式的 fetch_metrics.prom。
+    shard=(i, N) 时只抓取一致性哈希分配给第 i 个分片的来源，不去重，写出 partials/shard-i-of-N.jsonl
+    部分快照（由 merge_shards.py 合并为 news_data.json）；缓存目录默认为 <output_dir>/.cache/shard-i-of-N，
+    避免多个分片进程互相覆盖缓存与健康记录；存档只载入该分片的来源，追加时加文件锁，
+    run_id 写入部分快照，合并时据此丢弃上一轮留下的部分快照。
+    每个响应分块读取，解压后超过 max_bytes（来源的 maxBytes 优先）或明显不是新闻源（HTML 页面等）时提前放弃；
+    运行结束打印进程峰值 RSS。
+    replay 为 feed_server.py 回放服务器的地址时，各来源改为从该服务器抓取录像，
+    缓存目录默认为 <output_dir>/.cache/replay（分片时再按分片分目录）
+    """
+    if shard is not None and cache_dir is None:
+        cache_dir = os.path.join(resolve_cache_dir(output_dir, resolve_replay_cache_dir(output_dir, None, replay)),
+                                 shard_label(shard))
+    cache_dir = resolve_replay_cache_dir(output_dir, cache_dir, replay)
+    sources = [dict(source, priority=priorities[source['name']]) if source['name'] in (priorities or {}) else source
+               for source in (replay_sources(NEWS_SOURCES, replay) if replay else NEWS_SOURCES)]
+    order = {source['name']: position for position, source in enumerate(sources)}
+    if shard is not None:
+        sources = shard_sources(sources, shard)
+    cache, store, health = open_state(output_dir, cache_dir, use_cache, store_dir, use_store, use_health,
+                                      store_sources=[s['name'] for s in sources] if shard is not None else None)
+    pool = ConnectionPool(max_per_host=max_per_host)
+    hedge = HedgeBudget(hedge_ratio) if hedge_ratio is not None and health else None
+    metrics = new_metrics() if use_metrics else None
+    if metrics_dir is None:
+        metrics_dir = os.path.join(resolve_cache_dir(output_dir, cache_dir), METRICS_DIR_NAME)
+    previous = load_previous_snapshot(output_dir) if deadline is not None and not store else None
+
+    started = time.monotonic()
+    budget = f", deadline={deadline:g}s" if deadline is not None else ''
+    part = f" for shard {shard[0]}/{shard[1]}" if shard is not None else ''
+    part += f" from replay server {replay}" if replay else ''
+    print(f"Fetching {len(sources)} sources{part} (workers={max_workers}, timeout={source_timeout}s{budget})...")
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            results = fetch_sources(sources, executor, source_timeout, cache, pool, health, hedge,
+                                    started + deadline if deadline is not None else None, metrics, max_bytes)
+    finally:
+        pool.close()
+    missed = {source_data['name'] for source_data in results if source_data.get('error') == DEADLINE_ERROR}
+    carry_over_stale(results, previous)
+
+    if cache:
+        cache.save()
+    if health:
+        health.save()
+    if metrics:
+        metrics.peak_rss = peak_rss_bytes()
+        metrics_files = metrics.write(metrics_dir)
+
+    dates = DateNormalizer()
+    new_count, changed_count, stale_count = ingest_results(results, dates, store)
+    carried = sum(1 for source_data in results if source_data['name'] in missed and source_data.get('stale'))
+    if shard is None:
+        all_news, duplicates = assemble_news(results, dedupe_distance)
+        output_file, unchanged = write_news_data(all_news, output_dir)
     else:
-        output_file = 'news_data.json'
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_news, f, ensure_ascii=False, indent=2)
-    
+        # 跨分片的重复只有合并时才看得到，这里不去重
+        all_news, duplicates = assemble_news(results, -1)
+        output_file, unchanged = write_partial(all_news, partial_path(output_dir, shard), shard, order,
+                                                   run_id), False
+
     # 统计
     int_count = sum(1 for s in all_news['sources'] if s.get('region') == 'international' and s['itemCount'] > 0)
     cn_count = sum(1 for s in all_news['sources'] if s.get('region') == 'chinese' and s['itemCount'] > 0)
     total_items = sum(s['itemCount'] for s in all_news['sources'])
     
-    print(f"\n✅ News saved to {output_file}")
+    if unchanged:
+        print(f"\n✅ No article changes, kept {output_file}")
+    else:
+        print(f"\n✅ News saved to {output_file}")
     print(f"   📰 Total: {total_items} articles")
     print(f"   🌍 International: {int_count} sources")
     print(f"   🇨🇳 Chinese: {cn_count} sources")
+    transfer = pool.stats()
+    ratio = transfer['wireBytes'] / transfer['decodedBytes'] * 100 if transfer['decodedBytes'] else 0
+    print(f"   📦 Transfer: {format_bytes(transfer['wireBytes'])} on wire / "
+          f"{format_bytes(transfer['decodedBytes'])} decoded ({ratio:.0f}%), "
+          f"{transfer['connectionsOpened']} connections opened, {transfer['connectionsReused']} reused")
+    if cache:
+        print(f"   🗄️  HTTP cache: {cache.hits} hits / {cache.misses} misses")
+    if dedupe_distance >= 0 and shard is None:
+        print(f"   🧬 Dedupe: {duplicates} near-duplicates collapsed")
+    if health:
+        print_health(health, [s['name'] for s in sources])
+    if hedge:
+        print_hedging(hedge)
+    if deadline is not None:
+        print(f"   ⌛ Deadline: {len(missed)} sources missed the {deadline:g}s budget, {carried} carried over as stale")
+    print(f"   🕒 Dates: {dates.parsed} normalized, {dates.unparsed} unparsed "
+          f"({', '.join(sorted(set(dates.formats.values()))) or 'none'})")
+    if store:
+        print(f"   🗃️  Store: {new_count} new, {changed_count} changed, {store.count()} archived, "
+              f"{stale_count} sources served from archive")
+    if metrics:
+        print(f"   📈 Metrics: {' / '.join(metrics_files)}")
+        metrics.print_slowest()
+    print_peak_rss()
+    print(f"   ⏱️  Elapsed: {time.monotonic() - started:.1f}s")
     return all_news
 
+def run_daemon(output_dir=None, max_workers=DEFAULT_MAX_WORKERS, source_timeout=DEFAULT_SOURCE_TIMEOUT,
+               cache_dir=None, use_cache=True, max_per_host=DEFAULT_MAX_PER_HOST,
+               store_dir=None, use_store=True, dedupe_distance=DEFAULT_MAX_DISTANCE,
+               min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL, use_health=True,
+               hedge_ratio=None, metrics_dir=None, use_metrics=True, max_bytes=DEFAULT_MAX_BYTES, replay=None):
+    """常驻模式：连接池、缓存、存档和各源最新结果保存在内存中，按来源自适应间隔轮询
+
+    每个源的间隔由 AdaptiveScheduler 根据内容变化频率调整（限制在 [min_interval, max_interval]）；
+    某个源抓取失败时沿用它上次成功的结果（健康状态取最新的）；只有内容或健康状态变化时才重写 news_data.json。
+    use_metrics 时每一轮的分阶段耗时追加到 metrics_dir 下的 JSON Lines，Prometheus 文本反映最近一轮。
+    replay 与 fetch_all_news 相同，从回放服务器抓取。
+    收到 SIGINT / SIGTERM 后在当前一轮结束时退出
+    """
+    cache_dir = resolve_replay_cache_dir(output_dir, cache_dir, replay)
+    cache, store, health = open_state(output_dir, cache_dir, use_cache, store_dir, use_store, use_health)
+    if metrics_dir is None:
+        metrics_dir = os.path.join(resolve_cache_dir(output_dir, cache_dir), METRICS_DIR_NAME)
+    pool = ConnectionPool(max_per_host=max_per_host)
+    hedge = HedgeBudget(hedge_ratio) if hedge_ratio is not None and health else None
+    dates = DateNormalizer()
+    sources = {source['name']: source for source in (replay_sources(NEWS_SOURCES, replay) if replay else NEWS_SOURCES)}
+    scheduler = AdaptiveScheduler(list(sources), time.monotonic(), min_interval=min_interval,
+                                  max_interval=max_interval)
+    # 来源名 -> (最近一次成功的 source_data, 条目哈希)
+    latest = {}
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    print(f"Daemon started: {len(sources)} sources, interval {min_interval:g}-{max_interval:g}s "
+          f"(workers={max_workers}, timeout={source_timeout}s)")
+    rounds = writes = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            while not stop.is_set():
+                due = scheduler.due(time.monotonic())
+                if not due:
+                    stop.wait(scheduler.seconds_until_next(time.monotonic()))
+                    continue
+
+                rounds += 1
+                metrics = new_metrics() if use_metrics else None
+                results = fetch_sources([sources[name] for name in due], executor, source_timeout, cache, pool,
+                                        health, hedge, metrics=metrics, max_bytes=max_bytes)
+                if metrics:
+                    metrics.peak_rss = peak_rss_bytes()
+                    metrics.write(metrics_dir)
+                if cache:
+                    cache.save()
+                if health:
+                    health.save()
+                ingest_results(results, dates, store)
+
+                changed_sources = []
+                now = time.monotonic()
+                for source_data in results:
+                    name = source_data['name']
+                    # 改用存档条目的源（stale）也算失败：条目沿用上次成功的结果
+                    ok = not source_data.get('error') and not source_data.get('stale')
+                    changed = False
+                    if ok:
+                        digest = articles_hash({'items': source_data['items']})
+                        changed = name not in latest or latest[name][1] != digest
+                        latest[name] = (source_data, digest)
+                    elif name not in latest:
+                        # 从未成功过的源也出现在输出中（带 error），与单次运行一致
+                        latest[name] = (source_data, None)
+                        changed = True
+                    elif source_data.get('health') != latest[name][0].get('health'):
+                        # 条目沿用上次成功的结果，页面上的健康状态随本次更新
+                        latest[name] = (dict(latest[name][0], health=source_data.get('health')), latest[name][1])
+                        changed = True
+                    if changed:
+                        changed_sources.append(name)
+                    interval = scheduler.record(name, now, changed=changed, ok=ok)
+                    status = 'failed' if not ok else 'changed' if changed else 'unchanged'
+                    log(f"  ⏰ {name}: {status}, next in {interval:.0f}s")
+
+                if changed_sources:
+                    all_news, _ = assemble_news(
+                        [latest[name][0] for name in sources if name in latest], dedupe_distance)
+                    output_file, unchanged = write_news_data(all_news, output_dir)
+                    if not unchanged:
+                        writes += 1
+                        log(f"✅ Round {rounds}: {len(changed_sources)} sources changed, saved {output_file}")
+                        continue
+                log(f"💤 Round {rounds}: no article changes")
+    finally:
+        pool.close()
+        if cache:
+            cache.save()
+        if health:
+            health.save()
+
+    print(f"\n👋 Daemon stopped after {rounds} rounds, {writes} writes")
+    if store:
+        print(f"   🗃️  Store: {store.count()} archived")
+    if health:
+        print_health(health, list(sources))
+    if hedge:
+        print_hedging(hedge)
+    print_peak_rss()
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='抓取财经新闻并保存为 JSON')
+    # GitHub Actions 默认使用当前目录
+    parser.add_argument('output_dir', nargs='?', default='.', help='输出目录（默认当前目录）')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f'并发抓取的最大线程数（默认 {DEFAULT_MAX_WORKERS}）')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_SOURCE_TIMEOUT,
+                        help=f'单个新闻源的截止时间，单位秒（默认 {DEFAULT_SOURCE_TIMEOUT}）')
+    parser.add_argument('--max-per-host', type=int, default=DEFAULT_MAX_PER_HOST,
+                        help=f'每个 host 的最大并发连接数（默认 {DEFAULT_MAX_PER_HOST}）')
+    parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_BYTES,
+                        help=f'单个响应解压后的字节上限，超过即放弃（默认 {DEFAULT_MAX_BYTES}，来源的 maxBytes 优先）')
+    parser.add_argument('--cache-dir', default=None,
+                        help=f'本地缓存目录（默认 <output_dir>/{CACHE_DIR_NAME}）')
+    parser.add_argument('--no-cache', action='store_true', help='禁用 HTTP 条件请求缓存')
+    parser.add_argument('--store-dir', default=None,
+                        help=f'新闻存档目录（默认 <output_dir>/{STORE_DIR_NAME}）')
+    parser.add_argument('--no-store', action='store_true', help='不写存档，news_data.json 只包含本次抓取结果')
+    parser.add_argument('--dedupe-distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                        help=f'判定近似重复的 SimHash 汉明距离上限（默认 {DEFAULT_MAX_DISTANCE}，-1 关闭去重）')
+    parser.add_argument('--no-health', action='store_true',
+                        help='不记录来源健康状态，也不跳过连续失败的源（关闭熔断）')
+    parser.add_argument('--hedge', nargs='?', type=float, const=DEFAULT_HEDGE_RATIO, default=None, metavar='RATIO',
+                        help='源超过历史 p90 耗时仍未返回时发出对冲请求；RATIO 为对冲数占请求数的上限'
+                             f'（默认 {DEFAULT_HEDGE_RATIO}，需要来源健康记录）')
+    parser.add_argument('--deadline', type=float, default=None,
+                        help='整体抓取时间预算，单位秒；到期后放弃未完成的源，沿用上次的条目并标记 stale')
+    parser.add_argument('--priority', action='append', default=[], metavar='NAME=N',
+                        help=f'覆盖来源优先级（数值越大越先抓取，默认 {DEFAULT_PRIORITY}），可重复')
+    parser.add_argument('--metrics-dir', default=None,
+                        help=f'分阶段耗时指标目录（默认 <cache_dir>/{METRICS_DIR_NAME}）')
+    parser.add_argument('--no-metrics', action='store_true', help='不写出抓取指标，也不打印最慢来源表')
+    parser.add_argument('--profile', action='store_true',
+                        help='剖析本次运行的 CPU 耗时，在输出目录写出 fetch_news.{prof,collapsed} 并打印热点摘要')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='用 tracemalloc 剖析本次运行的内存分配，写出 fetch_news.alloc.txt'
+                             '（会显著拖慢分配密集的代码，不能与 --profile 同时使用）')
+    parser.add_argument('--shard', type=parse_shard, default=None, metavar='i/N',
+                        help='只抓取一致性哈希分配给第 i 个分片（0 <= i < N）的来源，'
+                             '写出 partials/ 下的部分快照，由 merge_shards.py 合并')
+    parser.add_argument('--run-id', default=default_run_id(),
+                        help=f'写入部分快照的本轮抓取标识，merge_shards.py 据此丢弃上一轮的部分快照'
+                             f'（默认取环境变量 {RUN_ID_ENV}，仅用于 --shard）')
+    parser.add_argument('--replay', default=None, metavar='URL',
+                        help='从 feed_server.py serve 启动的回放服务器抓取录像（离线压测），'
+                             f'缓存与健康记录默认放在 <output_dir>/{CACHE_DIR_NAME}/{REPLAY_DIR_NAME}')
+    parser.add_argument('--daemon', action='store_true',
+                        help='常驻运行，按来源自适应间隔轮询，内容变化时才写出')
+    parser.add_argument('--min-interval', type=float, default=DEFAULT_MIN_INTERVAL,
+                        help=f'常驻模式下单个源的最短轮询间隔，单位秒（默认 {DEFAULT_MIN_INTERVAL}）')
+    parser.add_argument('--max-interval', type=float, default=DEFAULT_MAX_INTERVAL,
+                        help=f'常驻模式下单个源的最长轮询间隔，单位秒（默认 {DEFAULT_MAX_INTERVAL}）')
+    args = parser.parse_args(argv)
+    if args.daemon:
+        # 常驻模式按来源各自的间隔轮询，没有整轮的时间预算与抓取顺序
+        for flag, given in (('--shard', args.shard is not None), ('--deadline', args.deadline is not None),
+                            ('--priority', bool(args.priority))):
+            if given:
+                parser.error(f'{flag} cannot be combined with --daemon')
+    if args.profile and args.profile_memory:
+        parser.error('--profile and --profile-memory must be run as separate passes')
+    args.priorities = {}
+    for spec in args.priority:
+        name, sep, value = spec.rpartition('=')
+        if not sep or not name or not value.lstrip('-').isdigit():
+            parser.error(f'--priority expects NAME=N, got {spec!r}')
+        args.priorities[name] = int(value)
+    return args
+
 def main():
     """主函数"""
-    # GitHub Actions 默认使用当前目录
-    output_dir = sys.argv[1] if len(sys.argv) > 1 else '.'
-    fetch_all_news(output_dir)
+    args = parse_args()
+    run = run_daemon if args.daemon else fetch_all_news
+    if args.daemon:
+        options = {'min_interval': args.min_interval, 'max_interval': args.max_interval}
+    else:
+        options = {'deadline': args.deadline, 'priorities': args.priorities, 'shard': args.shard,
+                   'run_id': args.run_id}
+    if args.profile or args.profile_memory:
+        profiler = RunProfiler(args.output_dir, 'fetch_news', mode='memory' if args.profile_memory else 'cpu')
+    else:
+        profiler = contextlib.nullcontext()
+    with profiler:
+        run(args.output_dir, max_workers=args.workers, source_timeout=args.timeout,
+            cache_dir=args.cache_dir, use_cache=not args.no_cache,
+            max_per_host=args.max_per_host,
+            store_dir=args.store_dir, use_store=not args.no_store,
+            dedupe_distance=args.dedupe_distance, use_health=not args.no_health,
+            hedge_ratio=args.hedge, metrics_dir=args.metrics_dir, use_metrics=not args.no_metrics,
+            max_bytes=args.max_bytes, replay=args.replay, **options)
 
 if __name__ == '__main__':
     main()
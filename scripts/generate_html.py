@@ -4,10 +4,30 @@
 解决浏览器 CORS 限制问题，将 JSON 数据直接嵌入 HTML
 """
 
+import argparse
+import contextlib
+import gzip
+from datetime import datetime, timedelta, timezone
+from html import escape
+import inspect
 import json
 import os
 import sys
 
+import data_shards
+import precompress
+import search_index
+from build_manifest import BuildManifest, articles_hash, text_hash
+from data_shards import PAGE_SIZE, sorted_entries, strip_items, write_pages, write_shards
+from precompress import (minify_html, precompress_tree, print_size_table,
+                         remove_precompressed, write_precompressed)
+from profiling import RunProfiler
+from search_index import write_index
+
+OUTPUT_MODES = ('inline', 'shards', 'paged')
+# 预渲染卡片中的时间按北京时间显示（页面加载后会换成相对时间）
+CST = timezone(timedelta(hours=8))
+
 # HTML 模板
 HTML_TEMPLATE = '''<!DOCTYPE html>
 <html lang="zh-CN">
@@ -265,6 +285,53 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             border-color: var(--text-muted);
         }
 
+        /* fetch_news.py 记录的来源健康状态：degraded 为最近失败过，down 为已熔断、暂时不再抓取 */
+        .source-tab.degraded::after,
+        .source-tab.down::after {
+            content: '';
+            display: inline-block;
+            width: 6px;
+            height: 6px;
+            margin-left: 6px;
+            border-radius: 50%;
+            vertical-align: middle;
+            background: #f59e0b;
+        }
+
+        .source-tab.down {
+            opacity: 0.6;
+        }
+
+        .source-tab.down::after {
+            background: #ef4444;
+        }
+
+        /* 整体截止时间内没有抓完、沿用上次条目的来源 */
+        .source-tab.stale {
+            font-style: italic;
+            border-style: dashed;
+        }
+
+        .search-input {
+            padding: 8px 16px;
+            min-width: 220px;
+            border: 1px solid var(--border-color);
+            background: var(--bg-card);
+            color: var(--text-primary);
+            border-radius: 20px;
+            font-size: 13px;
+            outline: none;
+            transition: border-color 0.3s ease;
+        }
+
+        .search-input:focus {
+            border-color: var(--accent-blue);
+        }
+
+        [hidden] {
+            display: none !important;
+        }
+
         /* News Grid */
         .news-section {
             padding: 24px 0 48px;
@@ -311,6 +378,25 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             opacity: 1;
         }
 
+        /* 分页模式的虚拟滚动：卡片等高、按行列绝对定位 */
+        .news-grid.virtual {
+            display: block;
+            position: relative;
+        }
+
+        .news-grid.virtual > .news-card {
+            position: absolute;
+            height: 300px;
+            transition: background 0.3s ease, transform 0.3s ease, box-shadow 0.3s ease;
+        }
+
+        .news-grid.virtual .news-title {
+            display: -webkit-box;
+            -webkit-line-clamp: 2;
+            -webkit-box-orient: vertical;
+            overflow: hidden;
+        }
+
         .news-header {
             display: flex;
             justify-content: space-between;
@@ -363,6 +449,20 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             overflow: hidden;
         }
 
+        .news-alternates {
+            font-size: 12px;
+            color: var(--text-muted);
+        }
+
+        .news-alternates a {
+            color: var(--text-secondary);
+            text-decoration: none;
+        }
+
+        .news-alternates a:hover {
+            color: var(--accent-blue);
+        }
+
         .news-footer {
             margin-top: auto;
             display: flex;
@@ -456,6 +556,7 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             }
         }
     </style>
+    <style id="filter-style"></style>
 </head>
 <body>
     <div class="loading-overlay" id="loading">
@@ -530,10 +631,16 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                 </button>
             </div>
             <div class="source-tabs" id="source-tabs"></div>
+            <input type="search" class="search-input" id="search-input" placeholder="🔍 搜索新闻..." oninput="onSearchInput(this.value)">
         </section>
 
         <section class="news-section">
             <div class="news-grid" id="news-grid"></div>
+            <div class="news-grid" id="search-grid" hidden></div>
+            <div class="empty-state" id="empty-view" hidden>
+                <div class="empty-state-icon">📭</div>
+                <p>暂无新闻数据</p>
+            </div>
         </section>
     </main>
 
@@ -543,6 +650,18 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
         let currentSource = 'all';
 
         async function loadNewsData() {
+            // 分页模式：只内嵌了清单，可见区域的条目按页从 pages/ 加载
+            if (window.newsPages) {
+                newsData = window.newsPages;
+                updateUI();
+                return;
+            }
+            // 分片模式：只内嵌了清单，条目按当前视图从 news/ 加载
+            if (window.newsManifest) {
+                newsData = window.newsManifest;
+                updateUI();
+                return;
+            }
             // 优先使用内嵌数据
             if (window.embeddedNewsData) {
                 newsData = window.embeddedNewsData;
@@ -571,34 +690,34 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                         name: 'Reuters Business', category: 'Business', region: 'international',
                         itemCount: 3,
                         items: [
-                            { title: 'Global Markets Rally as Tech Stocks Lead Recovery', description: 'Major indices across Asia, Europe and the US posted gains as investors bet on continued economic growth.', link: 'https://reuters.com/business', pubDate: new Date(Date.now() - 3600000).toISOString() },
-                            { title: 'Oil Prices Surge on Middle East Supply Concerns', description: 'Brent crude jumps 3% as geopolitical tensions raise concerns about potential supply disruptions.', link: 'https://reuters.com/business', pubDate: new Date(Date.now() - 7200000).toISOString() },
-                            { title: 'Federal Reserve Signals Patience on Rate Cuts', description: 'Fed officials suggest they need more evidence of cooling inflation before beginning to lower interest rates.', link: 'https://reuters.com/business', pubDate: new Date(Date.now() - 10800000).toISOString() }
+                            { title: 'Global Markets Rally as Tech Stocks Lead Recovery', description: 'Major indices across Asia, Europe and the US posted gains as investors bet on continued economic growth.', link: 'https://reuters.com/business', pubDate: new Date(Date.now() - 3600000).toISOString(), ts: Math.floor((Date.now() - 3600000) / 1000) },
+                            { title: 'Oil Prices Surge on Middle East Supply Concerns', description: 'Brent crude jumps 3% as geopolitical tensions raise concerns about potential supply disruptions.', link: 'https://reuters.com/business', pubDate: new Date(Date.now() - 7200000).toISOString(), ts: Math.floor((Date.now() - 7200000) / 1000) },
+                            { title: 'Federal Reserve Signals Patience on Rate Cuts', description: 'Fed officials suggest they need more evidence of cooling inflation before beginning to lower interest rates.', link: 'https://reuters.com/business', pubDate: new Date(Date.now() - 10800000).toISOString(), ts: Math.floor((Date.now() - 10800000) / 1000) }
                         ]
                     },
                     {
                         name: 'Bloomberg Markets', category: 'Markets', region: 'international',
                         itemCount: 2,
                         items: [
-                            { title: 'Asian Stocks Mixed as Investors Weigh China Data', description: 'Hong Kong and mainland China markets diverge as new economic indicators send mixed signals.', link: 'https://bloomberg.com/markets', pubDate: new Date(Date.now() - 5400000).toISOString() },
-                            { title: 'Dollar Weakens Against Major Currencies', description: 'The greenback falls to a one-week low as traders reassess Federal Reserve policy moves.', link: 'https://bloomberg.com/markets', pubDate: new Date(Date.now() - 9000000).toISOString() }
+                            { title: 'Asian Stocks Mixed as Investors Weigh China Data', description: 'Hong Kong and mainland China markets diverge as new economic indicators send mixed signals.', link: 'https://bloomberg.com/markets', pubDate: new Date(Date.now() - 5400000).toISOString(), ts: Math.floor((Date.now() - 5400000) / 1000) },
+                            { title: 'Dollar Weakens Against Major Currencies', description: 'The greenback falls to a one-week low as traders reassess Federal Reserve policy moves.', link: 'https://bloomberg.com/markets', pubDate: new Date(Date.now() - 9000000).toISOString(), ts: Math.floor((Date.now() - 9000000) / 1000) }
                         ]
                     },
                     {
                         name: '新浪财经', category: '综合', region: 'chinese',
                         itemCount: 3,
                         items: [
-                            { title: '人民币汇率稳中有升 央行释放积极信号', description: '中国人民银行表示将保持人民币汇率在合理均衡水平上的基本稳定，增强市场信心。', link: 'https://finance.sina.com.cn', pubDate: new Date(Date.now() - 3600000).toISOString() },
-                            { title: 'A股三大指数集体收涨 科技股领涨', description: '上证指数收涨0.8%，深证成指涨1.2%，创业板指涨1.5%，科技板块表现活跃。', link: 'https://finance.sina.com.cn', pubDate: new Date(Date.now() - 7200000).toISOString() },
-                            { title: '多家银行下调存款利率 理财市场或迎调整', description: '国有大行纷纷下调存款利率，分析师预计将对银行理财产品收益率产生影响。', link: 'https://finance.sina.com.cn', pubDate: new Date(Date.now() - 10800000).toISOString() }
+                            { title: '人民币汇率稳中有升 央行释放积极信号', description: '中国人民银行表示将保持人民币汇率在合理均衡水平上的基本稳定，增强市场信心。', link: 'https://finance.sina.com.cn', pubDate: new Date(Date.now() - 3600000).toISOString(), ts: Math.floor((Date.now() - 3600000) / 1000) },
+                            { title: 'A股三大指数集体收涨 科技股领涨', description: '上证指数收涨0.8%，深证成指涨1.2%，创业板指涨1.5%，科技板块表现活跃。', link: 'https://finance.sina.com.cn', pubDate: new Date(Date.now() - 7200000).toISOString(), ts: Math.floor((Date.now() - 7200000) / 1000) },
+                            { title: '多家银行下调存款利率 理财市场或迎调整', description: '国有大行纷纷下调存款利率，分析师预计将对银行理财产品收益率产生影响。', link: 'https://finance.sina.com.cn', pubDate: new Date(Date.now() - 10800000).toISOString(), ts: Math.floor((Date.now() - 10800000) / 1000) }
                         ]
                     },
                     {
                         name: '东方财富', category: '快讯', region: 'chinese',
                         itemCount: 2,
                         items: [
-                            { title: '北向资金今日净买入超50亿元 连续三日流入', description: '外资持续看好中国市场，北向资金大幅流入A股市场，偏好金融和消费板块。', link: 'https://www.eastmoney.com', pubDate: new Date(Date.now() - 5400000).toISOString() },
-                            { title: '新能源汽车销量再创新高 产业链迎来机遇', description: '最新数据显示国内新能源汽车渗透率突破40%，相关产业链公司股价上涨。', link: 'https://www.eastmoney.com', pubDate: new Date(Date.now() - 9000000).toISOString() }
+                            { title: '北向资金今日净买入超50亿元 连续三日流入', description: '外资持续看好中国市场，北向资金大幅流入A股市场，偏好金融和消费板块。', link: 'https://www.eastmoney.com', pubDate: new Date(Date.now() - 5400000).toISOString(), ts: Math.floor((Date.now() - 5400000) / 1000) },
+                            { title: '新能源汽车销量再创新高 产业链迎来机遇', description: '最新数据显示国内新能源汽车渗透率突破40%，相关产业链公司股价上涨。', link: 'https://www.eastmoney.com', pubDate: new Date(Date.now() - 9000000).toISOString(), ts: Math.floor((Date.now() - 9000000) / 1000) }
                         ]
                     }
                 ]
@@ -616,30 +735,40 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             });
 
             updateSourceTabs();
-            renderNews();
+            showView();
+        }
+
+        // 与 data_shards.filter_counts 相同的统计，键为 all / region:<地区> / source:<来源>
+        function countItems(sources) {
+            const counts = { all: 0 };
+            sources.forEach(source => {
+                const count = source.items ? source.items.length : (source.itemCount || 0);
+                [`region:${source.region}`, `source:${source.name}`, 'all'].forEach(key => {
+                    counts[key] = (counts[key] || 0) + count;
+                });
+            });
+            return counts;
+        }
+
+        function filterKey() {
+            if (currentSource !== 'all') return `source:${currentSource}`;
+            if (currentRegion !== 'all') return `region:${currentRegion}`;
+            return 'all';
         }
 
         function updateUI() {
             if (!newsData) return;
 
-            // 统计数据
-            let totalNews = 0;
-            let intSources = 0, cnSources = 0;
-            let intNews = 0, cnNews = 0;
-            
-            newsData.sources.forEach(source => {
-                const count = source.items ? source.items.length : 0;
-                totalNews += count;
-                if (source.region === 'chinese') { cnSources++; cnNews += count; }
-                else { intSources++; intNews += count; }
-            });
+            // 统计数据：各筛选条件的条目数由构建时算好（counts），演示数据等没有时现场统计
+            if (!newsData.counts) newsData.counts = countItems(newsData.sources);
+            const counts = newsData.counts;
 
-            document.getElementById('total-news').textContent = totalNews;
-            document.getElementById('int-sources').textContent = intSources;
-            document.getElementById('cn-sources').textContent = cnSources;
-            document.getElementById('count-all').textContent = totalNews;
-            document.getElementById('count-international').textContent = intNews;
-            document.getElementById('count-chinese').textContent = cnNews;
+            document.getElementById('total-news').textContent = counts.all || 0;
+            document.getElementById('int-sources').textContent = newsData.sources.filter(s => s.region !== 'chinese').length;
+            document.getElementById('cn-sources').textContent = newsData.sources.filter(s => s.region === 'chinese').length;
+            document.getElementById('count-all').textContent = counts.all || 0;
+            document.getElementById('count-international').textContent = counts['region:international'] || 0;
+            document.getElementById('count-chinese').textContent = counts['region:chinese'] || 0;
 
             // 更新时间
             if (newsData.fetchTime) {
@@ -649,10 +778,66 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             }
 
             updateSourceTabs();
-            renderNews();
+            if (isPrerendered()) refreshTimes();
+            showView();
+        }
 
-            // 隐藏加载动画
-            document.getElementById('loading').classList.add('hidden');
+        // 分片按路径只请求一次，加载后把条目填回对应来源
+        const shardRequests = {};
+
+        function loadShard(path) {
+            if (!shardRequests[path]) {
+                shardRequests[path] = fetch(path)
+                    .then(response => {
+                        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                        return response.json();
+                    })
+                    .then(payload => {
+                        payload.sources.forEach(loaded => {
+                            const source = newsData.sources.find(s => s.name === loaded.name);
+                            if (source) source.items = loaded.items;
+                        });
+                    })
+                    .catch(e => {
+                        delete shardRequests[path];
+                        throw e;
+                    });
+            }
+            return shardRequests[path];
+        }
+
+        // 当前视图还缺的分片：选中单个来源时取来源分片，否则取所属地区的分片
+        function pendingShards() {
+            if (!window.newsManifest) return [];
+            const missing = newsData.sources.filter(s =>
+                !s.items &&
+                (currentRegion === 'all' || s.region === currentRegion) &&
+                (currentSource === 'all' || s.name === currentSource)
+            );
+            if (currentSource !== 'all') return missing.map(s => s.shard);
+            const regionShards = newsData.regionShards || {};
+            return [...new Set(missing.map(s => regionShards[s.region] || s.shard))];
+        }
+
+        // 渲染当前视图；每个分片到达后重新渲染（视图未切换时），先到的地区先显示
+        function showView() {
+            const paths = pendingShards();
+            if (paths.length === 0) {
+                renderNews();
+                return Promise.resolve();
+            }
+            const view = `${currentRegion}/${currentSource}`;
+            // 视图已切换或用户正在搜索时不覆盖当前结果
+            const stillShowing = () =>
+                `${currentRegion}/${currentSource}` === view && !document.getElementById('search-input').value;
+            return Promise.allSettled(paths.map(path => loadShard(path).then(() => {
+                if (stillShowing()) renderNews();
+            }))).then(results => {
+                if (results.some(r => r.status === 'rejected')) {
+                    console.log('Failed to load news shards');
+                    if (stillShowing()) renderNews();
+                }
+            });
         }
 
         function updateSourceTabs() {
@@ -669,7 +854,7 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
             allTab.onclick = () => {
                 currentSource = 'all';
                 updateSourceTabs();
-                renderNews();
+                showView();
             };
             container.appendChild(allTab);
 
@@ -677,73 +862,305 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                 const tab = document.createElement('button');
                 tab.className = 'source-tab' + (currentSource === source.name ? ' active' : '');
                 tab.textContent = source.name;
+                const health = source.health;
+                if (health && health.status !== 'ok') {
+                    tab.classList.add(health.status);
+                    tab.title = health.status === 'down'
+                        ? `暂停抓取（${health.lastError || '连续失败'}），${health.retryAt ? '将于 ' + new Date(health.retryAt).toLocaleString('zh-CN') + ' 重试' : '稍后重试'}`
+                        : `最近抓取失败：${health.lastError || '未知错误'}`;
+                }
+                if (source.stale) {
+                    tab.classList.add('stale');
+                    tab.title = (tab.title ? tab.title + '\\n' : '') +
+                        `本次未及时更新，显示的是 ${source.staleSince ? new Date(source.staleSince).toLocaleString('zh-CN') : '上次'} 抓取的内容`;
+                }
                 tab.onclick = () => {
                     currentSource = source.name;
                     updateSourceTabs();
-                    renderNews();
+                    showView();
                 };
                 container.appendChild(tab);
             });
         }
 
+        // 预渲染模式：卡片已由 generate_html.py 按时间排好序写进页面，切换筛选只改写一条 CSS 规则
+        function isPrerendered() {
+            return document.getElementById('news-grid').dataset.prerendered === '1';
+        }
+
+        function matchesView(source) {
+            return (currentRegion === 'all' || source.region === currentRegion) &&
+                (currentSource === 'all' || source.name === currentSource);
+        }
+
+        function applyFilter() {
+            const rules = [];
+            if (currentRegion !== 'all') {
+                rules.push(`#news-grid > .news-card:not([data-region="${CSS.escape(currentRegion)}"]) { display: none; }`);
+            }
+            if (currentSource !== 'all') {
+                rules.push(`#news-grid > .news-card:not([data-source="${CSS.escape(currentSource)}"]) { display: none; }`);
+            }
+            document.getElementById('filter-style').textContent = rules.join('\\n');
+            document.getElementById('empty-view').hidden = (newsData.counts[filterKey()] || 0) > 0;
+        }
+
+        // 预渲染卡片中的时间在加载时按当前时间换算为相对时间
+        function refreshTimes() {
+            document.querySelectorAll('#news-grid .news-time[data-ts]').forEach(el => {
+                el.textContent = formatTime(Number(el.dataset.ts));
+            });
+        }
+
         function renderNews() {
-            const grid = document.getElementById('news-grid');
-            grid.innerHTML = '';
+            // 切换标签时退出搜索
+            document.getElementById('search-input').value = '';
+            searchSeq++;
+            document.getElementById('search-grid').hidden = true;
+            document.getElementById('news-grid').hidden = false;
+
+            if (isPaged()) {
+                renderVirtual(true);
+            } else if (isPrerendered()) {
+                applyFilter();
+            } else {
+                const allItems = [];
+                newsData.sources.forEach(source => {
+                    if (!matchesView(source) || !source.items) return;
+                    source.items.forEach(item => allItems.push([item, source.name]));
+                });
+                // 按时间排序：ts 为抓取时统一换算的 UTC 秒级时间戳，比较整数即可
+                allItems.sort((a, b) => (b[0].ts || 0) - (a[0].ts || 0));
+                renderItems(allItems, 'news-grid');
+            }
+
+            // 首次渲染后隐藏加载动画（分片模式下首个分片到达即渲染）
+            document.getElementById('loading').classList.add('hidden');
+        }
 
-            let allItems = [];
+        function escapeHTML(text) {
+            return String(text ?? '').replace(/[&<>"']/g, ch => ({
+                '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'
+            })[ch]);
+        }
 
-            newsData.sources.forEach(source => {
-                if (currentRegion !== 'all' && source.region !== currentRegion) return;
-                if (currentSource !== 'all' && source.name !== currentSource) return;
+        // 只允许 http(s) 链接
+        function safeLink(link) {
+            return /^https?:\\/\\//i.test(link || '') ? escapeHTML(link) : '#';
+        }
+
+        // 卡片结构与 generate_html.py 中的 render_card 保持一致
+        function cardHTML(item, sourceName, style) {
+            const link = safeLink(item.link);
+            const alternates = item.alternates && item.alternates.length
+                ? `<p class="news-alternates">另见: ${item.alternates.map(alt => `<a href="${safeLink(alt.link)}" target="_blank" rel="noopener">${escapeHTML(alt.source)}</a>`).join(' · ')}</p>`
+                : '';
+            return `<div class="news-card"${style ? ` style="${style}"` : ''}>
+<div class="news-header">
+<span class="news-source">${escapeHTML(sourceName)}</span>
+<span class="news-time">${escapeHTML(formatTime(item.ts || item.pubDate))}</span>
+</div>
+<h3 class="news-title"><a href="${link}" target="_blank" rel="noopener">${escapeHTML(item.title)}</a></h3>
+${item.description ? `<p class="news-description">${escapeHTML(item.description)}</p>` : ''}
+${alternates}
+<div class="news-footer"><a href="${link}" target="_blank" rel="noopener" class="read-more">阅读全文 →</a></div>
+</div>`;
+        }
 
-                if (source.items) {
-                    source.items.forEach(item => {
-                        allItems.push({ ...item, sourceName: source.name, sourceRegion: source.region });
+        // entries 为 [条目, 来源名]，一次性写入 innerHTML
+        function renderItems(entries, gridId) {
+            document.getElementById(gridId).innerHTML =
+                entries.map(([item, sourceName]) => cardHTML(item, sourceName)).join('');
+            document.getElementById('empty-view').hidden = entries.length > 0;
+        }
+
+        // 分页模式：每个筛选条件的条目按时间切成固定大小的页（pages/），
+        // 虚拟滚动只为可见区域及上下少量缓冲行创建卡片，缺的页按需加载
+        const VIRTUAL_CARD_HEIGHT = 300;
+        const VIRTUAL_GAP = 20;
+        const VIRTUAL_MIN_COLUMN = 380;
+        const VIRTUAL_OVERSCAN_ROWS = 2;
+        const pageRequests = {};
+        const loadedPages = {};
+        let virtualRange = '';
+        let virtualFrame = 0;
+
+        function isPaged() {
+            return Boolean(window.newsPages);
+        }
+
+        function loadPage(path) {
+            if (!pageRequests[path]) {
+                pageRequests[path] = fetch(path)
+                    .then(response => {
+                        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                        return response.json();
+                    })
+                    .then(entries => { loadedPages[path] = entries; })
+                    .catch(e => {
+                        delete pageRequests[path];
+                        throw e;
                     });
+            }
+            return pageRequests[path];
+        }
+
+        function renderVirtual(reset) {
+            const grid = document.getElementById('news-grid');
+            const view = newsData.filters[filterKey()] || { count: 0, pages: [] };
+            grid.classList.add('virtual');
+            if (reset) {
+                virtualRange = '';
+                // 切换筛选时回到列表顶部，避免停留在新列表末尾之外
+                if (grid.getBoundingClientRect().top < 0) grid.scrollIntoView();
+            }
+
+            const width = grid.clientWidth;
+            const columns = window.innerWidth <= 768 ? 1
+                : Math.max(1, Math.floor((width + VIRTUAL_GAP) / (VIRTUAL_MIN_COLUMN + VIRTUAL_GAP)));
+            const columnWidth = (width - VIRTUAL_GAP * (columns - 1)) / columns;
+            const rowHeight = VIRTUAL_CARD_HEIGHT + VIRTUAL_GAP;
+            const rows = Math.ceil(view.count / columns);
+            grid.style.height = `${Math.max(0, rows * rowHeight - VIRTUAL_GAP)}px`;
+
+            // 可见行区间（相对网格顶部）
+            const offset = -grid.getBoundingClientRect().top;
+            const firstRow = Math.max(0, Math.floor(offset / rowHeight) - VIRTUAL_OVERSCAN_ROWS);
+            const lastRow = Math.min(rows, Math.ceil((offset + window.innerHeight) / rowHeight) + VIRTUAL_OVERSCAN_ROWS);
+            const first = firstRow * columns;
+            const last = Math.min(view.count, lastRow * columns);
+            const range = `${filterKey()}|${width}|${first}|${last}`;
+            if (range === virtualRange) return;
+
+            const cards = [];
+            const missing = new Set();
+            for (let i = first; i < last; i++) {
+                const path = view.pages[Math.floor(i / newsData.pageSize)];
+                const page = loadedPages[path];
+                if (!page) {
+                    missing.add(path);
+                    continue;
                 }
+                const [item, sourceName] = page[i % newsData.pageSize];
+                const top = Math.floor(i / columns) * rowHeight;
+                const left = (i % columns) * (columnWidth + VIRTUAL_GAP);
+                cards.push(cardHTML(item, sourceName, `top: ${top}px; left: ${left}px; width: ${columnWidth}px`));
+            }
+            grid.innerHTML = cards.join('');
+            document.getElementById('empty-view').hidden = view.count > 0;
+            // 有页未加载时不记录区间，页到达后重新渲染
+            virtualRange = missing.size ? '' : range;
+            missing.forEach(path => loadPage(path).then(scheduleVirtual, e => console.log('Failed to load page', path, e.message)));
+        }
+
+        function scheduleVirtual() {
+            if (!isPaged() || virtualFrame) return;
+            virtualFrame = requestAnimationFrame(() => {
+                virtualFrame = 0;
+                if (!document.getElementById('news-grid').hidden) renderVirtual(false);
             });
+        }
 
-            // 按时间排序
-            allItems.sort((a, b) => new Date(b.pubDate || 0) - new Date(a.pubDate || 0));
+        window.addEventListener('scroll', scheduleVirtual, { passive: true });
+        window.addEventListener('resize', scheduleVirtual);
+
+        // 全文检索：索引由 generate_html.py 预先生成在 search/ 下，按词首字符分片按需加载
+        const SEARCH_TOKEN_RE = /[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af]+|[0-9a-z\u00c0-\u024f]+/g;
+        const SEARCH_CJK_RE = /^[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af]/;
+        let searchManifest = null;
+        let searchDocs = null;
+        const searchShards = {};
+        let searchTimer = null;
+        let searchSeq = 0;
+
+        function searchTokenize(text) {
+            const tokens = [];
+            (text.toLowerCase().match(SEARCH_TOKEN_RE) || []).forEach(run => {
+                if (SEARCH_CJK_RE.test(run) && run.length > 1) {
+                    for (let i = 0; i < run.length - 1; i++) tokens.push(run.slice(i, i + 2));
+                } else {
+                    tokens.push(run);
+                }
+            });
+            return tokens;
+        }
 
-            if (allItems.length === 0) {
-                grid.innerHTML = `
-                    <div class="empty-state">
-                        <div class="empty-state-icon">📭</div>
-                        <p>暂无新闻数据</p>
-                    </div>
-                `;
-                return;
-            }
+        function searchShardKey(term) {
+            const code = term.charCodeAt(0);
+            if (code < 128) return term[0];
+            return 'u' + (code >> 8).toString(16).padStart(2, '0');
+        }
 
-            allItems.forEach(item => {
-                const card = document.createElement('div');
-                card.className = 'news-card';
+        async function loadSearchJSON(path, version) {
+            const response = await fetch(`search/${path}?v=${version}`);
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            return response.json();
+        }
 
-                const timeStr = item.pubDate ? formatTime(item.pubDate) : '';
+        function decodePostings(deltas) {
+            let current = 0;
+            return deltas.map(delta => (current += delta));
+        }
 
-                card.innerHTML = `
-                    <div class="news-header">
-                        <span class="news-source">${item.sourceName}</span>
-                        <span class="news-time">${timeStr}</span>
-                    </div>
-                    <h3 class="news-title">
-                        <a href="${item.link}" target="_blank" rel="noopener">${item.title}</a>
-                    </h3>
-                    ${item.description ? `<p class="news-description">${item.description}</p>` : ''}
-                    <div class="news-footer">
-                        <a href="${item.link}" target="_blank" rel="noopener" class="read-more">
-                            阅读全文 →
-                        </a>
-                    </div>
-                `;
-                grid.appendChild(card);
-            });
+        async function searchPostings(term) {
+            const key = searchShardKey(term);
+            if (!(key in searchManifest.shards)) return new Set();
+            if (!searchShards[key]) {
+                searchShards[key] = await loadSearchJSON(`shards/${key}.json`, searchManifest.shards[key]);
+            }
+            const shard = searchShards[key];
+            // 单个汉字：匹配所有以它开头的二元组
+            if (term.length === 1 && SEARCH_CJK_RE.test(term)) {
+                const ids = new Set();
+                Object.keys(shard).forEach(other => {
+                    if (other.startsWith(term)) decodePostings(shard[other]).forEach(id => ids.add(id));
+                });
+                return ids;
+            }
+            return new Set(decodePostings(shard[term] || []));
+        }
+
+        function onSearchInput(query) {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => runSearch(query), 200);
+        }
+
+        async function runSearch(query) {
+            const terms = [...new Set(searchTokenize(query))];
+            if (terms.length === 0) {
+                renderNews();
+                return;
+            }
+            const seq = ++searchSeq;
+            try {
+                if (!searchManifest) searchManifest = await loadSearchJSON('manifest.json', Date.now());
+                if (!searchDocs) searchDocs = await loadSearchJSON('docs.json', searchManifest.docs);
+                const sets = await Promise.all(terms.map(searchPostings));
+                if (seq !== searchSeq) return;  // 已有更新的查询
+
+                sets.sort((a, b) => a.size - b.size);
+                let result = sets[0];
+                sets.slice(1).forEach(set => {
+                    result = new Set([...result].filter(id => set.has(id)));
+                });
+                document.getElementById('news-grid').hidden = true;
+                document.getElementById('search-grid').hidden = false;
+                // 与卡片列表一致按 ts 从新到旧，没有 ts 的排在最后
+                const newest = id => searchDocs[id][4] ?? -Infinity;
+                renderItems([...result].sort((a, b) => newest(b) - newest(a) || a - b).map(id => {
+                    const [title, link, sourceName, pubDate, ts] = searchDocs[id];
+                    return [{ title, link, pubDate, ts }, sourceName];
+                }), 'search-grid');
+            } catch (e) {
+                console.log('Search index not available:', e.message);
+            }
         }
 
-        function formatTime(dateStr) {
+        // 接受秒级时间戳或日期字符串（没有 ts 的条目退回 pubDate）
+        function formatTime(value) {
+            if (!value) return '';
             try {
-                const date = new Date(dateStr);
+                const date = new Date(typeof value === 'number' ? value * 1000 : value);
                 const now = new Date();
                 const diff = now - date;
 
@@ -755,7 +1172,7 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                     return date.toLocaleDateString('zh-CN', { month: 'short', day: 'numeric' });
                 }
             } catch {
-                return dateStr;
+                return value;
             }
         }
 
@@ -766,36 +1183,271 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
 </html>'''
 
 
-def generate_html_with_data(data_file, output_file):
-    """生成包含内嵌数据的 HTML"""
-    
-    # 读取新闻数据
-    with open(data_file, 'r', encoding='utf-8') as f:
-        news_data = f.read()
-    
+def script_json(data):
+    """可安全内嵌进 <script> 的 JSON：转义 </，避免条目中的 </script> 提前结束脚本"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+def safe_link(link):
+    """只保留 http(s) 链接，其余（如 javascript:）替换为 #"""
+    link = (link or '').strip()
+    return escape(link) if link.lower().startswith(('http://', 'https://')) else '#'
+
+def render_card(item, source):
+    """单条新闻卡片（转义后的 HTML），结构与页面 JS 中的 cardHTML 保持一致
+
+    data-region / data-source 供页面按筛选条件切换显示；时间先写入北京时间，
+    页面加载后按 data-ts 换算为相对时间
+    """
+    link = safe_link(item.get('link'))
+    ts = item.get('ts')
+    time_text = datetime.fromtimestamp(ts, CST).strftime('%m-%d %H:%M') if isinstance(ts, int) else ''
+    time_attr = f' data-ts="{ts}"' if isinstance(ts, int) else ''
+    description = item.get('description')
+    alternates = item.get('alternates') or []
+    parts = [
+        f'<div class="news-card" data-region="{escape(source.get("region", "international"))}" '
+        f'data-source="{escape(source.get("name", ""))}"{time_attr}>',
+        '<div class="news-header">',
+        f'<span class="news-source">{escape(source.get("name", ""))}</span>',
+        f'<span class="news-time"{time_attr}>{time_text}</span>',
+        '</div>',
+        f'<h3 class="news-title"><a href="{link}" target="_blank" rel="noopener">{escape(item.get("title", ""))}</a></h3>',
+    ]
+    if description:
+        parts.append(f'<p class="news-description">{escape(description)}</p>')
+    if alternates:
+        links = ' · '.join(f'<a href="{safe_link(alt.get("link"))}" target="_blank" rel="noopener">'
+                           f'{escape(alt.get("source", ""))}</a>' for alt in alternates)
+        parts.append(f'<p class="news-alternates">另见: {links}</p>')
+    parts.append(f'<div class="news-footer"><a href="{link}" target="_blank" rel="noopener" class="read-more">阅读全文 →</a></div>')
+    parts.append('</div>')
+    return '\n'.join(parts)
+
+def render_cards(news_data):
+    """按时间全局排序后的全部卡片 HTML"""
+    return '\n'.join(render_card(item, source) for item, source in sorted_entries(news_data))
+
+def render_html(news_data, prerender=True):
+    """把新闻数据写进模板，返回完整 HTML
+
+    prerender 时卡片在构建时渲染进 #news-grid，只内嵌去掉条目的来源清单（供统计和来源标签使用）；
+    否则内嵌完整数据，由页面脚本渲染
+    """
+    if prerender:
+        embedded = strip_items(news_data)
+        grid = f'<div class="news-grid" id="news-grid" data-prerendered="1">\n{render_cards(news_data)}\n</div>'
+    else:
+        embedded = news_data
+        grid = '<div class="news-grid" id="news-grid"></div>'
     # 创建内嵌数据的脚本
     embedded_script = f'''
     <script>
         // 内嵌的新闻数据（自动生成，解决 CORS 限制）
-        window.embeddedNewsData = {news_data};
+        window.embeddedNewsData = {script_json(embedded)};
     </script>
     '''
     
     # 在 </head> 前插入数据脚本
-    html_content = HTML_TEMPLATE.replace('</head>', embedded_script + '\n</head>')
-    
-    # 写入输出文件
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    
-    print(f"✅ Generated: {output_file}")
+    page = HTML_TEMPLATE.replace('</head>', embedded_script + '\n</head>')
+    return page.replace('<div class="news-grid" id="news-grid"></div>', grid, 1)
+
+def render_shell(manifest, variable='newsManifest'):
+    """分片/分页模式的页面外壳：只内嵌来源清单和数据文件名
+
+    分片模式的清单为 window.newsManifest，分页模式为 window.newsPages
+    """
+    embedded_script = f'''
+    <script>
+        // 新闻数据清单（自动生成），条目在 news/ 分片或 pages/ 分页中按需加载
+        window.{variable} = {script_json(manifest)};
+    </script>
+    '''
+    return HTML_TEMPLATE.replace('</head>', embedded_script + '\n</head>')
+
+def print_size_report(rows):
+    """打印 (名称, 原始字节数, gzip 字节数) 表格"""
+    print("   📐 Size report:             raw        gzip")
+    for label, raw, gz in rows:
+        print(f"      {label:<22} {raw / 1024:8.1f} KB {gz / 1024:8.1f} KB")
+
+def _gzip_size(data):
+    return len(gzip.compress(data, compresslevel=9, mtime=0))
+
+def shards_size_report(inline_html, shell_html, manifest, shard_dir):
+    """对比内嵌模式和分片模式首屏需要下载的体积（默认视图为全部地区）"""
+    def sizes(data):
+        return len(data), _gzip_size(data)
+
+    def shard_sizes(path):
+        with open(os.path.join(shard_dir, os.path.basename(path)), 'rb') as f:
+            return sizes(f.read())
+
+    shell = sizes(shell_html.encode('utf-8'))
+    rows = [('inline page',) + sizes(inline_html.encode('utf-8')), ('shell page',) + shell]
+    regions = [(region, shard_sizes(path)) for region, path in manifest['regionShards'].items()]
+    for region, (raw, gz) in regions:
+        rows.append((f'+ {region} shard', raw, gz))
+    if regions:
+        # 首个地区分片到达即可首次渲染
+        first = regions[0][1]
+        rows.append(('first paint', shell[0] + first[0], shell[1] + first[1]))
+    rows.append(('default view total', shell[0] + sum(r for _, (r, _g) in regions),
+                 shell[1] + sum(g for _, (_r, g) in regions)))
+    source_sizes = [shard_sizes(s['shard']) for s in manifest['sources']]
+    if source_sizes:
+        rows.append(('largest source shard', max(r for r, _ in source_sizes), max(g for _, g in source_sizes)))
+    print_size_report(rows)
+
+def generate_html_with_data(data_file, output_file, build_search=True, force=False, check=False, mode='inline',
+                            compress=True, page_size=PAGE_SIZE):
+    """生成 HTML，并在输出目录下生成 search/ 检索索引
+
+    mode 为 inline 时把全部数据内嵌进页面；为 shards 时页面只内嵌来源清单，
+    条目按地区和来源拆成 news/ 下带内容哈希的分片，由页面按当前视图加载；
+    为 paged 时每个筛选条件的条目按时间切成 page_size 条一页写入 pages/，页面虚拟滚动并按需加载。
+    compress 时 HTML 去掉缩进和注释，并为页面、news_data.json 和各 JSON 分片写出 .gz / .br 预压缩文件。
+    输出目录的 .build_manifest.json 记录每个产物的输入哈希（规范化新闻集合、模板、索引器、输出模式），
+    输入未变化的产物直接跳过；force 时全部重建；check 时只报告哪些产物需要重建。
+    返回需要重建（check）或已重建的产物名列表
+    """
     
-    # 统计信息
+    # 读取新闻数据
+    with open(data_file, 'r', encoding='utf-8') as f:
+        news_data = f.read()
     data = json.loads(news_data)
+
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    manifest = BuildManifest(output_dir)
+    articles = articles_hash(data)
     total = sum(s.get('itemCount', 0) for s in data.get('sources', []))
-    print(f"   📰 {total} articles embedded")
+    # (产物, 原始, 压缩后, gzip, brotli) 字节数
+    size_rows = []
+
+    def write_page(html):
+        """写出页面；compress 时写入压缩后的 HTML 并生成预压缩文件，返回实际写入的内容"""
+        content = minify_html(html) if compress else html
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+        if compress:
+            gz, br = write_precompressed(output_file, content)
+            size_rows.append((os.path.basename(output_file), len(html.encode('utf-8')),
+                              len(content.encode('utf-8')), gz, br))
+        else:
+            remove_precompressed(output_file)
+        return content
+
+    def tree_row(directory, label):
+        count, raw, gz, br = precompress_tree(directory, compress)
+        if count:
+            size_rows.append((f'{label}/ ({count} files)', raw, raw, gz, br))
+
+    def build_page():
+        # 写入输出文件
+        write_page(render_html(data))
+        print(f"✅ Generated: {output_file}")
+        print(f"   📰 {total} articles prerendered")
+
+    def build_sharded_page():
+        shard_manifest, sizes = write_shards(data, output_dir)
+        shell = write_page(render_shell(shard_manifest))
+        inline = render_html(data)
+        print(f"✅ Generated: {output_file} (shell)")
+        print(f"   📰 {total} articles in {len(sizes)} shards under {data_shards.SHARD_DIR}/")
+        shard_dir = os.path.join(output_dir, data_shards.SHARD_DIR)
+        shards_size_report(minify_html(inline) if compress else inline, shell, shard_manifest, shard_dir)
+        tree_row(shard_dir, data_shards.SHARD_DIR)
+
+    def build_paged_page():
+        page_manifest, sizes = write_pages(data, output_dir, page_size)
+        write_page(render_shell(page_manifest, 'newsPages'))
+        print(f"✅ Generated: {output_file} (shell)")
+        print(f"   📰 {total} articles in {len(sizes)} pages of {page_size} "
+              f"across {len(page_manifest['filters'])} filters under {data_shards.PAGE_DIR}/")
+        tree_row(os.path.join(output_dir, data_shards.PAGE_DIR), data_shards.PAGE_DIR)
+
+    def build_data_file():
+        # news_data.json 由 fetch_news.py 写出，这里只生成预压缩文件
+        raw = len(json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+        gz, br = write_precompressed(data_file, news_data)
+        size_rows.append((os.path.basename(data_file), raw, len(news_data.encode('utf-8')), gz, br))
+
+    def build_search_index():
+        search_dir = os.path.join(output_dir, 'search')
+        stats = write_index(data, search_dir)
+        print(f"   🔍 Search index: {stats['docs']} docs, {stats['terms']} terms in {stats['shards']} shards "
+              f"({stats['shardBytes'] / 1024:.1f} KB postings, {stats['docsBytes'] / 1024:.1f} KB docs)")
+        tree_row(search_dir, 'search')
+
+    # (产物名, 输入哈希, 构建函数)
+    # 压缩方式变化（开关或压缩代码本身）时所有产物都要重建
+    compressor = text_hash(inspect.getsource(precompress)) if compress else 'off'
+    page_inputs = {'articles': articles, 'template': text_hash(HTML_TEMPLATE), 'mode': mode,
+                   'compressor': compressor}
+    if mode == 'shards':
+        page_inputs['sharder'] = text_hash(inspect.getsource(data_shards))
+        targets = [(os.path.basename(output_file), page_inputs, build_sharded_page)]
+    elif mode == 'paged':
+        page_inputs['sharder'] = text_hash(inspect.getsource(data_shards))
+        page_inputs['pageSize'] = page_size
+        targets = [(os.path.basename(output_file), page_inputs, build_paged_page)]
+    else:
+        targets = [(os.path.basename(output_file), page_inputs, build_page)]
+    if compress:
+        # 预压缩文件必须与 news_data.json 逐字节对应，因此以文件内容哈希为输入
+        targets.append((os.path.basename(data_file) + '.gz', {'data': text_hash(news_data), 'compressor': compressor},
+                        build_data_file))
+    else:
+        remove_precompressed(data_file)
+    if build_search:
+        targets.append(('search', {'articles': articles, 'indexer': text_hash(inspect.getsource(search_index)),
+                                   'compressor': compressor}, build_search_index))
+
+    rebuilt = []
+    for name, inputs, build in targets:
+        if check:
+            stale = manifest.stale_inputs(name, inputs)
+            if stale is None:
+                print(f"🔁 {name}: would build (output missing)")
+                rebuilt.append(name)
+            elif stale:
+                print(f"🔁 {name}: would rebuild ({', '.join(stale)} changed)")
+                rebuilt.append(name)
+            else:
+                print(f"✔️  {name}: up to date")
+            continue
+        if not force and manifest.is_fresh(name, inputs):
+            print(f"⏭️  {name}: inputs unchanged, skipped")
+            continue
+        build()
+        manifest.record(name, inputs)
+        rebuilt.append(name)
+
+    if not check:
+        manifest.save()
+        if size_rows:
+            print_size_table(size_rows)
+    return rebuilt
 
 def main():
+    parser = argparse.ArgumentParser(description='生成内嵌新闻数据的 index.html')
+    parser.add_argument('--no-search', action='store_true', help='不生成 search/ 检索索引')
+    parser.add_argument('--force', action='store_true', help='忽略构建清单，重建所有产物')
+    parser.add_argument('--check', action='store_true', help='只报告哪些产物需要重建，有需要时以状态 1 退出')
+    parser.add_argument('--no-compress', action='store_true', help='不压缩 HTML，也不生成 .gz / .br 预压缩文件')
+    parser.add_argument('--mode', choices=OUTPUT_MODES, default='inline',
+                        help='inline: 卡片预渲染进页面；shards: 页面外壳 + news/ 下按地区/来源的数据分片；'
+                             'paged: 页面外壳 + pages/ 下按筛选条件分页的数据，虚拟滚动')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help=f'paged 模式每页条数（默认 {PAGE_SIZE}）')
+    parser.add_argument('--profile', action='store_true',
+                        help='剖析本次构建的 CPU 耗时，在 index.html 旁写出 generate_html.{prof,collapsed}'
+                             '（产物未变化时几乎没有工作，可配合 --force）')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='用 tracemalloc 剖析本次构建的内存分配，写出 generate_html.alloc.txt'
+                             '（不能与 --profile 同时使用）')
+    args = parser.parse_args()
+    if args.profile and args.profile_memory:
+        parser.error('--profile and --profile-memory must be run as separate passes')
+
     # 脚本所在目录
     script_dir = os.path.dirname(os.path.abspath(__file__))
     repo_dir = os.path.dirname(script_dir)
@@ -808,7 +1460,17 @@ def main():
         print("   Please run fetch_news.py first")
         sys.exit(1)
     
-    generate_html_with_data(data_file, output_file)
+    if args.profile or args.profile_memory:
+        profiler = RunProfiler(os.path.dirname(output_file), 'generate_html',
+                               mode='memory' if args.profile_memory else 'cpu')
+    else:
+        profiler = contextlib.nullcontext()
+    with profiler:
+        rebuilt = generate_html_with_data(data_file, output_file, build_search=not args.no_search,
+                                          force=args.force, check=args.check, mode=args.mode,
+                                          compress=not args.no_compress, page_size=args.page_size)
+    if args.check and rebuilt:
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
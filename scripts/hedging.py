@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+对冲请求
+源在历史 p90 耗时内还没有返回时再发一个相同的请求，取先成功的那个，另一个随即取消；
+全局预算限制对冲请求占主请求的比例，避免慢的时候反而把负载翻倍
+"""
+
+import queue
+import threading
+import time
+
+DEFAULT_HEDGE_RATIO = 0.1
+# 启动阶段主请求还很少时也允许少量对冲
+DEFAULT_HEDGE_BURST = 2
+HEDGE_QUANTILE = 0.9
+
+
+class HedgeBudget:
+    """全局对冲预算与统计（线程安全）：对冲数不超过 主请求数 * ratio + burst"""
+
+    def __init__(self, ratio=DEFAULT_HEDGE_RATIO, burst=DEFAULT_HEDGE_BURST):
+        self.ratio = max(0.0, ratio)
+        self.burst = max(0, burst)
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def try_acquire(self):
+        """申请一次对冲额度，预算用完时返回 False"""
+        with self._lock:
+            if self.hedges + 1 > self.requests * self.ratio + self.burst:
+                self.denied += 1
+                return False
+            self.hedges += 1
+            return True
+
+    def record_win(self):
+        with self._lock:
+            self.wins += 1
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'hedges': self.hedges, 'wins': self.wins, 'denied': self.denied}
+
+
+def hedged_call(attempt, delay, budget, succeeded=lambda result: result is not None):
+    """执行 attempt(cancel)，delay 秒后仍未返回且预算允许时再执行一次，返回 (结果, 对冲状态)
+
+    attempt 在独立线程中运行，cancel 为 threading.Event，被设置后 attempt 应尽快放弃；
+    先成功的结果胜出，两个都失败时返回后完成的那个。
+    对冲状态：None（没有对冲）、'lost'（主请求先成功或都失败）、'won'（对冲请求先成功）
+    """
+    results = queue.Queue()
+    cancels = []
+
+    def launch(index):
+        cancel = threading.Event()
+        cancels.append(cancel)
+        threading.Thread(target=lambda: results.put((index, attempt(cancel))), daemon=True).start()
+
+    budget.record_request()
+    launch(0)
+    pending = 1
+    hedge_at = time.monotonic() + delay
+    decided = False
+    while True:
+        try:
+            index, result = results.get(timeout=None if decided else max(0.0, hedge_at - time.monotonic()))
+        except queue.Empty:
+            decided = True
+            if budget.try_acquire():
+                launch(1)
+                pending += 1
+            continue
+        pending -= 1
+        # 主请求在对冲前就失败时不再对冲，交给熔断统计
+        decided = True
+        if succeeded(result) or pending == 0:
+            for cancel in cancels:
+                cancel.set()
+            if len(cancels) == 1:
+                return result, None
+            won = index == 1 and succeeded(result)
+            if won:
+                budget.record_win()
+            return result, 'won' if won else 'lost'
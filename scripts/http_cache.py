@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+HTTP 条件请求缓存
+按源 URL 持久化 ETag / Last-Modified 以及上次解析出的新闻条目，
+源返回 304 Not Modified 时直接复用，跳过下载和解析
+"""
+
+import json
+import os
+import threading
+
+
+class HttpCache:
+    """基于磁盘 JSON 文件的 HTTP 校验器缓存（线程安全）"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('entries', {})
+            except (OSError, ValueError) as e:
+                # 缓存损坏时从空缓存开始，不影响抓取
+                print(f"Ignoring unreadable HTTP cache {path}: {e}")
+                self.entries = {}
+
+    def conditional_headers(self, url):
+        """返回该 URL 的条件请求头"""
+        with self._lock:
+            entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('lastModified'):
+                headers['If-Modified-Since'] = entry['lastModified']
+        return headers
+
+    def cached_items(self, url):
+        """304 命中时返回上次解析的条目并计数，无缓存时返回 None"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            self.hits += 1
+            return entry.get('items', [])
+
+    def update(self, url, headers, items):
+        """记录一次完整下载的结果；没有校验器的响应不缓存"""
+        etag = headers.get('ETag') or headers.get('Etag')
+        last_modified = headers.get('Last-Modified')
+        with self._lock:
+            self.misses += 1
+            if not etag and not last_modified:
+                if self.entries.pop(url, None) is not None:
+                    self._dirty = True
+                return
+            self.entries[url] = {
+                'etag': etag,
+                'lastModified': last_modified,
+                'items': items
+            }
+            self._dirty = True
+
+    def record_miss(self):
+        """记录一次未命中（请求失败等情况）"""
+        with self._lock:
+            self.misses += 1
+
+    def save(self):
+        """原子写回磁盘，内容未变化时不写"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self.entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+带连接池的 HTTP 客户端
+按 host 复用 keep-alive 连接，支持 gzip/deflate 传输压缩，
+并限制每个 host 的并发连接数；每个响应分阶段记录耗时（DNS、TCP 连接、TLS、首字节、下载、解压）
+"""
+
+import http.client
+import socket
+import ssl
+import threading
+import time
+import zlib
+from urllib.parse import urljoin, urlsplit
+
+READ_CHUNK_SIZE = 64 * 1024
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+# 复用的连接可能已被服务端关闭，这些异常出现时换新连接重试一次
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class HTTPStatusError(Exception):
+    """非 2xx / 304 的响应"""
+
+    def __init__(self, url, status, reason):
+        super().__init__(f"HTTP Error {status}: {reason}")
+        self.url = url
+        self.status = status
+        self.reason = reason
+
+
+# PooledResponse.timings 中的阶段，单位秒；复用连接时前三项为 0，重定向各跳累加
+TIMING_PHASES = ('dns', 'connect', 'tls', 'ttfb', 'download', 'decode')
+
+
+class _TimedConnectionMixin:
+    """建立连接时分别记录 DNS 解析、TCP 连接和 TLS 握手的耗时，保存在 phase_times 中"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.phase_times = {}
+        # HTTPConnection 在实例上保存 socket.create_connection，这里换成分阶段计时的版本
+        self._create_connection = self._timed_create_connection
+
+    def connect(self):
+        self.phase_times = {}
+        started = time.monotonic()
+        super().connect()
+        if isinstance(self, http.client.HTTPSConnection):
+            tcp = self.phase_times.get('dns', 0.0) + self.phase_times.get('connect', 0.0)
+            self.phase_times['tls'] = max(0.0, time.monotonic() - started - tcp)
+
+    def _timed_create_connection(self, address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+        host, port = address
+        started = time.monotonic()
+        addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        resolved = time.monotonic()
+        self.phase_times['dns'] = resolved - started
+        error = None
+        for family, socktype, proto, _, sockaddr in addresses:
+            sock = socket.socket(family, socktype, proto)
+            try:
+                if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(sockaddr)
+            except OSError as e:
+                error = e
+                sock.close()
+                continue
+            self.phase_times['connect'] = time.monotonic() - resolved
+            return sock
+        raise error or OSError(f'getaddrinfo returned no addresses for {host}')
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, http.client.HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, http.client.HTTPSConnection):
+    pass
+
+
+class _Decoder:
+    """按 Content-Encoding 增量解压响应体"""
+
+    def __init__(self, encoding):
+        encoding = (encoding or '').strip().lower()
+        self.encoding = encoding
+        if encoding in ('gzip', 'x-gzip'):
+            self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            # 部分服务器发送不带 zlib 头的原始 deflate，首块失败时再切换
+            self._obj = zlib.decompressobj()
+        else:
+            self._obj = None
+        self._first = True
+
+    def decompress(self, data, max_length=READ_CHUNK_SIZE):
+        """解压一块数据，按 max_length 分段产出，避免高压缩比内容一次性膨胀"""
+        if self._obj is None:
+            if data:
+                yield data
+            return
+        try:
+            out = self._obj.decompress(data, max_length)
+        except zlib.error:
+            if not (self._first and self.encoding == 'deflate'):
+                raise
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            out = self._obj.decompress(data, max_length)
+        self._first = False
+        while True:
+            if out:
+                yield out
+            tail = self._obj.unconsumed_tail
+            if not tail:
+                break
+            out = self._obj.decompress(tail, max_length)
+
+    def flush(self):
+        return self._obj.flush() if self._obj is not None else b''
+
+
+class PooledResponse:
+    """连接池返回的响应，body 以解压后的分块形式读取"""
+
+    def __init__(self, pool, key, conn, response, url, deadline, timings):
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self.url = url
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.timings = timings
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self._deadline = deadline
+        self._decoder = _Decoder(response.headers.get('Content-Encoding'))
+        self._finished = False
+
+    def iter_content(self, chunk_size=READ_CHUNK_SIZE):
+        """逐块读取并解压 body，每块之前检查截止时间
+
+        读取与解压的耗时分别计入 timings 的 download / decode，调用方处理各块的时间不计入
+        """
+        timings = self.timings
+        while not self._finished:
+            self._apply_deadline()
+            started = time.monotonic()
+            data = self._response.read(chunk_size)
+            timings['download'] += time.monotonic() - started
+            if not data:
+                self._finished = True
+                started = time.monotonic()
+                tail = self._decoder.flush()
+                timings['decode'] += time.monotonic() - started
+                if tail:
+                    self._account(0, tail)
+                    yield tail
+                break
+            self._account(len(data), b'')
+            pieces = self._decoder.decompress(data, chunk_size)
+            while True:
+                started = time.monotonic()
+                decoded = next(pieces, None)
+                timings['decode'] += time.monotonic() - started
+                if decoded is None:
+                    break
+                self._account(0, decoded)
+                yield decoded
+
+    def read(self):
+        """读取完整 body（已解压）"""
+        return b''.join(self.iter_content())
+
+    def close(self):
+        """归还连接；body 未读完或服务端要求关闭时直接断开"""
+        if self._conn is None:
+            return
+        reusable = self._finished and not self._response.will_close
+        self._pool._release(self._key, self._conn, reusable)
+        self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _apply_deadline(self):
+        remaining = self._deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError('deadline exceeded while reading body')
+        if self._conn.sock is not None:
+            self._conn.sock.settimeout(remaining)
+
+    def _account(self, wire, decoded):
+        self.wire_bytes += wire
+        self.decoded_bytes += len(decoded)
+        self._pool._record_transfer(wire, len(decoded))
+
+
+class ConnectionPool:
+    """按 (scheme, host, port) 维护空闲 keep-alive 连接的连接池（线程安全）"""
+
+    def __init__(self, max_per_host=4, ssl_context=None):
+        self.max_per_host = max(1, max_per_host)
+        # 跟随全局的 SSL 设置，整个池共享一个 context
+        self.ssl_context = ssl_context or ssl._create_default_https_context()
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self._idle = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def open(self, url, headers=None, timeout=10, deadline=None):
+        """发送 GET 请求并跟随重定向，返回 PooledResponse（需调用 close 或用 with）"""
+        if deadline is None:
+            deadline = time.monotonic() + timeout
+        headers = dict(headers or {})
+        headers.setdefault('Accept-Encoding', 'gzip, deflate')
+        timings = dict.fromkeys(TIMING_PHASES, 0.0)
+
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._request(url, headers, timeout, deadline, timings)
+            location = response.headers.get('Location')
+            if response.status not in REDIRECT_STATUSES or not location:
+                return response
+            # 读完重定向响应体以便复用连接
+            with response:
+                for _chunk in response.iter_content():
+                    pass
+            url = urljoin(url, location)
+        raise HTTPStatusError(url, 310, 'Too many redirects')
+
+    def stats(self):
+        """返回连接与流量统计"""
+        with self._lock:
+            return {
+                'connectionsOpened': self.connections_opened,
+                'connectionsReused': self.connections_reused,
+                'wireBytes': self.wire_bytes,
+                'decodedBytes': self.decoded_bytes
+            }
+
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _request(self, url, headers, timeout, deadline, timings):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        slot = self._slot(key)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not slot.acquire(timeout=remaining):
+            raise TimeoutError('deadline exceeded waiting for a connection')
+
+        try:
+            while True:
+                conn, reused = self._checkout(key, min(timeout, deadline - time.monotonic()))
+                try:
+                    conn.timeout = max(0.01, min(timeout, deadline - time.monotonic()))
+                    if conn.sock is not None:
+                        conn.sock.settimeout(conn.timeout)
+                    sent = time.monotonic()
+                    conn.request('GET', path, headers=headers)
+                    response = conn.getresponse()
+                    # request() 在需要时先建立连接，首字节耗时扣除建连的各阶段
+                    elapsed = time.monotonic() - sent
+                    phases = conn.phase_times if not reused else {}
+                    for phase in ('dns', 'connect', 'tls'):
+                        timings[phase] += phases.get(phase, 0.0)
+                    timings['ttfb'] += max(0.0, elapsed - sum(phases.values()))
+                    break
+                except _STALE_CONNECTION_ERRORS:
+                    conn.close()
+                    if not reused:
+                        raise
+                except BaseException:
+                    # 超时、TLS 与 DNS 错误等：连接状态未知，关闭后不再放回连接池
+                    conn.close()
+                    raise
+        except BaseException:
+            slot.release()
+            raise
+
+        if reused:
+            with self._lock:
+                self.connections_reused += 1
+        return PooledResponse(self, key, conn, response, url, deadline, timings)
+
+    def _slot(self, key):
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def _checkout(self, key, timeout):
+        """取一个空闲连接，没有则新建；返回 (conn, 是否复用)"""
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                return conns.pop(), True
+            self.connections_opened += 1
+        scheme, host, port = key
+        timeout = max(0.01, timeout)
+        if scheme == 'https':
+            conn = _TimedHTTPSConnection(host, port, timeout=timeout, context=self.ssl_context)
+        else:
+            conn = _TimedHTTPConnection(host, port, timeout=timeout)
+        return conn, False
+
+    def _release(self, key, conn, reusable):
+        try:
+            if reusable:
+                with self._lock:
+                    self._idle.setdefault(key, []).append(conn)
+            else:
+                conn.close()
+        finally:
+            self._slot(key).release()
+
+    def _record_transfer(self, wire, decoded):
+        with self._lock:
+            self.wire_bytes += wire
+            self.decoded_bytes += decoded
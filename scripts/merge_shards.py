@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+合并分片抓取结果
+把 fetch_news.py --shard i/N 写出的部分快照 k 路归并为 news_data.json：
+各来源保留最新的 MAX_ITEMS_PER_SOURCE 条，之后跨来源去重；
+不属于本轮（runId 不同，或没有 runId 时 fetchTime 太旧）的部分快照被丢弃，
+缺失分片的来源沿用上一次 news_data.json 中的条目并标记 stale
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+from dedupe import DEFAULT_MAX_DISTANCE
+from fetch_news import MAX_ITEMS_PER_SOURCE, assemble_news, load_previous_snapshot, write_news_data
+from sharding import PARTIAL_DIR_NAME, RUN_ID_ENV, current_partials, default_run_id, merge_partials
+
+
+def carry_over_missing(sources, previous):
+    """上一次快照里有、但本次没有任何分片提供的来源，沿用旧条目并标记 stale，返回沿用的源数"""
+    if not previous:
+        return 0
+    present = {source['name'] for source in sources}
+    carried = 0
+    for old in previous.get('sources', []):
+        if old.get('name') in present or not old.get('items'):
+            continue
+        items = [{k: v for k, v in item.items() if k != 'alternates'} for item in old['items']]
+        sources.append(dict(old, items=items, itemCount=len(items), stale=True,
+                            staleSince=old.get('staleSince') or previous.get('fetchTime')))
+        carried += 1
+    return carried
+
+
+def merge_shards(output_dir, paths=None, dedupe_distance=DEFAULT_MAX_DISTANCE, run_id=None):
+    """合并 paths（默认 <output_dir>/partials/shard-*.jsonl）中属于本轮 run_id 的部分快照并写出 news_data.json，
+    返回 news_data（run_id 为 None 时见 sharding.current_partials）
+    """
+    if paths is None:
+        paths = sorted(glob.glob(os.path.join(output_dir or '.', PARTIAL_DIR_NAME, 'shard-*.jsonl')))
+    if not paths:
+        raise FileNotFoundError(f"no partial snapshots under {os.path.join(output_dir or '.', PARTIAL_DIR_NAME)}")
+
+    started = time.monotonic()
+    paths, rejected = current_partials(paths, run_id)
+    if not paths:
+        raise ValueError(f"no partial snapshots from run {run_id}")
+    sources, fetch_time, missing = merge_partials(paths, MAX_ITEMS_PER_SOURCE)
+    carried = carry_over_missing(sources, load_previous_snapshot(output_dir))
+    all_news, duplicates = assemble_news(sources, dedupe_distance)
+    output_file, unchanged = write_news_data(all_news, output_dir)
+
+    if unchanged:
+        print(f"✅ No article changes, kept {output_file}")
+    else:
+        print(f"✅ Merged {len(paths)} partials into {output_file}")
+    print(f"   📰 Total: {sum(s['itemCount'] for s in all_news['sources'])} articles "
+          f"from {len(all_news['sources'])} sources (latest shard fetch {fetch_time})")
+    if rejected:
+        print(f"   🗑️  Ignored {len(rejected)} partials from another run: "
+              f"{', '.join(os.path.basename(path) for path in rejected)}")
+    if missing:
+        print(f"   ⚠️  Missing shards: {', '.join(map(str, missing))}; {carried} sources carried over as stale")
+    if dedupe_distance >= 0:
+        print(f"   🧬 Dedupe: {duplicates} near-duplicates collapsed")
+    print(f"   ⏱️  Elapsed: {time.monotonic() - started:.1f}s")
+    return all_news
+
+
+def main():
+    parser = argparse.ArgumentParser(description='把分片抓取的部分快照合并为 news_data.json')
+    parser.add_argument('output_dir', nargs='?', default='.', help='输出目录（默认当前目录）')
+    parser.add_argument('partials', nargs='*',
+                        help=f'部分快照文件（默认 <output_dir>/{PARTIAL_DIR_NAME}/shard-*.jsonl）')
+    parser.add_argument('--dedupe-distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                        help=f'判定近似重复的 SimHash 汉明距离上限（默认 {DEFAULT_MAX_DISTANCE}，-1 关闭去重）')
+    parser.add_argument('--run-id', default=default_run_id(),
+                        help=f'只合并该轮抓取的部分快照（默认取环境变量 {RUN_ID_ENV}，'
+                             '都没有时以最新的部分快照为准）')
+    args = parser.parse_args()
+    try:
+        merge_shards(args.output_dir, args.partials or None, dedupe_distance=args.dedupe_distance,
+                     run_id=args.run_id)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
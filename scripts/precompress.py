@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+构建产物的压缩与预压缩
+HTML 去掉缩进、空行和整行注释，JSON 使用紧凑分隔符；
+并在产物旁写出最高压缩级别的 .gz / .br 文件，静态托管可直接返回预压缩版本。
+brotli 为可选依赖，未安装时只生成 .gz
+"""
+
+import gzip
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 原样保留的块（其中的空白有意义）
+PRESERVE_RE = re.compile(r'(<(pre|textarea)\b.*?</\2>)', re.S | re.I)
+BLOCK_RE = re.compile(r'(<(script|style)\b[^>]*>)(.*?)(</\2>)', re.S | re.I)
+HTML_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.S)
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+
+
+def _strip_lines(text, comment_prefix=None):
+    """逐行去掉首尾空白和空行；保留换行，避免改变 JS 的自动分号插入语义"""
+    lines = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or (comment_prefix and line.startswith(comment_prefix)):
+            continue
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def _minify_block(match):
+    open_tag, tag, body, close_tag = match.group(1), match.group(2).lower(), match.group(3), match.group(4)
+    if tag == 'style':
+        body = _strip_lines(CSS_COMMENT_RE.sub('', body))
+    else:
+        body = _strip_lines(body, comment_prefix='//')
+    return f'{open_tag}{body}{close_tag}'
+
+
+def minify_html(html):
+    """保守的 HTML 压缩：只删除行首尾空白、空行和注释，不改写标签和脚本内容"""
+    parts = PRESERVE_RE.split(html)
+    result = []
+    # split 带两个分组：[文本, 保留块, 标签名, 文本, ...]
+    for i in range(0, len(parts), 3):
+        text = HTML_COMMENT_RE.sub('', parts[i])
+        pieces = []
+        last = 0
+        for match in BLOCK_RE.finditer(text):
+            pieces.append(_strip_lines(text[last:match.start()]))
+            pieces.append(_minify_block(match))
+            last = match.end()
+        pieces.append(_strip_lines(text[last:]))
+        result.append('\n'.join(p for p in pieces if p))
+        if i + 1 < len(parts):
+            result.append(parts[i + 1])
+    return ''.join(result)
+
+
+def minify_json(data):
+    """紧凑 JSON 文本"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def gzip_bytes(data):
+    # mtime=0 保证相同内容得到相同的压缩结果
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(data):
+    """brotli 最高质量压缩；未安装 brotli 时返回 None"""
+    if brotli is None:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+def write_precompressed(path, data):
+    """写出 path.gz（以及可用时的 path.br），返回 (gzip 字节数, brotli 字节数或 None)
+
+    未安装 brotli 时删除旧的 .br，避免静态托管返回过期内容
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    gz = gzip_bytes(data)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gz)
+    br = brotli_bytes(data)
+    if br is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(br)
+    elif os.path.exists(path + '.br'):
+        os.remove(path + '.br')
+    return len(gz), (len(br) if br is not None else None)
+
+
+def print_size_table(rows):
+    """打印 (产物, 原始, 压缩后, gzip, brotli) 字节数表格，brotli 为 None 时显示 -"""
+    def kb(size):
+        return f"{size / 1024:9.1f} KB" if size is not None else f"{'-':>12}"
+
+    print(f"   📦 {'artifact':<24}{'raw':>12}{'minified':>12}{'gzip':>12}{'brotli':>12}")
+    for name, raw, minified, gz, br in rows:
+        print(f"      {name:<24}{kb(raw)}{kb(minified)}{kb(gz)}{kb(br)}")
+    if brotli is None:
+        print("      (brotli not installed, .br files skipped)")
+
+
+def remove_precompressed(path):
+    """删除 path 的 .gz / .br 兄弟文件（关闭预压缩时避免留下过期版本）"""
+    for suffix in ('.gz', '.br'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def precompress_tree(directory, compress=True):
+    """为目录下所有 .json 写出预压缩文件，并清理原文件已不存在的 .gz / .br
+
+    返回 (文件数, 原始字节数, gzip 字节数, brotli 字节数或 None)
+    """
+    count = raw_total = gz_total = 0
+    br_total = 0 if brotli is not None else None
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            base, ext = os.path.splitext(path)
+            if ext in ('.gz', '.br') and not os.path.exists(base):
+                os.remove(path)
+            elif ext == '.json':
+                if not compress:
+                    remove_precompressed(path)
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+                gz, br = write_precompressed(path, data)
+                count += 1
+                raw_total += len(data)
+                gz_total += gz
+                if br_total is not None:
+                    br_total += br
+    return count, raw_total, gz_total, br_total
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+运行剖析，写在输出文件旁边：
+--profile（CPU）
+  <name>.prof       cProfile 统计（含线程池中的各线程），可用 pstats / snakeviz 查看
+  <name>.collapsed  按固定间隔采样所有线程调用栈得到的折叠栈（墙钟时间，等待网络也会计入），
+                    可直接交给 flamegraph.pl 或 speedscope 生成火焰图
+--profile-memory（内存）
+  <name>.alloc.txt  tracemalloc 按代码行统计的内存分配排行
+两者分开运行：tracemalloc 让分配密集的代码慢一个数量级以上，与 cProfile 同时开启时热点会严重失真。
+结束时打印自身耗时最多的函数或分配最多的代码行
+"""
+
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+SAMPLE_INTERVAL = 0.005
+TRACEMALLOC_FRAMES = 10
+TOP_FUNCTIONS = 10
+TOP_ALLOCATORS = 10
+ALLOC_REPORT_LIMIT = 50
+PROFILE_MODES = ('cpu', 'memory')
+PROFILE_SUFFIXES = {'cpu': ('.prof', '.collapsed'), 'memory': ('.alloc.txt',)}
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_label(name):
+    # 线程池中的线程名带序号（ThreadPoolExecutor-0_3），去掉序号后同一个池的栈合并在一起
+    return re.sub(r'_\d+$', '', name).replace(';', ':')
+
+
+class RunProfiler:
+    """with RunProfiler(directory, name, mode): ... 期间剖析整个进程，退出时写出文件并打印摘要
+
+    mode 为 'cpu'（cProfile + 栈采样）或 'memory'（tracemalloc）
+    """
+
+    def __init__(self, directory, name, mode='cpu', interval=SAMPLE_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"profile mode must be one of {', '.join(PROFILE_MODES)}, got {mode!r}")
+        self.directory = directory or '.'
+        self.name = name
+        self.mode = mode
+        self.interval = interval
+        self.samples = Counter()
+        self._profile = cProfile.Profile()
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._started = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        self.report()
+
+    def start(self):
+        self._started = time.monotonic()
+        if self.mode == 'memory':
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            return
+        # cProfile 只剖析启用它的线程，之后新建的线程在第一次事件时各自启用一个
+        threading.setprofile(self._enable_in_thread)
+        self._sampler = threading.Thread(target=self._sample, name='profiler-sampler', daemon=True)
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self):
+        if self.mode == 'memory':
+            self.snapshot = tracemalloc.take_snapshot()
+            self.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            self._profile.disable()
+            threading.setprofile(None)
+            self._stop.set()
+            self._sampler.join()
+        self.elapsed = time.monotonic() - self._started
+
+    def _enable_in_thread(self, frame, event, arg):
+        sys.setprofile(None)
+        if threading.current_thread() is self._sampler:
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 新版本的 cProfile 全进程只能有一个活动的剖析器，此时主剖析器已覆盖所有线程
+            return
+        with self._lock:
+            self._thread_profiles.append(profile)
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(_thread_label(names.get(ident, str(ident))))
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stats(self):
+        """合并主线程与各线程的 cProfile 统计"""
+        stats = pstats.Stats(self._profile)
+        with self._lock:
+            profiles = list(self._thread_profiles)
+        for profile in profiles:
+            profile.disable()
+            try:
+                stats.add(profile)
+            except TypeError:
+                pass  # 线程没有记录到任何调用
+        return stats
+
+    def report(self):
+        """写出剖析文件并打印摘要"""
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, self.name)
+        suffixes = ','.join(PROFILE_SUFFIXES[self.mode])
+        if self.mode == 'memory':
+            self._report_memory(base, suffixes)
+        else:
+            self._report_cpu(base, suffixes)
+
+    def _report_cpu(self, base, suffixes):
+        stats = self.stats()
+        stats.dump_stats(base + '.prof')
+
+        with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f'{stack} {count}\n')
+
+        total = sum(entry[2] for entry in stats.stats.values()) or 1
+        hottest = sorted(stats.stats.items(), key=lambda entry: entry[1][2], reverse=True)[:TOP_FUNCTIONS]
+        print(f"\n🔬 Profile ({self.elapsed:.1f}s, {sum(self.samples.values())} stack samples): "
+              f"{base}{{{suffixes}}}")
+        print("   Top functions by own time:")
+        for (filename, line, function), (_, calls, own, cumulative, _) in hottest:
+            print(f"     {own / total * 100:5.1f}% {own:8.3f}s own {cumulative:8.3f}s cum {calls:>8} calls  "
+                  f"{function} ({os.path.basename(filename)}:{line})")
+
+    def _report_memory(self, base, suffixes):
+        allocations = self.snapshot.statistics('lineno')
+        with open(base + '.alloc.txt', 'w', encoding='utf-8') as f:
+            f.write(f'# peak traced memory: {self.peak} bytes\n')
+            for stat in allocations[:ALLOC_REPORT_LIMIT]:
+                f.write(f'{stat}\n')
+
+        print(f"\n🔬 Memory profile ({self.elapsed:.1f}s): {base}{suffixes}")
+        print(f"   Top allocators (peak traced {self.peak / 1024 / 1024:.1f} MB):")
+        for stat in allocations[:TOP_ALLOCATORS]:
+            frame = stat.traceback[0]
+            print(f"     {stat.size / 1024:9.1f} KB {stat.count:>8} blocks  "
+                  f"{os.path.basename(frame.filename)}:{frame.lineno}")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+按来源自适应的轮询调度
+每个来源有独立的抓取间隔：内容有变化时间隔减半，没有变化时放宽 1.5 倍，失败时加倍；
+间隔限制在 [min_interval, max_interval]，并加入随机抖动，避免所有来源同时到期
+"""
+
+import random
+
+DEFAULT_MIN_INTERVAL = 60
+DEFAULT_MAX_INTERVAL = 3600
+DEFAULT_INITIAL_INTERVAL = 300
+DEFAULT_JITTER = 0.1
+
+SPEED_UP = 0.5
+SLOW_DOWN = 1.5
+FAILURE_BACKOFF = 2.0
+
+
+class AdaptiveScheduler:
+    """来源名 -> {'interval', 'due', 'polls', 'changes', 'failures'}，时间均为 time.monotonic() 秒数"""
+
+    def __init__(self, names, now, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 initial_interval=DEFAULT_INITIAL_INTERVAL, jitter=DEFAULT_JITTER, rng=None):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        initial = self._clamp(initial_interval)
+        # 启动时所有来源立即到期，先完整抓取一轮
+        self.state = {name: {'interval': initial, 'due': now, 'polls': 0, 'changes': 0, 'failures': 0}
+                      for name in names}
+
+    def _clamp(self, interval):
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def due(self, now):
+        """已到期的来源名，按到期时间先后排列"""
+        ready = [(state['due'], name) for name, state in self.state.items() if state['due'] <= now]
+        return [name for _, name in sorted(ready)]
+
+    def seconds_until_next(self, now):
+        """距离最早一个来源到期的秒数"""
+        if not self.state:
+            return self.max_interval
+        return max(0.0, min(state['due'] for state in self.state.values()) - now)
+
+    def record(self, name, now, changed=False, ok=True):
+        """记录一次抓取结果并安排下一次，返回新的间隔（不含抖动）"""
+        state = self.state[name]
+        state['polls'] += 1
+        if not ok:
+            state['failures'] += 1
+            factor = FAILURE_BACKOFF
+        elif changed:
+            state['changes'] += 1
+            factor = SPEED_UP
+        else:
+            factor = SLOW_DOWN
+        state['interval'] = self._clamp(state['interval'] * factor)
+        spread = state['interval'] * self.jitter
+        state['due'] = now + state['interval'] + self.rng.uniform(-spread, spread)
+        return state['interval']
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+预构建的全文检索索引
+对标题和描述建倒排索引：英文按单词、中文按字符二元组切分；
+倒排表按词的首字符分片，浏览器只需下载查询涉及的分片。
+同一份索引提供 Python 查询接口，便于离线测试和基准测试
+"""
+
+import hashlib
+import json
+import os
+import re
+
+# 2: 文档表增加 ts（UTC 秒级时间戳），检索结果按它从新到旧排列
+INDEX_VERSION = 2
+MANIFEST_FILE = 'manifest.json'
+DOCS_FILE = 'docs.json'
+SHARD_DIR = 'shards'
+
+# 与页面中的 JS 分词保持一致
+CJK_CLASS = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af'
+TOKEN_RE = re.compile(f'[{CJK_CLASS}]+|[0-9a-z\u00c0-\u024f]+')
+CJK_RE = re.compile(f'[{CJK_CLASS}]')
+
+
+def tokenize(text):
+    """切词：中日韩连续文字取字符二元组（单字保留），其余取小写单词"""
+    tokens = []
+    for run in TOKEN_RE.findall((text or '').lower()):
+        if CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def shard_key(term):
+    """分片键：ASCII 字母数字取首字符，其余按首字符码位的高 8 位分组"""
+    first = term[0]
+    if first.isascii() and first.isalnum():
+        return first
+    return f'u{ord(first) >> 8:02x}'
+
+
+def encode_postings(doc_ids):
+    """升序文档号做差分编码，JSON 中数字更短"""
+    encoded = []
+    previous = 0
+    for doc_id in doc_ids:
+        encoded.append(doc_id - previous)
+        previous = doc_id
+    return encoded
+
+
+def decode_postings(deltas):
+    doc_ids = []
+    current = 0
+    for delta in deltas:
+        current += delta
+        doc_ids.append(current)
+    return doc_ids
+
+
+def collect_documents(news_data):
+    """从 news_data 中取出待索引的条目，保持快照中的顺序"""
+    docs = []
+    for source in news_data.get('sources', []):
+        for item in source.get('items', []):
+            docs.append({
+                'title': item.get('title', ''),
+                'link': item.get('link', ''),
+                'source': source.get('name', ''),
+                'description': item.get('description', ''),
+                'pubDate': item.get('pubDate', ''),
+                'ts': item.get('ts')
+            })
+    return docs
+
+
+def build_index(docs):
+    """构建 {分片键: {词: 差分编码的倒排表}}"""
+    postings = {}
+    for doc_id, doc in enumerate(docs):
+        for term in set(tokenize(f"{doc['title']} {doc['description']}")):
+            postings.setdefault(term, []).append(doc_id)
+    shards = {}
+    for term in sorted(postings):
+        shards.setdefault(shard_key(term), {})[term] = encode_postings(postings[term])
+    return shards
+
+
+def _dump(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def write_index(news_data, directory):
+    """把索引写入 directory，返回统计信息
+
+    文档表只保留渲染结果所需的字段（不含描述）；manifest 记录每个分片的内容哈希，
+    页面据此加上版本参数，分片内容不变时浏览器缓存继续有效
+    """
+    docs = collect_documents(news_data)
+    shards = build_index(docs)
+    shard_dir = os.path.join(directory, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    # 清理已经不存在的旧分片
+    wanted = {f'{key}.json' for key in shards}
+    for name in os.listdir(shard_dir):
+        if name.endswith('.json') and name not in wanted:
+            os.remove(os.path.join(shard_dir, name))
+
+    manifest_shards = {}
+    total_bytes = 0
+    for key, terms in shards.items():
+        payload = _dump(terms)
+        total_bytes += len(payload.encode('utf-8'))
+        manifest_shards[key] = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:8]
+        with open(os.path.join(shard_dir, f'{key}.json'), 'w', encoding='utf-8') as f:
+            f.write(payload)
+
+    docs_payload = _dump([[d['title'], d['link'], d['source'], d['pubDate'], d.get('ts')] for d in docs])
+    with open(os.path.join(directory, DOCS_FILE), 'w', encoding='utf-8') as f:
+        f.write(docs_payload)
+
+    manifest = {
+        'version': INDEX_VERSION,
+        'docCount': len(docs),
+        'docs': hashlib.sha1(docs_payload.encode('utf-8')).hexdigest()[:8],
+        'shards': manifest_shards
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        f.write(_dump(manifest))
+
+    return {
+        'docs': len(docs),
+        'terms': sum(len(terms) for terms in shards.values()),
+        'shards': len(shards),
+        'shardBytes': total_bytes,
+        'docsBytes': len(docs_payload.encode('utf-8'))
+    }
+
+
+class SearchIndex:
+    """读取 write_index 产出的索引，按需加载分片"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self._docs = None
+        self._shards = {}
+        self.shards_loaded = 0
+
+    @property
+    def docs(self):
+        if self._docs is None:
+            with open(os.path.join(self.directory, DOCS_FILE), 'r', encoding='utf-8') as f:
+                self._docs = json.load(f)
+        return self._docs
+
+    def _shard(self, key):
+        if key not in self._shards:
+            terms = {}
+            if key in self.manifest['shards']:
+                with open(os.path.join(self.directory, SHARD_DIR, f'{key}.json'), 'r', encoding='utf-8') as f:
+                    terms = json.load(f)
+                self.shards_loaded += 1
+            self._shards[key] = terms
+        return self._shards[key]
+
+    def postings(self, term):
+        """词的文档号集合；单个汉字按前缀匹配所有以它开头的二元组"""
+        shard = self._shard(shard_key(term))
+        if len(term) == 1 and CJK_RE.match(term):
+            doc_ids = set()
+            for other, deltas in shard.items():
+                if other.startswith(term):
+                    doc_ids.update(decode_postings(deltas))
+            return doc_ids
+        return set(decode_postings(shard.get(term, [])))
+
+    def search(self, query, limit=20):
+        """所有词都命中的文档（AND），按 ts 从新到旧（没有 ts 的排在最后，其次按快照顺序）
+        返回 {'title', 'link', 'source', 'pubDate', 'ts'}，与页面中的排序一致
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        result = None
+        # 先取较短的倒排表，尽早缩小候选集
+        for doc_ids in sorted((self.postings(term) for term in terms), key=len):
+            result = doc_ids if result is None else result & doc_ids
+            if not result:
+                return []
+        fields = ('title', 'link', 'source', 'pubDate', 'ts')
+        docs = self.docs
+
+        def newest_first(doc_id):
+            ts = docs[doc_id][4]
+            return (ts is None, -(ts or 0), doc_id)
+
+        return [dict(zip(fields, docs[doc_id])) for doc_id in sorted(result, key=newest_first)[:limit]]
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+分片抓取
+用一致性哈希把来源分配到 N 个分片（按 URL 哈希，增减分片数时只有约 1/N 的来源换分片，
+各分片的 HTTP 缓存与健康记录因此大体保持有效），每个分片写出一个可合并的部分快照：
+
+  第一行   {"partial": 1, "shard": i, "shards": N, "runId": ..., "fetchTime": ...,
+            "sources": [不含条目的来源元数据]}
+  其余各行 {"source": 来源名, "item": 条目}，所有来源的条目按 ts 从新到旧排列（没有 ts 的排在最后）
+
+合并时对各分片的条目流做 k 路归并，只需逐行读取，不必把部分快照整个载入内存。
+runId 标识同一轮抓取（默认取 GITHUB_RUN_ID），合并时丢弃上一轮留下的部分快照
+"""
+
+import bisect
+import hashlib
+import heapq
+import json
+import os
+from datetime import datetime
+
+PARTIAL_DIR_NAME = 'partials'
+# 同一轮各分片共享的运行标识默认取自这个环境变量
+RUN_ID_ENV = 'GITHUB_RUN_ID'
+# 没有运行标识时，fetchTime 比最新的部分快照早这么多秒以上的视为上一轮留下的
+PARTIAL_MAX_SKEW = 1800
+# 每个分片在哈希环上的虚拟节点数，越多分配越均匀
+RING_REPLICAS = 64
+
+
+def parse_shard(spec):
+    """解析 'i/N'（0 <= i < N），返回 (i, N)；格式不对时抛出 ValueError"""
+    index, sep, count = str(spec).partition('/')
+    if not sep or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"shard must look like i/N, got {spec!r}")
+    index, count = int(index), int(count)
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"shard index must be in [0, {count}), got {spec!r}")
+    return index, count
+
+
+def _ring_hash(key):
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """N 个分片的一致性哈希环"""
+
+    def __init__(self, count, replicas=RING_REPLICAS):
+        self.count = count
+        points = sorted((_ring_hash(f'shard-{shard}#{replica}'), shard)
+                        for shard in range(count) for replica in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_of(self, key):
+        """key 所属的分片：环上顺时针方向的第一个虚拟节点"""
+        position = bisect.bisect(self._hashes, _ring_hash(key)) % len(self._hashes)
+        return self._shards[position]
+
+
+def shard_sources(sources, shard):
+    """sources 中属于分片 shard=(i, N) 的来源，保持原顺序"""
+    index, count = shard
+    ring = HashRing(count)
+    return [source for source in sources if ring.shard_of(source['url']) == index]
+
+
+def shard_label(shard):
+    """分片的文件名片段，如 shard-0-of-4"""
+    return f'shard-{shard[0]}-of-{shard[1]}'
+
+
+def partial_path(output_dir, shard):
+    """分片部分快照的默认路径：<output_dir>/partials/shard-i-of-N.jsonl"""
+    return os.path.join(output_dir or '.', PARTIAL_DIR_NAME, shard_label(shard) + '.jsonl')
+
+
+def _newest_first(record):
+    ts = record['item'].get('ts')
+    return -ts if ts is not None else float('inf')
+
+
+def default_run_id():
+    """环境变量 RUN_ID_ENV 中的运行标识，没有时返回 None"""
+    return os.environ.get(RUN_ID_ENV) or None
+
+
+def write_partial(news_data, path, shard, order, run_id=None):
+    """把分片的 news_data 写成部分快照
+
+    order 为来源名 -> 在完整来源列表中的位置（合并后按它排序），run_id 为本轮抓取的标识
+    """
+    header = {
+        'partial': 1,
+        'shard': shard[0],
+        'shards': shard[1],
+        'runId': run_id,
+        'fetchTime': news_data['fetchTime'],
+        'sources': [dict({k: v for k, v in source.items() if k != 'items'}, order=order.get(source['name']))
+                    for source in news_data['sources']]
+    }
+    # 各来源的条目已按 ts 从新到旧排列，归并即可得到整体顺序
+    streams = [[{'source': source['name'], 'item': item} for item in source.get('items', [])]
+               for source in news_data['sources']]
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(header, ensure_ascii=False, separators=(',', ':')) + '\n')
+        for record in heapq.merge(*streams, key=_newest_first):
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_partial_header(path):
+    """只读取部分快照的第一行"""
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+    if header.get('partial') != 1:
+        raise ValueError(f"{path} is not a partial snapshot")
+    return header
+
+
+def current_partials(paths, run_id=None, max_skew=PARTIAL_MAX_SKEW):
+    """筛出属于本轮抓取的部分快照，返回 (本轮的路径, 丢弃的路径)
+
+    run_id 为 None 时以 fetchTime 最新的部分快照的 runId 为本轮；本轮没有 runId 时，
+    改为丢弃 fetchTime 比最新的部分快照早 max_skew 秒以上的
+    """
+    headers = {path: read_partial_header(path) for path in paths}
+    if not headers:
+        return [], []
+    newest = max(headers.values(), key=lambda header: header['fetchTime'])
+    if run_id is None:
+        run_id = newest.get('runId')
+    if run_id is not None:
+        current = [path for path in paths if headers[path].get('runId') == run_id]
+    else:
+        cutoff = datetime.fromisoformat(newest['fetchTime']).timestamp() - max_skew
+        current = [path for path in paths
+                   if datetime.fromisoformat(headers[path]['fetchTime']).timestamp() >= cutoff]
+    return current, [path for path in paths if path not in current]
+
+
+def iter_partial_items(path):
+    """逐行产出部分快照中的 {'source', 'item'} 记录"""
+    with open(path, 'r', encoding='utf-8') as f:
+        f.readline()
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def merge_partials(paths, max_items_per_source):
+    """k 路归并多个部分快照，返回 (来源列表, 最新的 fetchTime, 缺失的分片号)
+
+    来源按 order 排序，各来源最多保留 max_items_per_source 条最新条目；
+    内存中只保留这些条目，部分快照本身逐行读取
+    """
+    headers = [read_partial_header(path) for path in paths]
+    sources = {}
+    for header in headers:
+        for source in header['sources']:
+            sources[source['name']] = dict(source, items=[])
+    counts = {header['shards'] for header in headers}
+    if len(counts) > 1:
+        raise ValueError(f"partials come from different shard counts: {sorted(counts)}")
+    missing = sorted(set(range(counts.pop())) - {header['shard'] for header in headers}) if headers else []
+
+    for record in heapq.merge(*(iter_partial_items(path) for path in paths), key=_newest_first):
+        source = sources.get(record['source'])
+        if source is not None and len(source['items']) < max_items_per_source:
+            source['items'].append(record['item'])
+
+    ordered = sorted(sources.values(), key=lambda source: (source.get('order') is None, source.get('order') or 0))
+    for source in ordered:
+        source.pop('order', None)
+        source['itemCount'] = len(source['items'])
+    fetch_time = max((header['fetchTime'] for header in headers), default=None)
+    return ordered, fetch_time, missing
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+新闻源健康记录与熔断
+按来源持久化成功率、连续失败次数、最近一次耗时和错误类型；
+连续失败达到阈值后熔断（open），冷却期内跳过该源，冷却结束后放行一次探测（half-open），
+探测成功恢复（closed），失败则冷却时间加倍
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from http_client import HTTPStatusError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_BASE_COOLDOWN = 3600
+DEFAULT_MAX_COOLDOWN = 7 * 24 * 3600
+# 半开探测只是确认源是否恢复，不值得等满单源截止时间
+PROBE_TIMEOUT = 5
+# 成功率为指数滑动平均，越大越看重最近几次
+SUCCESS_RATE_ALPHA = 0.2
+# 保留最近多少次成功抓取的耗时，用于估计耗时分位数
+LATENCY_HISTORY = 20
+# 样本少于该数时不估计分位数
+MIN_LATENCY_SAMPLES = 5
+
+
+def error_class(error):
+    """错误类型的简短名称：HTTP 错误带状态码，其余取异常类名"""
+    if isinstance(error, HTTPStatusError):
+        return f'HTTP {error.status}'
+    return type(error).__name__
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec='seconds')
+
+
+class SourceHealth:
+    """来源名 -> 健康记录，保存在磁盘 JSON 文件中（线程安全，时间均为 time.time() 秒数）"""
+
+    def __init__(self, path, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 base_cooldown=DEFAULT_BASE_COOLDOWN, max_cooldown=DEFAULT_MAX_COOLDOWN):
+        self.path = path
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max(base_cooldown, max_cooldown)
+        self.sources = {}
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.sources = json.load(f).get('sources', {})
+            except (OSError, ValueError) as e:
+                # 记录损坏时从头统计，不影响抓取
+                print(f"Ignoring unreadable source health {path}: {e}")
+                self.sources = {}
+
+    def _record(self, name):
+        record = self.sources.get(name)
+        if record is None:
+            record = self.sources[name] = {
+                'state': CLOSED,
+                'attempts': 0,
+                'successes': 0,
+                'successRate': None,
+                'consecutiveFailures': 0,
+                'lastLatency': None,
+                'latencies': [],
+                'lastError': None,
+                'failingSince': None,
+                'cooldown': 0,
+                'retryAt': None
+            }
+        return record
+
+    def allow(self, name, now=None):
+        """本次是否抓取该源：返回 CLOSED / HALF_OPEN（放行）或 OPEN（跳过）"""
+        now = time.time() if now is None else now
+        with self._lock:
+            record = self._record(name)
+            if record['state'] == OPEN:
+                if record['retryAt'] is not None and now < record['retryAt']:
+                    self.skipped += 1
+                    return OPEN
+                record['state'] = HALF_OPEN
+                self._dirty = True
+            return record['state']
+
+    def record_success(self, name, latency):
+        """记录一次成功抓取，熔断状态恢复为 closed"""
+        with self._lock:
+            record = self._record(name)
+            self._count(record, True, latency)
+            latencies = record.setdefault('latencies', [])
+            latencies.append(round(latency, 3))
+            del latencies[:-LATENCY_HISTORY]
+            record.update(state=CLOSED, consecutiveFailures=0, lastError=None, failingSince=None,
+                          cooldown=0, retryAt=None)
+
+    def record_failure(self, name, error, latency, now=None):
+        """记录一次失败；连续失败达到阈值或半开探测失败时熔断，冷却时间按次加倍"""
+        now = time.time() if now is None else now
+        with self._lock:
+            record = self._record(name)
+            self._count(record, False, latency)
+            record['consecutiveFailures'] += 1
+            record['lastError'] = error
+            if record['failingSince'] is None:
+                record['failingSince'] = now
+            if record['state'] == HALF_OPEN or record['consecutiveFailures'] >= self.failure_threshold:
+                cooldown = record['cooldown'] * 2 if record['cooldown'] else self.base_cooldown
+                record['cooldown'] = min(self.max_cooldown, cooldown)
+                record['retryAt'] = now + record['cooldown']
+                record['state'] = OPEN
+
+    def _count(self, record, ok, latency):
+        record['attempts'] += 1
+        record['successes'] += 1 if ok else 0
+        outcome = 1.0 if ok else 0.0
+        rate = record['successRate']
+        rate = outcome if rate is None else rate + SUCCESS_RATE_ALPHA * (outcome - rate)
+        record['successRate'] = round(rate, 4)
+        record['lastLatency'] = round(latency, 3)
+        self._dirty = True
+
+    def latency_quantile(self, name, q):
+        """最近成功抓取耗时的 q 分位数（最近邻法），样本不足时返回 None"""
+        with self._lock:
+            record = self.sources.get(name)
+            latencies = sorted(record.get('latencies', [])) if record else []
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        return latencies[max(0, math.ceil(q * len(latencies)) - 1)]
+
+    def public(self, name):
+        """写入 news_data.json 的健康状态
+
+        只包含状态变化时才会变化的字段（不含耗时、成功率），避免每次运行都让新闻集合的哈希变化
+        """
+        with self._lock:
+            record = self._record(name)
+            if record['state'] == CLOSED and not record['consecutiveFailures']:
+                return {'status': 'ok'}
+            status = 'down' if record['state'] == OPEN else 'degraded'
+            health = {'status': status, 'lastError': record['lastError']}
+            if record['failingSince'] is not None:
+                health['since'] = _iso(record['failingSince'])
+            if record['state'] == OPEN and record['retryAt'] is not None:
+                health['retryAt'] = _iso(record['retryAt'])
+            return health
+
+    def summary(self, names):
+        """names 中各状态的来源数：{'ok', 'degraded', 'down'}"""
+        counts = {'ok': 0, 'degraded': 0, 'down': 0}
+        for name in names:
+            counts[self.public(name)['status']] += 1
+        return counts
+
+    def save(self):
+        """原子写回磁盘，内容未变化时不写"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'sources': self.sources}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+            self._dirty = False